@@ -1,34 +1,157 @@
-import psycopg2
-from data.config import DB_CONFIG
+from asakk.database import get_connection, get_backend, like_pattern
+from asakk import rollups
+from asakk.cache import bump_data_version
+from asakk.metrics import instrumented, record_cache
+from data.config import AUTH_CONFIG
+import csv
+import hashlib
+import hmac
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
-file_handler = logging.FileHandler("asakk.log", encoding="utf-8")
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-logger.propagate = False  # ❌ Отключаем вывод в консоль
+VALID_ROLES = ("Employee", "Manager", "Admin")
 
+# Сколько пользователей обрабатывается одним запросом при массовом импорте
+PROVISION_BATCH_SIZE = 500
 
+
+@instrumented
 def get_all_users():
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, username, role FROM users ORDER BY role DESC")
-    users = cursor.fetchall()
-    conn.close()
-    return users
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, username, role FROM users ORDER BY role DESC")
+        return cursor.fetchall()
+
+
+def _user_filters(search=None, role=None):
+    conditions, params = [], []
+    if search:
+        conditions.append("LOWER(username) LIKE %s ESCAPE '\\'")
+        params.append(like_pattern(search))
+    if role:
+        conditions.append("role = %s")
+        params.append(role)
+    return conditions, params
+
+
+@instrumented
+def get_users_page(after=None, limit=100, search=None, role=None):
+    """
+    Страница пользователей по возрастанию username (постраничный вывод по ключу).
+    :param after: username последней строки предыдущей страницы; None — первая страница
+    :param search: подстрока имени без учёта регистра
+    :return: список (id, username, role)
+    """
+    conditions, params = _user_filters(search, role)
+    if after is not None:
+        conditions.append("username > %s")
+        params.append(after)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT id, username, role FROM users {where} ORDER BY username LIMIT %s",
+            params + [limit]
+        )
+        return cursor.fetchall()
+
+
+@instrumented
+def count_users(search=None, role=None):
+    conditions, params = _user_filters(search, role)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM users {where}", params)
+        return cursor.fetchone()[0]
+
 
+def key_fingerprint(ssh_key):
+    """Отпечаток ключа фиксированной длины (SHA-256, hex), хранится в users.key_fingerprint"""
+    return hashlib.sha256(ssh_key.encode("utf-8")).hexdigest()
+
+
+# Кэш успешных входов: username -> (отпечаток ключа, (id, username, role), истекает в)
+_login_cache = {}
+_login_cache_lock = threading.Lock()
+
+
+def _cached_login(username, fingerprint):
+    with _login_cache_lock:
+        entry = _login_cache.get(username)
+        if entry is None:
+            return None
+        cached_fingerprint, user, expires_at = entry
+        if expires_at <= time.monotonic():
+            del _login_cache[username]
+            return None
+    return user if hmac.compare_digest(cached_fingerprint, fingerprint) else None
+
+
+def _remember_login(fingerprint, user):
+    ttl = AUTH_CONFIG['login_cache_ttl']
+    if ttl <= 0:
+        return
+    with _login_cache_lock:
+        _login_cache[user[1]] = (fingerprint, user, time.monotonic() + ttl)
+
+
+def invalidate_login_cache(username=None, user_id=None):
+    """Сбрасывает кэш входов: для одного пользователя (по имени или ID) или целиком"""
+    with _login_cache_lock:
+        if username is None and user_id is None:
+            _login_cache.clear()
+            return
+        for name, (_, user, _) in list(_login_cache.items()):
+            if name == username or user[0] == user_id:
+                del _login_cache[name]
+
+
+@instrumented
 def authenticate(username, ssh_key):
+    """
+    Проверяет логин и ключ. Пользователь ищется по уникальному индексу username,
+    отпечаток ключа сравнивается за постоянное время. Успешный вход запоминается
+    на AUTH_CONFIG['login_cache_ttl'] секунд, повторный вход в это время БД не трогает.
+    :return: (id, username, role) или None
+    """
     logger.debug(f"Попытка входа: {username}")
-    conn = None
+    fingerprint = key_fingerprint(ssh_key)
+    user = _cached_login(username, fingerprint)
+    record_cache(bool(user))
+    if user:
+        logger.info(f"Пользователь вошёл (кэш): {user[1]} ({user[2]})")
+        return user
+
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, username, role FROM users WHERE username=%s AND ssh_key=%s", (username, ssh_key))
-        user = cursor.fetchone()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, username, role, key_fingerprint, ssh_key FROM users WHERE username=%s",
+                (username,)
+            )
+            row = cursor.fetchone()
+            user = None
+            if row is not None:
+                user_id, name, role, stored_fingerprint, stored_key = row
+                if stored_fingerprint is not None:
+                    matched = hmac.compare_digest(stored_fingerprint, fingerprint)
+                else:
+                    # Пользователь добавлен старым клиентом без отпечатка — сверяем ключ и дописываем отпечаток
+                    matched = hmac.compare_digest(stored_key.encode("utf-8"), ssh_key.encode("utf-8"))
+                    if matched:
+                        cursor.execute(
+                            "UPDATE users SET key_fingerprint = %s WHERE id = %s",
+                            (fingerprint, user_id)
+                        )
+                        conn.commit()
+                if matched:
+                    user = (user_id, name, role)
         if user:
+            _remember_login(fingerprint, user)
             logger.info(f"Пользователь вошёл: {user[1]} ({user[2]})")
         else:
             logger.warning("Неверный логин или SSH-ключ")
@@ -36,52 +159,184 @@ def authenticate(username, ssh_key):
     except Exception as e:
         logger.error(f"Ошибка при авторизации: {e}", exc_info=True)
         return None
-    finally:
-        if conn:
-            conn.close()
 
 
+@instrumented
+def get_user_role(user_id):
+    """Роль пользователя; для недавно вошедших берётся из кэша входов"""
+    now = time.monotonic()
+    with _login_cache_lock:
+        for _, user, expires_at in _login_cache.values():
+            if user[0] == user_id and expires_at > now:
+                return user[2]
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT role FROM users WHERE id = %s", (user_id,))
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+@instrumented
 def add_user_to_db(username, ssh_key, role="Employee"):
     logger.debug(f"Добавление пользователя: {username}, роль: {role}")
-    conn = None
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO users (username, ssh_key, role) VALUES (%s, %s, %s)",
-            (username, ssh_key, role)
-        )
-        conn.commit()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO users (username, ssh_key, key_fingerprint, role) VALUES (%s, %s, %s, %s) RETURNING id",
+                (username, ssh_key, key_fingerprint(ssh_key), role)
+            )
+            user_id = cursor.fetchone()[0]
+            conn.commit()
         logger.info(f"Пользователь {username} успешно добавлен")
+        return user_id
     except Exception as e:
         logger.error(f"Не удалось добавить пользователя: {e}", exc_info=True)
-        if conn:
-            conn.rollback()
-    finally:
-        if conn:
-            conn.close()
+        return None
 
+@instrumented
 def delete_user_from_db(user_id):
     logger.debug(f"Удаление пользователя ID={user_id}")
-    conn = None
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
+        with get_connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-        user = cursor.fetchone()
-        if not user:
-            logger.warning(f"Пользователь с ID={user_id} не найден")
-            return False
+            cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
+            user = cursor.fetchone()
+            if not user:
+                logger.warning(f"Пользователь с ID={user_id} не найден")
+                return False
 
-        cursor.execute("DELETE FROM answers WHERE user_id = %s", (user_id,))
-        cursor.execute("DELETE FROM users WHERE id = %s AND role != 'Admin'", (user_id,))
-        conn.commit()
+            rollups.remove_user_answers(cursor, user_id)
+            cursor.execute("DELETE FROM answers WHERE user_id = %s", (user_id,))
+            cursor.execute("DELETE FROM users WHERE id = %s AND role != 'Admin'", (user_id,))
+            bump_data_version(cursor)
+            conn.commit()
+        invalidate_login_cache(user_id=user_id)
         logger.info(f"Пользователь ID={user_id} удален")
         return True
     except Exception as e:
         logger.error(f"Ошибка при удалении пользователя: {e}", exc_info=True)
         return False
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
+
+
+def read_users_csv(path):
+    """
+    Читает пользователей из CSV со столбцами username, role, key (или ssh_key).
+    :return: список словарей {'line', 'username', 'role', 'ssh_key'}
+    """
+    rows = []
+    with open(path, encoding="utf-8-sig", newline="") as file:
+        reader = csv.DictReader(file)
+        fields = set(reader.fieldnames or ())
+        if "username" not in fields or not fields & {"key", "ssh_key"}:
+            raise ValueError("В CSV нужны столбцы username, role и key")
+        for line, row in enumerate(reader, start=2):
+            rows.append({
+                "line": line,
+                "username": (row.get("username") or "").strip(),
+                "role": (row.get("role") or "").strip() or "Employee",
+                "ssh_key": (row.get("key") or row.get("ssh_key") or "").strip(),
+            })
+    return rows
+
+
+@instrumented
+def provision_users(rows, update_existing=False):
+    """
+    Массовое добавление пользователей в одной транзакции.
+    Все строки проверяются до записи; ошибочные не записываются и попадают в отчёт.
+    :param rows: словари {'username', 'role', 'ssh_key'} и необязательно 'line'
+    :param update_existing: обновлять роль и ключ существующих пользователей
+        (иначе они пропускаются)
+    :return: {'inserted', 'updated', 'skipped', 'errors': [{'line', 'username', 'error'}]}
+    """
+    errors = []
+    valid = []
+    seen = set()
+    for index, row in enumerate(rows, start=1):
+        line = row.get("line", index)
+        username = row.get("username", "")
+        if not username:
+            error = "пустое имя пользователя"
+        elif not row.get("ssh_key"):
+            error = "пустой ключ"
+        elif row.get("role") not in VALID_ROLES:
+            error = f"неизвестная роль '{row.get('role')}'"
+        elif username in seen:
+            error = "повторяется в файле"
+        else:
+            seen.add(username)
+            valid.append((line, username, row["role"], row["ssh_key"]))
+            continue
+        errors.append({"line": line, "username": username, "error": error})
+
+    report = {"inserted": 0, "updated": 0, "skipped": 0, "errors": errors}
+    if not valid:
+        return report
+
+    backend = get_backend()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            for start in range(0, len(valid), PROVISION_BATCH_SIZE):
+                batch = valid[start:start + PROVISION_BATCH_SIZE]
+                placeholders = ', '.join(['%s'] * len(batch))
+                cursor.execute(
+                    f"SELECT username FROM users WHERE username IN ({placeholders})",
+                    [username for _, username, _, _ in batch]
+                )
+                existing = {row[0] for row in cursor.fetchall()}
+
+                new_rows = [(line, u, r, k) for line, u, r, k in batch if u not in existing]
+                existing_rows = [(line, u, r, k) for line, u, r, k in batch if u in existing]
+                if new_rows:
+                    inserted = {row[0] for row in backend.insert_many(
+                        cursor,
+                        "INSERT INTO users (username, role, ssh_key, key_fingerprint) VALUES %s "
+                        "ON CONFLICT (username) DO NOTHING RETURNING username",
+                        [(u, r, k, key_fingerprint(k)) for _, u, r, k in new_rows],
+                        page_size=PROVISION_BATCH_SIZE,
+                        fetch=True
+                    )}
+                    report["inserted"] += len(inserted)
+                    # Не вставлены — пользователя добавили параллельно после проверки выше
+                    existing_rows.extend(row for row in new_rows if row[1] not in inserted)
+
+                if not existing_rows:
+                    continue
+                if update_existing:
+                    backend.insert_many(
+                        cursor,
+                        "INSERT INTO users (username, role, ssh_key, key_fingerprint) VALUES %s "
+                        "ON CONFLICT (username) DO UPDATE SET role = excluded.role, "
+                        "ssh_key = excluded.ssh_key, key_fingerprint = excluded.key_fingerprint",
+                        [(u, r, k, key_fingerprint(k)) for _, u, r, k in existing_rows],
+                        page_size=PROVISION_BATCH_SIZE
+                    )
+                    report["updated"] += len(existing_rows)
+                else:
+                    report["skipped"] += len(existing_rows)
+                    errors.extend(
+                        {"line": line, "username": u, "error": "уже существует"}
+                        for line, u, _, _ in existing_rows
+                    )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Массовый импорт пользователей не выполнен: {e}", exc_info=True)
+            raise
+
+    if update_existing:
+        invalidate_login_cache()
+    errors.sort(key=lambda item: item["line"])
+    logger.info(
+        f"Импорт пользователей: добавлено {report['inserted']}, обновлено {report['updated']}, "
+        f"пропущено {report['skipped']}, ошибок {len(errors) - report['skipped']}"
+    )
+    return report
+
+
+def import_users_csv(path, update_existing=False):
+    """Импорт пользователей из CSV (см. read_users_csv и provision_users)"""
+    return provision_users(read_users_csv(path), update_existing)
@@ -0,0 +1,187 @@
+"""
+Пакетная генерация отчётов без графического интерфейса.
+
+Запуск:
+    python -m asakk.batch_report --out reports --formats png,pdf --workers 4
+
+Все данные выбираются из БД одним проходом в основном процессе (ответы
+всех категорий — одним запросом, report.get_category_reports), графики
+(общий, по категориям, распределение, круговая диаграмма, тренд)
+строятся параллельно в процессах с бэкендом Agg. В каталоге вывода
+ведётся manifest.json с хэшем входных данных каждого графика: если
+данные не изменились с прошлого запуска и файлы на месте, график
+не перерисовывается.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from asakk import report
+from asakk.logging_config import setup_logging
+from asakk.quiz import get_categories
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ("png", "svg", "pdf")
+MANIFEST_NAME = "manifest.json"
+
+
+def _json_default(value):
+    # numpy-массивы и скаляры (результат calculate_category_trend)
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+def _data_hash(builder, args):
+    payload = json.dumps([builder, args], sort_keys=True, ensure_ascii=False, default=_json_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _slug(text):
+    return re.sub(r"[^\w]+", "_", text).strip("_").lower()
+
+
+def collect_jobs():
+    """
+    Выбирает данные для всех графиков.
+    Возвращает список заданий (chart_id, имя построителя из asakk.report, аргументы).
+    """
+    jobs = []
+    survey_data = report.analyze_survey_data()
+    if survey_data:
+        jobs.append(("overall", "build_overall_chart", (survey_data,)))
+
+    score_matrix = report.get_score_matrix()
+    category_reports = report.get_category_reports()
+    for category in get_categories():
+        slug = _slug(category)
+        category_data, trend_data = category_reports.get(category, (None, None))
+        if category_data:
+            jobs.append((f"category_{slug}", "build_category_bar_chart", (category_data, category)))
+
+        score_counts = report.score_counts_from_matrix(score_matrix, category)
+        if score_counts:
+            jobs.append((f"distribution_{slug}", "build_score_distribution_chart", (score_counts, category)))
+            jobs.append((f"pie_{slug}", "build_score_pie_chart", (score_counts, category)))
+
+        if trend_data is not None:
+            jobs.append((f"trend_{slug}", "build_trend_chart", (trend_data, category)))
+    return jobs
+
+
+def render_chart(builder, args, paths):
+    """Строит график в отдельном процессе и сохраняет его во все указанные файлы"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig = getattr(report, builder)(*args)
+    try:
+        for path in paths:
+            fig.savefig(path, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+    return paths
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {"charts": {}}
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def run(out_dir, formats=("png",), workers=None, force=False):
+    """
+    Генерирует все отчёты в out_dir.
+    :return: словарь {'rendered': [...], 'skipped': [...], 'failed': [...]}
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    previous = manifest.get("charts", {})
+    charts = {}
+    summary = {"rendered": [], "skipped": [], "failed": []}
+
+    pending = []
+    for chart_id, builder, args in collect_jobs():
+        data_hash = _data_hash(builder, args)
+        files = [f"{chart_id}.{fmt}" for fmt in formats]
+        entry = previous.get(chart_id)
+        up_to_date = (
+            entry is not None
+            and entry.get("hash") == data_hash
+            and all(os.path.exists(os.path.join(out_dir, name)) for name in files)
+        )
+        if up_to_date and not force:
+            charts[chart_id] = entry
+            summary["skipped"].append(chart_id)
+            continue
+        charts[chart_id] = {"hash": data_hash, "builder": builder, "files": files}
+        pending.append((chart_id, builder, args, [os.path.join(out_dir, name) for name in files]))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(render_chart, builder, args, paths): chart_id
+                for chart_id, builder, args, paths in pending
+            }
+            for future in as_completed(futures):
+                chart_id = futures[future]
+                try:
+                    future.result()
+                    charts[chart_id]["rendered_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+                    summary["rendered"].append(chart_id)
+                except Exception as e:
+                    logger.error(f"Не удалось построить график {chart_id}: {e}", exc_info=True)
+                    # Без хэша график будет перестроен при следующем запуске
+                    charts[chart_id].pop("hash", None)
+                    summary["failed"].append(chart_id)
+
+    manifest = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "formats": list(formats),
+        "charts": charts,
+    }
+    save_manifest(out_dir, manifest)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная генерация отчётов АСАКК")
+    parser.add_argument("--out", default="reports", help="каталог для графиков и manifest.json")
+    parser.add_argument("--formats", default="png",
+                        help=f"форматы через запятую: {', '.join(SUPPORTED_FORMATS)}")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию — число ядер)")
+    parser.add_argument("--force", action="store_true", help="перерисовать все графики")
+    args = parser.parse_args()
+    setup_logging()
+
+    formats = [fmt.strip().lower() for fmt in args.formats.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in SUPPORTED_FORMATS]
+    if unknown or not formats:
+        parser.error(f"неподдерживаемые форматы: {', '.join(unknown) or '—'}")
+
+    summary = run(args.out, formats, args.workers, args.force)
+    print(f"✅ Построено: {len(summary['rendered'])}, без изменений: {len(summary['skipped'])}, "
+          f"ошибок: {len(summary['failed'])} → {args.out}")
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
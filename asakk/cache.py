@@ -0,0 +1,208 @@
+"""
+Кэш результатов отчётных запросов.
+
+Два уровня:
+- в памяти: LRU ограниченного размера с TTL;
+- на диске (необязательно, CACHE_CONFIG['disk_dir']): переживает перезапуск.
+
+Ключ — база (backend.source), функция и её аргументы: дисковый кэш общий
+для запусков, и разные базы не должны отдавать друг другу отчёты при
+совпадении номеров версий. Каждая запись помечена версией данных из
+таблицы data_version; версия увеличивается в той же транзакции, что и
+save_answers, add_question_with_recommendation, delete_question_by_id и
+delete_user_from_db, поэтому после изменения данных (в том числе с другого
+рабочего места) старые записи перестают совпадать по версии.
+"""
+import copy
+import functools
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from asakk.database import get_connection, get_backend
+from asakk.metrics import record_cache
+from data.config import CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_DDL = '''
+    CREATE TABLE IF NOT EXISTS data_version (
+        id SMALLINT PRIMARY KEY CHECK (id = 1),
+        version BIGINT NOT NULL
+    );
+    INSERT INTO data_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+'''
+
+
+def create_data_version_table(cursor):
+    get_backend().execute_script(cursor, DATA_VERSION_DDL)
+
+
+def bump_data_version(cursor):
+    """Увеличивает версию данных в текущей транзакции (фиксирует вызывающий)"""
+    global _version_checked_at
+    cursor.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+    _version_checked_at = 0.0
+
+
+_version = None
+_version_source = None  # база, из которой прочитана _version
+_version_checked_at = 0.0
+_version_lock = threading.Lock()
+
+
+def current_data_version():
+    """
+    Текущая версия данных. Читается из БД не чаще раза в
+    CACHE_CONFIG['version_check_interval'] секунд; None — версия недоступна.
+    """
+    global _version, _version_source, _version_checked_at
+    with _version_lock:
+        now = time.monotonic()
+        source = get_backend().source
+        if (_version_checked_at and _version_source == source
+                and now - _version_checked_at < CACHE_CONFIG['version_check_interval']):
+            return _version
+        _version_source = source
+        try:
+            with get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT version FROM data_version WHERE id = 1")
+                row = cursor.fetchone()
+            _version = row[0] if row else None
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать версию данных, кэш отключён: {e}")
+            _version = None
+        _version_checked_at = now
+        return _version
+
+
+class ReportCache:
+    """LRU-кэш с TTL в памяти и необязательным вторым уровнем на диске"""
+
+    def __init__(self, maxsize=128, ttl=300.0, disk_dir=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()  # key -> (version, expires_at, value)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".pkl")
+
+    def get(self, key, version):
+        """Возвращает (True, значение) при попадании, иначе (False, None)"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_version, expires_at, value = entry
+                if entry_version == version and expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return True, value
+                del self._entries[key]
+
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), "rb") as file:
+                    entry_version, expires_at, value = pickle.load(file)
+                if entry_version == version and expires_at > now:
+                    with self._lock:
+                        self._store(key, (entry_version, expires_at, value))
+                        self._stats["disk_hits"] += 1
+                    return True, value
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Повреждённая запись дискового кэша {key}: {e}")
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return False, None
+
+    def put(self, key, version, value):
+        entry = (version, time.time() + self.ttl, value)
+        with self._lock:
+            self._store(key, entry)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "wb") as file:
+                    pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                logger.warning(f"Не удалось записать дисковый кэш {key}: {e}")
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.disk_dir:
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".pkl"):
+                    os.remove(os.path.join(self.disk_dir, name))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+_cache = ReportCache(
+    maxsize=CACHE_CONFIG['maxsize'],
+    ttl=CACHE_CONFIG['ttl'],
+    disk_dir=CACHE_CONFIG['disk_dir']
+)
+
+
+def _make_key(func, args, kwargs):
+    return f"{get_backend().source}|{func.__module__}.{func.__qualname__}:{args!r}:{sorted(kwargs.items())!r}"
+
+
+def cached(func):
+    """Кэширует результат функции с учётом версии данных; func.uncached — без кэша"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        version = current_data_version()
+        if version is None:
+            return func(*args, **kwargs)
+        key = _make_key(func, args, kwargs)
+        hit, value = _cache.get(key, version)
+        record_cache(hit)
+        if not hit:
+            value = func(*args, **kwargs)
+            _cache.put(key, version, value)
+        # Копия, чтобы вызывающий код не испортил закэшированное значение
+        return copy.deepcopy(value)
+
+    wrapper.uncached = func
+    return wrapper
+
+
+def cache_stats():
+    """Счётчики попаданий/промахов кэша отчётов"""
+    stats = _cache.stats()
+    stats["data_version"] = _version
+    return stats
+
+
+def clear_cache():
+    _cache.clear()
@@ -1,5 +1,87 @@
-import psycopg2
-from data.config import DB_CONFIG
+"""
+Точка доступа к хранилищу.
+
+Бэкенд (PostgreSQL или SQLite, см. asakk.storage) создаётся при первом
+обращении по STORAGE_CONFIG и общий для всего процесса.
+"""
+import atexit
+import threading
+
+from asakk import metrics
+from asakk.storage import PoolError, create_backend
+from data.config import STORAGE_CONFIG
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Возвращает общий для процесса бэкенд хранилища"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(STORAGE_CONFIG)
+                atexit.register(_backend.close)
+    return _backend
+
+
+def set_backend(backend):
+    """
+    Подменяет бэкенд процесса (бенчмарки, тестовые базы в памяти).
+    Предыдущий бэкенд закрывается.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is not None and _backend is not backend:
+            _backend.close()
+        _backend = backend
+    return backend
+
 
 def get_connection():
-    return psycopg2.connect(**DB_CONFIG)
\ No newline at end of file
+    """
+    Выдаёт соединение текущего бэкенда:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            ...
+    Незакоммиченные изменения откатываются при возврате соединения.
+    Внутри функции с @instrumented соединение замеряется (asakk.metrics).
+    """
+    call = metrics.current_call()
+    if call is None:
+        return get_backend().connection()
+    return metrics.timed_connection(get_backend().connection(), call)
+
+
+def like_pattern(text):
+    """
+    Шаблон для поиска подстроки: LOWER(столбец) LIKE %s ESCAPE '\\'.
+    Символы % и _ в тексте ищутся буквально.
+    """
+    escaped = text.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def in_list(column, values):
+    """
+    Условие «столбец входит в список» и его параметры для cursor.execute:
+    в PostgreSQL — столбец = ANY(%s) с одним параметром-массивом,
+    в SQLite — IN (%s, ...) по параметру на значение.
+    """
+    values = list(values)
+    if get_backend().dialect == "postgres":
+        return f"{column} = ANY(%s)", [values]
+    return f"{column} IN ({', '.join(['%s'] * len(values))})", values
+
+
+def pool_stats():
+    return get_backend().stats()
+
+
+def close_pool():
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+            _backend = None
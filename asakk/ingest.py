@@ -0,0 +1,291 @@
+"""
+Сервер приёма прохождений опроса.
+
+Во время опросной кампании сотни клиентов, каждый со своим соединением,
+упираются в max_connections PostgreSQL. Сервер принимает готовые
+прохождения по TCP и объединяет их в групповые транзакции
+(asakk.quiz.save_keyed_submissions) на INGEST_CONFIG['writers'] соединениях.
+
+Протокол — JSON по одной строке на запрос и ответ:
+    {"op": "submit", "submissions": [{"key", "user_id", "answers", "completed_at"}]}
+        -> {"ok": true, "stored": N, "queue_depth": D,
+            "results": {ключ: "stored" | "rejected" | "unavailable"},
+            "errors": {ключ: "сообщение"}}
+        -> {"ok": false, "error": "busy", "queue_depth": D, "retry_after": S}
+    {"op": "stats"} -> {"ok": true, "queue_depth": D, ...}
+    {"op": "ping"}  -> {"ok": true}
+
+Ответ на submit приходит после фиксации транзакции и сообщает результат
+каждого прохождения: rejected — БД отклонила данные (повтор не поможет),
+unavailable — временная ошибка БД (повторить позже). Если в очереди нет места
+для всего запроса, он сразу отклоняется с ошибкой busy, и клиент повторяет
+его позже (back-pressure). Ключи идемпотентности делают повтор безопасным.
+
+Запуск:
+    python -m asakk.ingest                # сервер на INGEST_CONFIG['host']:['port']
+    python -m asakk.ingest stats          # состояние работающего сервера
+Клиенты переключаются на сервер через INGEST_CONFIG['client_mode']
+(переменная окружения ASAKK_INGEST_CLIENT=1).
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asakk.database import get_backend
+from asakk.logging_config import setup_logging
+from asakk.quiz import save_keyed_submissions, ingest_request
+from data.config import INGEST_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Максимальная длина строки запроса, байт
+MAX_REQUEST_SIZE = 16 * 1024 * 1024
+
+
+def _is_data_error(error):
+    return get_backend().is_data_error(error)
+
+
+def _parse_submission(item):
+    return (
+        str(item["key"]),
+        int(item["user_id"]),
+        {int(q_id): int(score) for q_id, score in item["answers"].items()},
+        datetime.datetime.fromisoformat(item["completed_at"]),
+    )
+
+
+class IngestServer:
+    def __init__(self, host="127.0.0.1", port=8765, max_queue=2000, batch_size=200,
+                 max_delay=0.02, writers=2, sink=None, rejected=None):
+        """
+        :param port: 0 — выбрать свободный порт (фактический — в self.port после start())
+        :param sink: функция записи пакета; по умолчанию save_keyed_submissions
+        :param rejected: (исключение) -> отклонены ли сами данные; по умолчанию
+            is_data_error() бэкенда хранилища
+        """
+        self.host = host
+        self.port = port
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.writers = writers
+        self.sink = sink or save_keyed_submissions
+        self.rejected = rejected or _is_data_error
+        self.queue = None
+        self._server = None
+        self._tasks = []
+        self._executor = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "received": 0, "stored": 0, "batches": 0,
+            "busy": 0, "rejected": 0, "unavailable": 0, "commit_time": 0.0,
+        }
+
+    async def start(self):
+        self.queue = asyncio.Queue(self.max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self.writers, thread_name_prefix="asakk-ingest")
+        self._tasks = [asyncio.create_task(self._writer()) for _ in range(self.writers)]
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=MAX_REQUEST_SIZE)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Сервер приёма слушает {self.host}:{self.port}")
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                self._stats[name] += delta
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self.queue.qsize() if self.queue is not None else 0
+        stats["max_queue"] = self.max_queue
+        stats["mean_batch"] = stats["stored"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+    # --- Соединения клиентов ---
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self._dispatch(json.loads(line))
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    response = {"ok": False, "error": "bad_request", "message": str(e)}
+                writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError) as e:
+            logger.debug(f"Соединение клиента прервано: {e}")
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request):
+        op = request["op"]
+        if op == "ping":
+            return {"ok": True}
+        if op == "stats":
+            return dict(self.stats(), ok=True)
+        if op != "submit":
+            raise ValueError(f"Неизвестная операция: {op}")
+
+        submissions = [_parse_submission(item) for item in request["submissions"]]
+        if self.max_queue - self.queue.qsize() < len(submissions):
+            self._count(busy=1)
+            return {
+                "ok": False,
+                "error": "busy",
+                "queue_depth": self.queue.qsize(),
+                # Примерно столько уходит на одну групповую транзакцию
+                "retry_after": max(self.max_delay, self._mean_commit_time()),
+            }
+
+        self._count(received=len(submissions))
+        loop = asyncio.get_running_loop()
+        futures = []
+        for submission in submissions:
+            future = loop.create_future()
+            self.queue.put_nowait((submission, future))
+            futures.append(future)
+
+        results, errors = {}, {}
+        for submission, outcome in zip(submissions, await asyncio.gather(*futures)):
+            key = submission[0]
+            if outcome is None:
+                results[key] = "stored"
+            else:
+                results[key], errors[key] = outcome
+        return {
+            "ok": True,
+            "stored": sum(outcome == "stored" for outcome in results.values()),
+            "queue_depth": self.queue.qsize(),
+            "results": results,
+            "errors": errors,
+        }
+
+    def _mean_commit_time(self):
+        with self._stats_lock:
+            batches, commit_time = self._stats["batches"], self._stats["commit_time"]
+        return commit_time / batches if batches else 0.0
+
+    # --- Групповая запись ---
+
+    async def _writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            # Забираем всё, что уже ждёт, и недолго ждём попутчиков для неполной группы
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.batch_size:
+                if self.queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self.queue.get_nowait())
+
+            outcomes = await loop.run_in_executor(self._executor, self._commit, [item for item, _ in batch])
+            for (_, future), outcome in zip(batch, outcomes):
+                if not future.done():
+                    future.set_result(outcome)
+
+    def _commit(self, submissions):
+        """
+        Записывает группу одной транзакцией (в потоке пула).
+        :return: для каждого прохождения None или (вид ошибки, сообщение)
+        """
+        started = time.perf_counter()
+        try:
+            self.sink(submissions)
+            outcomes = [None] * len(submissions)
+        except Exception as e:
+            if not self.rejected(e):
+                logger.warning(f"Группа из {len(submissions)} прохождений не записана, БД недоступна: {e}")
+                outcomes = [("unavailable", str(e))] * len(submissions)
+            else:
+                # Группа отклонена из-за части данных: записываем по одному, чтобы не страдали остальные
+                outcomes = [self._commit_one(submission) for submission in submissions]
+        elapsed = time.perf_counter() - started
+
+        failed = [outcome[0] for outcome in outcomes if outcome is not None]
+        self._count(
+            batches=1,
+            commit_time=elapsed,
+            stored=len(outcomes) - len(failed),
+            rejected=failed.count("rejected"),
+            unavailable=failed.count("unavailable")
+        )
+        logger.debug(f"Групповая запись: {len(submissions)} прохождений за {elapsed * 1000:.1f} мс, "
+                     f"очередь {self.queue.qsize()}")
+        return outcomes
+
+    def _commit_one(self, submission):
+        try:
+            self.sink([submission])
+            return None
+        except Exception as e:
+            if not self.rejected(e):
+                logger.warning(f"Прохождение {submission[0]} не записано, БД недоступна: {e}")
+                return ("unavailable", str(e))
+            logger.error(f"Прохождение {submission[0]} отклонено: {e}")
+            return ("rejected", str(e))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервер приёма прохождений опроса")
+    parser.add_argument("command", nargs="?", default="serve", choices=["serve", "stats"])
+    parser.add_argument("--host", default=INGEST_CONFIG['host'])
+    parser.add_argument("--port", type=int, default=INGEST_CONFIG['port'])
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        INGEST_CONFIG.update(host=args.host, port=args.port)
+        for name, value in ingest_request({"op": "stats"}).items():
+            if name != "ok":
+                print(f"{name:<12}{value}")
+        return
+
+    setup_logging(console=True)
+    server = IngestServer(
+        args.host, args.port,
+        max_queue=INGEST_CONFIG['max_queue'],
+        batch_size=INGEST_CONFIG['batch_size'],
+        max_delay=INGEST_CONFIG['max_delay'],
+        writers=INGEST_CONFIG['writers']
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
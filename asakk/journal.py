@@ -0,0 +1,261 @@
+"""
+Локальный журнал прохождений опроса.
+
+QuizFormApp не ждёт БД: прохождение с ключом идемпотентности сразу
+записывается в локальный файл SQLite (WAL, synchronous=FULL — запись
+переживает сбой питания), а фоновый поток выгружает журнал пакетами через
+asakk.quiz.store_submissions (в БД или серверу приёма в режиме клиента).
+Запись удаляется из журнала только после фиксации транзакции в БД; если
+процесс упадёт между этими шагами, повторная отправка того же ключа ничего
+не задвоит.
+
+Временные ошибки (БД или сервер приёма недоступны, блокировки, таймауты,
+пул) повторяются с нарастающей паузой и не расходуют попытки записи. Если же
+БД отклоняет конкретное прохождение из-за данных (нарушение ограничения,
+например пользователь уже удалён), после JOURNAL_CONFIG['max_attempts']
+таких отказов запись помечается как ошибочная и больше не мешает выгрузке
+остальных (классификация — asakk.quiz.submission_rejected).
+
+Состояние журнала:
+    python -m asakk.journal            # число ожидающих и ошибочных записей
+    python -m asakk.journal flush      # выгрузить всё сейчас
+"""
+import atexit
+import datetime
+import json
+import logging
+import sqlite3
+import sys
+import threading
+import uuid
+
+from data.config import JOURNAL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_DDL = '''
+    CREATE TABLE IF NOT EXISTS journal (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        key TEXT UNIQUE NOT NULL,
+        user_id INTEGER NOT NULL,
+        answers TEXT NOT NULL,
+        completed_at TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        failed INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT
+    )
+'''
+
+
+class SubmissionJournal:
+    """Журнал прохождений в локальном файле SQLite; методы потокобезопасны"""
+
+    def __init__(self, path, sink=None, rejected=None):
+        """
+        :param sink: функция выгрузки пакета [(ключ, user_id, ответы, время)];
+            по умолчанию asakk.quiz.store_submissions
+        :param rejected: (исключение) -> отклонены ли сами данные; по умолчанию
+            asakk.quiz.submission_rejected
+        """
+        from asakk.quiz import store_submissions, submission_rejected
+        self.path = path
+        self.sink = sink or store_submissions
+        self.rejected = rejected or submission_rejected
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = FULL")
+        self._conn.execute(JOURNAL_DDL)
+
+    def append(self, user_id, answers, completed_at=None):
+        """
+        Записывает прохождение и возвращает его ключ; к возврату запись уже на диске.
+        :param answers: словарь {question_id: score}
+        """
+        key = uuid.uuid4().hex
+        completed_at = completed_at or datetime.datetime.now()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO journal (key, user_id, answers, completed_at) VALUES (?, ?, ?, ?)",
+                (key, user_id, json.dumps({str(q_id): score for q_id, score in answers.items()}),
+                 completed_at.isoformat(" "))
+            )
+        return key
+
+    def pending(self, limit):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, user_id, answers, completed_at FROM journal WHERE failed = 0 ORDER BY seq LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            (key, user_id, {int(q_id): score for q_id, score in json.loads(answers).items()},
+             datetime.datetime.fromisoformat(completed_at))
+            for key, user_id, answers, completed_at in rows
+        ]
+
+    def _remove(self, keys):
+        with self._lock:
+            self._conn.executemany("DELETE FROM journal WHERE key = ?", [(key,) for key in keys])
+
+    def _record_failure(self, key, error, max_attempts):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE journal SET attempts = attempts + 1, last_error = ?, "
+                "failed = (attempts + 1 >= ?) WHERE key = ?",
+                (str(error), max_attempts, key)
+            )
+
+    def flush(self, batch_size, max_attempts):
+        """
+        Выгружает в БД все ожидающие записи.
+        :return: количество выгруженных записей
+        :raise: временная ошибка sink (записи остаются в журнале, попытки не расходуются)
+        """
+        flushed = 0
+        while True:
+            batch = self.pending(batch_size)
+            if not batch:
+                return flushed
+            try:
+                self.sink(batch)
+            except Exception as e:
+                if not self.rejected(e):
+                    raise
+                errors = getattr(e, "errors", None)
+                if errors is not None:
+                    # Получатель сообщил, какие именно записи отклонены, остальные сохранены
+                    for entry in batch:
+                        if entry[0] in errors:
+                            self._record_failure(entry[0], errors[entry[0]], max_attempts)
+                            logger.error(f"Прохождение {entry[0]} не записано: {errors[entry[0]]}")
+                    stored = [entry[0] for entry in batch if entry[0] not in errors]
+                    self._remove(stored)
+                    return flushed + len(stored)
+                # Отклонено содержимое: ищем виновные записи поштучно
+                logger.warning(f"Пакет журнала отклонён БД, выгрузка по одной записи: {e}")
+                for entry in batch:
+                    try:
+                        self.sink([entry])
+                    except Exception as entry_error:
+                        if not self.rejected(entry_error):
+                            raise
+                        self._record_failure(entry[0], entry_error, max_attempts)
+                        logger.error(f"Прохождение {entry[0]} не записано: {entry_error}")
+                        continue
+                    self._remove([entry[0]])
+                    flushed += 1
+                # Чтобы не крутиться на записях, которые ещё не исчерпали попытки
+                return flushed
+            self._remove([entry[0] for entry in batch])
+            flushed += len(batch)
+
+    def stats(self):
+        with self._lock:
+            pending, failed = self._conn.execute(
+                "SELECT COALESCE(SUM(failed = 0), 0), COALESCE(SUM(failed), 0) FROM journal"
+            ).fetchone()
+        return {"pending": pending, "failed": failed}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JournalFlusher(threading.Thread):
+    """Фоновый поток: выгружает журнал сразу после новой записи и раз в flush_interval"""
+
+    def __init__(self, journal, batch_size=50, flush_interval=5.0, max_backoff=60.0, max_attempts=5):
+        super().__init__(name="asakk-journal", daemon=True)
+        self.journal = journal
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self._wakeup = threading.Event()
+        self._stopping = False
+
+    def notify(self):
+        self._wakeup.set()
+
+    def run(self):
+        delay = self.flush_interval
+        while not self._stopping:
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+            if self._stopping:
+                break
+            try:
+                flushed = self.journal.flush(self.batch_size, self.max_attempts)
+                if flushed:
+                    logger.info(f"Из журнала выгружено прохождений: {flushed}")
+                delay = self.flush_interval
+            except Exception as e:
+                delay = min(max(delay * 2, 1.0), self.max_backoff)
+                logger.warning(f"БД недоступна, журнал будет выгружен позже (через {delay:.0f} с): {e}")
+
+    def stop(self, timeout=5.0):
+        """Останавливает поток и делает последнюю попытку выгрузки"""
+        self._stopping = True
+        self._wakeup.set()
+        self.join(timeout)
+        try:
+            self.journal.flush(self.batch_size, self.max_attempts)
+        except Exception as e:
+            logger.warning(f"При выходе журнал не выгружен, записи отправятся при следующем запуске: {e}")
+
+
+_journal = None
+_flusher = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    """Журнал процесса (JOURNAL_CONFIG['path']); при первом вызове запускается выгрузка"""
+    global _journal, _flusher
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                journal = SubmissionJournal(JOURNAL_CONFIG['path'])
+                _flusher = JournalFlusher(
+                    journal,
+                    batch_size=JOURNAL_CONFIG['batch_size'],
+                    flush_interval=JOURNAL_CONFIG['flush_interval'],
+                    max_backoff=JOURNAL_CONFIG['max_backoff'],
+                    max_attempts=JOURNAL_CONFIG['max_attempts']
+                )
+                _flusher.start()
+                # Записи прошлых запусков выгружаются сразу
+                _flusher.notify()
+                atexit.register(_flusher.stop)
+                _journal = journal
+    return _journal
+
+
+def submit_answers(user_id, answers):
+    """
+    Сохраняет прохождение в журнал и сразу возвращает его ключ; в БД оно
+    попадёт в фоне. Задержка не зависит от доступности БД.
+    """
+    key = get_journal().append(user_id, answers)
+    _flusher.notify()
+    return key
+
+
+def journal_stats():
+    return get_journal().stats()
+
+
+if __name__ == "__main__":
+    from asakk.logging_config import setup_logging
+    setup_logging()
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    journal = SubmissionJournal(JOURNAL_CONFIG['path'])
+    if command == "flush":
+        count = journal.flush(JOURNAL_CONFIG['batch_size'], JOURNAL_CONFIG['max_attempts'])
+        print(f"✅ Выгружено прохождений: {count}")
+    elif command != "status":
+        print("Использование: python -m asakk.journal [status|flush]")
+        sys.exit(1)
+    stats = journal.stats()
+    print(f"Ожидают выгрузки: {stats['pending']}, отклонены БД: {stats['failed']}")
@@ -0,0 +1,162 @@
+"""
+Единая настройка журналирования.
+
+Модули только получают логгер (logging.getLogger(__name__)) и при импорте
+ничего не открывают. setup_logging() вызывается один раз точкой входа
+(run.py, CLI модулей): корневой логгер получает QueueHandler, а
+форматирование и запись на диск выполняет фоновый поток QueueListener,
+поэтому вызовы logger.* на горячем пути не ждут диска.
+
+Параметры — LOGGING_CONFIG в data/config.py: файл, ротация по размеру и по
+времени, уровни отдельных модулей и текстовый или JSON-формат.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+from data.config import LOGGING_CONFIG
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+
+_listener = None
+_queue_handler = None
+_setup_lock = threading.Lock()
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Сообщение и трассировка фиксируются в вызывающем потоке (аргументы и кадры
+        # могут измениться), а само форматирование остаётся фоновому потоку
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SizedTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """Ротация по времени (when) и дополнительно по размеру файла (max_bytes)"""
+
+    def __init__(self, filename, max_bytes=0, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record):
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.seek(0, 2)
+            if self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes:
+                return True
+        return super().shouldRollover(record)
+
+    def rotation_filename(self, default_name):
+        # Несколько ротаций по размеру за один период: asakk.log.2024-05-01, .2024-05-01.001, ...
+        name = super().rotation_filename(default_name)
+        candidate, number = name, 1
+        while os.path.exists(candidate):
+            candidate = f"{name}.{number:03d}"
+            number += 1
+        return candidate
+
+
+def _file_handler(config):
+    if config['when']:
+        return SizedTimedRotatingFileHandler(
+            config['path'],
+            max_bytes=config['max_bytes'],
+            when=config['when'],
+            backupCount=config['backup_count'],
+            encoding="utf-8",
+            delay=True
+        )
+    return logging.handlers.RotatingFileHandler(
+        config['path'],
+        maxBytes=config['max_bytes'],
+        backupCount=config['backup_count'],
+        encoding="utf-8",
+        delay=True
+    )
+
+
+def setup_logging(config=None, console=None):
+    """
+    Настраивает журналирование процесса; повторные вызовы ничего не делают.
+    :param config: словарь как LOGGING_CONFIG (по умолчанию он сам)
+    :param console: дублировать записи в stderr (по умолчанию config['console'])
+    """
+    global _listener, _queue_handler
+    config = dict(LOGGING_CONFIG, **(config or {}))
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        formatter = JsonFormatter() if config['format'] == "json" else logging.Formatter(TEXT_FORMAT)
+        handlers = [_file_handler(config)]
+        if config['console'] if console is None else console:
+            handlers.append(logging.StreamHandler())
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger()
+        root.setLevel(config['level'])
+        _queue_handler = _QueueHandler(log_queue)
+        root.addHandler(_queue_handler)
+        for name, level in config['levels'].items():
+            logging.getLogger(name).setLevel(level)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Дописывает очередь на диск и останавливает фоновый поток"""
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is None:
+            return
+        logging.getLogger().removeHandler(_queue_handler)
+        listener, _listener, _queue_handler = _listener, None, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def _forget_in_child():
+    # Поток QueueListener в дочерний процесс (fork) не переходит: без него записи
+    # копились бы в очереди, поэтому дочерний процесс остаётся без обработчика
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+    _listener = _queue_handler = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_in_child)
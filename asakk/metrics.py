@@ -0,0 +1,393 @@
+"""
+Метрики горячих путей: функции доступа к данным в auth, quiz и report.
+
+Функция, помеченная @instrumented, становится точкой замера (site, например
+"auth.authenticate"). Для каждого вызова учитываются:
+- общее время выполнения;
+- время в БД (execute/fetch курсора) и число полученных строк;
+- время получения соединения из пула;
+- попадания и промахи кэшей (report-кэш, кэш входов, каталог вопросов).
+
+Пока идёт замер, get_connection() выдаёт соединение-обёртку, которая
+засекает время курсора; вне замеров соединения не оборачиваются. Вложенные
+вызовы учитываются и в своей точке, и во внешней.
+
+Снимок — snapshot(), текст в формате Prometheus — prometheus_text(),
+периодическая запись в файл — start_metrics_dump() (METRICS_CONFIG).
+"""
+import atexit
+import bisect
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from data.config import METRICS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм времени, с
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами; синхронизацию обеспечивает владелец"""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # последняя — +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Оценка квантиля линейной интерполяцией внутри корзины"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max if self.count else None,
+        }
+
+
+class SiteMetrics:
+    """Счётчики и гистограммы одной точки замера; обновляются под одной блокировкой"""
+
+    def __init__(self, site):
+        self.site = site
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.errors = 0
+            self.rows = 0
+            self.cache_hits = 0
+            self.cache_misses = 0
+            self.wall = Histogram()
+            self.db = Histogram()
+            self.acquire = Histogram()
+
+    def record(self, wall_time, call, failed):
+        with self._lock:
+            self.calls += 1
+            if failed:
+                self.errors += 1
+            self.rows += call.rows
+            self.cache_hits += call.cache_hits
+            self.cache_misses += call.cache_misses
+            self.wall.observe(wall_time)
+            self.db.observe(call.db_time)
+            if call.connections:
+                self.acquire.observe(call.acquire_time)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "rows": self.rows,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "wall": self.wall.summary(),
+                "db": self.db.summary(),
+                "acquire": self.acquire.summary(),
+            }
+
+
+class _CallStats:
+    """Накопитель одного вызова; живёт в контекстной переменной"""
+
+    __slots__ = ("parent", "db_time", "rows", "acquire_time", "connections", "cache_hits", "cache_misses")
+
+    def __init__(self, parent):
+        self.parent = parent
+        self.db_time = 0.0
+        self.rows = 0
+        self.acquire_time = 0.0
+        self.connections = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def merge_into_parent(self):
+        parent = self.parent
+        if parent is not None:
+            parent.db_time += self.db_time
+            parent.rows += self.rows
+            parent.acquire_time += self.acquire_time
+            parent.connections += self.connections
+            parent.cache_hits += self.cache_hits
+            parent.cache_misses += self.cache_misses
+
+
+_current = contextvars.ContextVar("asakk_metrics_call", default=None)
+_sites = {}
+_sites_lock = threading.Lock()
+
+
+def _site(name):
+    metrics = _sites.get(name)
+    if metrics is None:
+        with _sites_lock:
+            metrics = _sites.setdefault(name, SiteMetrics(name))
+    return metrics
+
+
+def instrumented(func=None, *, site=None):
+    """
+    Делает функцию точкой замера:
+        @instrumented
+        def authenticate(...): ...           # site "auth.authenticate"
+    При METRICS_CONFIG['enabled'] = False функция не оборачивается.
+    """
+    if func is None:
+        return functools.partial(instrumented, site=site)
+    if not METRICS_CONFIG['enabled']:
+        return func
+
+    metrics = _site(site or f"{func.__module__.rpartition('.')[2]}.{func.__name__}")
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        call = _CallStats(_current.get())
+        token = _current.set(call)
+        failed = True
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            wall_time = time.perf_counter() - started
+            _current.reset(token)
+            metrics.record(wall_time, call, failed)
+            call.merge_into_parent()
+
+    return wrapper
+
+
+def record_cache(hit):
+    """Отмечает попадание или промах кэша в текущей точке замера"""
+    call = _current.get()
+    if call is not None:
+        if hit:
+            call.cache_hits += 1
+        else:
+            call.cache_misses += 1
+
+
+# --- Замер времени БД ---
+
+class _TimedCursor:
+    """Курсор, засекающий время запросов и число строк текущего вызова"""
+
+    def __init__(self, cursor, call):
+        self._cursor = cursor
+        self._call = call
+
+    def execute(self, query, params=None):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, params)
+        finally:
+            self._call.db_time += time.perf_counter() - started
+
+    def executemany(self, query, seq_of_params):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, seq_of_params)
+        finally:
+            self._call.db_time += time.perf_counter() - started
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._call.db_time += time.perf_counter() - started
+        if row is not None:
+            self._call.rows += 1
+        return row
+
+    def fetchmany(self, *args):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(*args)
+        self._call.db_time += time.perf_counter() - started
+        self._call.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._call.db_time += time.perf_counter() - started
+        self._call.rows += len(rows)
+        return rows
+
+    def copy_expert(self, sql, file, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.copy_expert(sql, file, *args, **kwargs)
+        finally:
+            self._call.db_time += time.perf_counter() - started
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._call.rows += 1
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _TimedConnection:
+    def __init__(self, conn, call):
+        self._conn = conn
+        self._call = call
+
+    def cursor(self, *args, **kwargs):
+        return _TimedCursor(self._conn.cursor(*args, **kwargs), self._call)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def current_call():
+    """Накопитель текущей точки замера или None"""
+    return _current.get()
+
+
+@contextmanager
+def timed_connection(connection_cm, call):
+    """Оборачивает backend.connection(): время получения соединения и курсоры с замером"""
+    started = time.perf_counter()
+    with connection_cm as conn:
+        call.acquire_time += time.perf_counter() - started
+        call.connections += 1
+        yield _TimedConnection(conn, call)
+
+
+# --- Снимок и выгрузка ---
+
+def snapshot():
+    """{site: {"calls", "errors", "rows", "cache_hits", "cache_misses", "wall", "db", "acquire"}}"""
+    with _sites_lock:
+        sites = list(_sites.values())
+    return {metrics.site: metrics.snapshot() for metrics in sorted(sites, key=lambda m: m.site)}
+
+
+def reset():
+    with _sites_lock:
+        sites = list(_sites.values())
+    for metrics in sites:
+        metrics.reset()
+
+
+def _prometheus_histogram(lines, name, help_text, sites, field):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for metrics in sites:
+        with metrics._lock:
+            histogram = getattr(metrics, field)
+            counts, total, count = list(histogram.counts), histogram.sum, histogram.count
+        label = f'site="{metrics.site}"'
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{label},le="+Inf"}} {count}')
+        lines.append(f"{name}_sum{{{label}}} {total}")
+        lines.append(f"{name}_count{{{label}}} {count}")
+
+
+def prometheus_text():
+    """Метрики в текстовом формате Prometheus"""
+    with _sites_lock:
+        sites = sorted(_sites.values(), key=lambda m: m.site)
+    lines = []
+    _prometheus_histogram(lines, "asakk_call_duration_seconds", "Время выполнения вызова", sites, "wall")
+    _prometheus_histogram(lines, "asakk_db_duration_seconds", "Время в БД за вызов", sites, "db")
+    _prometheus_histogram(lines, "asakk_connection_acquire_seconds", "Ожидание соединения за вызов",
+                          sites, "acquire")
+    counters = [
+        ("asakk_calls_total", "Число вызовов", "calls"),
+        ("asakk_call_errors_total", "Вызовы, завершившиеся исключением", "errors"),
+        ("asakk_rows_fetched_total", "Строки, полученные из БД", "rows"),
+        ("asakk_cache_hits_total", "Попадания в кэш", "cache_hits"),
+        ("asakk_cache_misses_total", "Промахи кэша", "cache_misses"),
+    ]
+    for name, help_text, field in counters:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for metrics in sites:
+            lines.append(f'{name}{{site="{metrics.site}"}} {getattr(metrics, field)}')
+    return "\n".join(lines) + "\n"
+
+
+def dump_metrics(path):
+    """Атомарно записывает prometheus_text() в файл"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+
+_dump_stop = None
+
+
+def start_metrics_dump(path=None, interval=None):
+    """
+    Запускает фоновую запись метрик в файл каждые interval секунд и при выходе
+    (по умолчанию METRICS_CONFIG['dump_path'] и ['dump_interval']); без пути ничего не делает.
+    """
+    global _dump_stop
+    path = path or METRICS_CONFIG['dump_path']
+    interval = interval or METRICS_CONFIG['dump_interval']
+    if not path or _dump_stop is not None:
+        return
+    _dump_stop = threading.Event()
+
+    def dump():
+        try:
+            dump_metrics(path)
+        except OSError as e:
+            logger.warning(f"Не удалось записать метрики в {path}: {e}")
+
+    def run():
+        while not _dump_stop.wait(interval):
+            dump()
+
+    threading.Thread(target=run, name="asakk-metrics", daemon=True).start()
+    atexit.register(dump)
@@ -0,0 +1,235 @@
+"""
+Версионированные миграции схемы БД.
+
+Каждая миграция — (версия, описание, SQL). Применённые версии записываются
+в schema_migrations; повторный запуск применяет только недостающие.
+Все миграции написаны идемпотентно (IF NOT EXISTS, проверки в pg_constraint),
+поэтому их можно накатывать и на базы, созданные вручную или старым init_db.py.
+SQL миграции — строка, общая для всех бэкендов, или словарь {диалект: SQL};
+для SQLite схема с теми же индексами создаётся с нуля.
+
+Запуск:
+    python -m asakk.migrations            # применить недостающие миграции
+    python -m asakk.migrations status     # показать состояние
+"""
+import logging
+import sys
+
+from asakk.database import get_connection, get_backend
+from asakk.rollups import ROLLUP_DDL
+from asakk.cache import DATA_VERSION_DDL
+
+logger = logging.getLogger(__name__)
+
+# Ключ pg_advisory_lock, чтобы два клиента не мигрировали одновременно
+# (в SQLite не нужен: повторная запись версии упрётся в первичный ключ)
+MIGRATION_LOCK_ID = 0x4153414B
+
+SCHEMA_MIGRATIONS_DDL = '''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+MIGRATIONS = [
+    (1, "Базовая схема: users, questions, recommendations, answers", {"postgres": '''
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            role TEXT NOT NULL CHECK(role IN ('Employee', 'Manager', 'Admin')),
+            ssh_key TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS questions (
+            id SERIAL PRIMARY KEY,
+            text TEXT NOT NULL,
+            category TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS recommendations (
+            id SERIAL PRIMARY KEY,
+            category TEXT NOT NULL,
+            event TEXT NOT NULL,
+            question_id INTEGER REFERENCES questions(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS answers (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+            score SMALLINT NOT NULL CHECK (score BETWEEN 0 AND 4),
+            timestamp TIMESTAMP NOT NULL DEFAULT now()
+        );
+    ''', "sqlite": '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            role TEXT NOT NULL CHECK(role IN ('Employee', 'Manager', 'Admin')),
+            ssh_key TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY,
+            text TEXT NOT NULL,
+            category TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS recommendations (
+            id INTEGER PRIMARY KEY,
+            category TEXT NOT NULL,
+            event TEXT NOT NULL,
+            question_id INTEGER REFERENCES questions(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS answers (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+            score SMALLINT NOT NULL CHECK (score BETWEEN 0 AND 4),
+            -- миллисекунды, чтобы порядок ответов в пределах секунды сохранялся
+            timestamp TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+        );
+    '''}),
+
+    # В SQLite все столбцы и ограничения создаются миграцией 1
+    (2, "Недостающие столбцы и ограничения в существующих таблицах", {"sqlite": "", "postgres": '''
+        ALTER TABLE recommendations ADD COLUMN IF NOT EXISTS question_id INTEGER;
+        ALTER TABLE answers ADD COLUMN IF NOT EXISTS timestamp TIMESTAMP NOT NULL DEFAULT now();
+        ALTER TABLE answers ALTER COLUMN score TYPE SMALLINT;
+
+        -- NOT VALID: уже существующие строки не проверяются, новые — проверяются
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'answers_score_check') THEN
+                ALTER TABLE answers ADD CONSTRAINT answers_score_check
+                    CHECK (score BETWEEN 0 AND 4) NOT VALID;
+            END IF;
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'answers_user_id_fkey') THEN
+                ALTER TABLE answers ADD CONSTRAINT answers_user_id_fkey
+                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE NOT VALID;
+            END IF;
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'answers_question_id_fkey') THEN
+                ALTER TABLE answers ADD CONSTRAINT answers_question_id_fkey
+                    FOREIGN KEY (question_id) REFERENCES questions(id) ON DELETE CASCADE NOT VALID;
+            END IF;
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'recommendations_question_id_fkey') THEN
+                ALTER TABLE recommendations ADD CONSTRAINT recommendations_question_id_fkey
+                    FOREIGN KEY (question_id) REFERENCES questions(id) ON DELETE CASCADE NOT VALID;
+            END IF;
+        END $$;
+    '''}),
+
+    (3, "Индексы для отчётных запросов", '''
+        CREATE INDEX IF NOT EXISTS idx_answers_question_timestamp ON answers (question_id, timestamp DESC);
+        CREATE INDEX IF NOT EXISTS idx_answers_user_id ON answers (user_id);
+        CREATE INDEX IF NOT EXISTS idx_answers_timestamp ON answers (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_questions_category ON questions (category);
+        CREATE INDEX IF NOT EXISTS idx_recommendations_category ON recommendations (category);
+    '''),
+
+    (4, "Сводка оценок и версия данных", ROLLUP_DDL + DATA_VERSION_DDL + '''
+        -- Первичное заполнение сводки, если она ещё пуста
+        INSERT INTO score_rollups (question_id, category, score, answers_count, score_sum)
+        SELECT q.id, q.category, a.score, COUNT(*), SUM(a.score)
+        FROM answers a
+        JOIN questions q ON a.question_id = q.id
+        WHERE NOT EXISTS (SELECT 1 FROM score_rollups)
+        GROUP BY q.id, q.category, a.score;
+    '''),
+
+    (5, "Отпечаток ключа пользователя", {"postgres": '''
+        ALTER TABLE users ADD COLUMN IF NOT EXISTS key_fingerprint TEXT;
+        UPDATE users SET key_fingerprint = encode(sha256(convert_to(ssh_key, 'UTF8')), 'hex')
+        WHERE key_fingerprint IS NULL;
+    ''', "sqlite": '''
+        ALTER TABLE users ADD COLUMN IF NOT EXISTS key_fingerprint TEXT;
+        UPDATE users SET key_fingerprint = sha256_hex(ssh_key) WHERE key_fingerprint IS NULL;
+    '''}),
+
+    (6, "Версия каталога вопросов", '''
+        CREATE TABLE IF NOT EXISTS catalog_version (
+            id SMALLINT PRIMARY KEY CHECK (id = 1),
+            version BIGINT NOT NULL
+        );
+        INSERT INTO catalog_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+    '''),
+
+    (7, "Ключи идемпотентности прохождений", '''
+        CREATE TABLE IF NOT EXISTS submissions (
+            key TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            completed_at TIMESTAMP NOT NULL,
+            received_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    '''),
+]
+
+
+def migration_sql(sql, dialect):
+    """SQL миграции для диалекта текущего бэкенда"""
+    return sql[dialect] if isinstance(sql, dict) else sql
+
+
+def applied_versions(cursor):
+    cursor.execute(SCHEMA_MIGRATIONS_DDL)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate(target=None):
+    """
+    Применяет недостающие миграции (до версии target включительно).
+    Каждая миграция выполняется в отдельной транзакции.
+    :return: список применённых версий
+    """
+    applied_now = []
+    backend = get_backend()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        with backend.migration_lock(cursor, MIGRATION_LOCK_ID):
+            applied = applied_versions(cursor)
+            conn.commit()
+            for version, name, sql in MIGRATIONS:
+                if version in applied or (target is not None and version > target):
+                    continue
+                logger.info(f"Применение миграции {version}: {name}")
+                try:
+                    backend.execute_script(cursor, migration_sql(sql, backend.dialect))
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                        (version, name)
+                    )
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    logger.error(f"Миграция {version} не применена: {e}", exc_info=True)
+                    raise
+                applied_now.append(version)
+        conn.commit()
+    return applied_now
+
+
+def status():
+    """Список (версия, описание, применена ли)"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        applied = applied_versions(cursor)
+        conn.commit()
+    return [(version, name, version in applied) for version, name, _ in MIGRATIONS]
+
+
+if __name__ == "__main__":
+    from asakk.logging_config import setup_logging
+    setup_logging()
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    if command == "status":
+        for version, name, is_applied in status():
+            print(f"{'✅' if is_applied else '⏳'} {version:>3}  {name}")
+    elif command == "upgrade":
+        versions = migrate()
+        print(f"✅ Применено миграций: {len(versions)}" if versions else "✅ Схема актуальна")
+    else:
+        print("Использование: python -m asakk.migrations [upgrade|status]")
+        sys.exit(1)
@@ -0,0 +1,203 @@
+"""
+Загрузка банка вопросов и мероприятий.
+
+Банк — словари {категория: [тексты]} для вопросов и для мероприятий
+(как в data/questions_db.py), файл JSON или CSV. Загрузка сравнивает банк
+с таблицами questions и recommendations по паре (категория, текст) и
+добавляет только недостающие строки одной массовой вставкой в одной
+транзакции, поэтому её можно безопасно повторять.
+
+Запуск:
+    python -m asakk.question_bank                      # data/questions_db.py
+    python -m asakk.question_bank bank.json --prune    # удалить строки, которых нет в файле
+    python -m asakk.question_bank bank.csv --dry-run   # только показать изменения
+
+JSON: {"questions": {категория: [...]}, "events": {категория: [...]}}
+или просто {категория: [вопросы]}.
+CSV: столбцы category,text и необязательный type (question или event).
+"""
+import argparse
+import csv
+import json
+import logging
+import sys
+
+from asakk import rollups
+from asakk.cache import bump_data_version
+from asakk.database import get_backend, get_connection, in_list
+from asakk.logging_config import setup_logging
+from asakk.quiz import bump_catalog_version
+
+logger = logging.getLogger(__name__)
+
+# Сколько id удалять одним оператором (в SQLite каждый id — отдельный параметр)
+DELETE_BATCH_SIZE = 10000
+
+
+def _normalize(bank):
+    """Пары (категория, текст) без пустых строк и повторов, в исходном порядке"""
+    pairs = {}
+    for category, texts in (bank or {}).items():
+        category = category.strip()
+        for text in texts:
+            text = text.strip()
+            if category and text:
+                pairs.setdefault((category, text), None)
+    return list(pairs)
+
+
+def read_bank_file(path):
+    """
+    Читает банк из JSON или CSV.
+    :return: (questions, events) — словари {категория: [тексты]}
+    """
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        if "questions" in data or "events" in data:
+            return data.get("questions", {}), data.get("events", {})
+        return data, {}
+
+    questions, events = {}, {}
+    with open(path, encoding="utf-8-sig", newline="") as file:
+        for line, row in enumerate(csv.DictReader(file), start=2):
+            kind = (row.get("type") or "question").strip().lower()
+            if kind not in ("question", "event"):
+                raise ValueError(f"{path}:{line}: неизвестный type '{kind}'")
+            target = questions if kind == "question" else events
+            target.setdefault(row["category"], []).append(row["text"])
+    return questions, events
+
+
+def _sync_table(cursor, table, text_column, pairs, prune, managed_filter=""):
+    """
+    Приводит строки таблицы к набору pairs.
+    :param managed_filter: условие на строки, которыми управляет банк (для prune)
+    :return: (inserted, unchanged, removed, id удалённых строк)
+    """
+    where = f"WHERE {managed_filter}" if managed_filter else ""
+    cursor.execute(f"SELECT id, category, {text_column} FROM {table} {where}")
+    existing = {}
+    for row_id, category, text in cursor.fetchall():
+        existing.setdefault((category, text), []).append(row_id)
+
+    wanted = set(pairs)
+    missing = [pair for pair in pairs if pair not in existing]
+    unchanged = len(wanted) - len(missing)
+
+    if missing:
+        get_backend().insert_many(
+            cursor,
+            f"INSERT INTO {table} (category, {text_column}) VALUES %s",
+            missing
+        )
+
+    removed_ids = []
+    if prune:
+        removed_ids = [row_id for pair, ids in existing.items() if pair not in wanted for row_id in ids]
+    return len(missing), unchanged, len(removed_ids), removed_ids
+
+
+def _batches(ids):
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        yield ids[start:start + DELETE_BATCH_SIZE]
+
+
+def _delete_questions(cursor, question_ids):
+    """Удаляет вопросы вместе с их ответами и строками сводки оценок"""
+    for batch in _batches(question_ids):
+        condition, params = in_list("question_id", batch)
+        cursor.execute(f"DELETE FROM answers WHERE {condition}", params)
+        rollups.remove_questions(cursor, batch)
+        condition, params = in_list("id", batch)
+        cursor.execute(f"DELETE FROM questions WHERE {condition}", params)
+
+
+def _delete_events(cursor, event_ids):
+    for batch in _batches(event_ids):
+        condition, params = in_list("id", batch)
+        cursor.execute(f"DELETE FROM recommendations WHERE {condition}", params)
+
+
+def load_bank(questions, events=None, prune=False, dry_run=False):
+    """
+    Синхронизирует банк вопросов и мероприятий с БД в одной транзакции.
+    :param questions: {категория: [тексты вопросов]}
+    :param events: {категория: [тексты мероприятий]}; None — мероприятия не трогаются
+    :param prune: удалить вопросы (с их ответами) и мероприятия без привязки к вопросу,
+        которых нет в банке
+    :param dry_run: посчитать изменения и откатить транзакцию
+    :return: {'questions': {'inserted', 'unchanged', 'removed'}, 'events': {...}}
+    """
+    report = {}
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            # Два одновременных загрузчика не должны добавить одни и те же вопросы дважды
+            # (в SQLite запись и так сериализована блокировкой базы)
+            if get_backend().dialect == "postgres":
+                cursor.execute("LOCK TABLE questions, recommendations IN SHARE ROW EXCLUSIVE MODE")
+
+            inserted, unchanged, removed, removed_ids = _sync_table(
+                cursor, "questions", "text", _normalize(questions), prune
+            )
+            _delete_questions(cursor, removed_ids)
+            report["questions"] = {"inserted": inserted, "unchanged": unchanged, "removed": removed}
+
+            if events is not None:
+                # Мероприятия, добавленные вместе с вопросом, банку не принадлежат
+                inserted, unchanged, removed, removed_ids = _sync_table(
+                    cursor, "recommendations", "event", _normalize(events), prune,
+                    managed_filter="question_id IS NULL"
+                )
+                _delete_events(cursor, removed_ids)
+                report["events"] = {"inserted": inserted, "unchanged": unchanged, "removed": removed}
+
+            changed = any(item["inserted"] or item["removed"] for item in report.values())
+            if dry_run:
+                conn.rollback()
+            else:
+                if changed:
+                    bump_data_version(cursor)
+                if report["questions"]["inserted"] or report["questions"]["removed"]:
+                    bump_catalog_version(cursor)
+                conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Не удалось загрузить банк вопросов: {e}", exc_info=True)
+            raise
+
+    logger.info(f"Банк вопросов {'проверен' if dry_run else 'загружен'}: {report}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Загрузка банка вопросов и мероприятий")
+    parser.add_argument("path", nargs="?", help="JSON или CSV; по умолчанию data/questions_db.py")
+    parser.add_argument("--prune", action="store_true",
+                        help="удалить вопросы и мероприятия, которых нет в банке (ответы на них тоже)")
+    parser.add_argument("--dry-run", action="store_true", help="не сохранять изменения")
+    args = parser.parse_args()
+    setup_logging()
+
+    if args.path:
+        questions, events = read_bank_file(args.path)
+    else:
+        from data.questions_db import questions_db, events_db
+        questions, events = questions_db, events_db
+
+    try:
+        report = load_bank(questions, events, prune=args.prune, dry_run=args.dry_run)
+    except Exception as e:
+        print(f"❌ Ошибка при загрузке данных: {e}")
+        sys.exit(1)
+
+    names = {"questions": "Вопросы", "events": "Мероприятия"}
+    for kind, counts in report.items():
+        print(f"{names[kind]}: добавлено {counts['inserted']}, без изменений {counts['unchanged']}, "
+              f"удалено {counts['removed']}")
+    print("ℹ️ Пробный запуск, изменения не сохранены" if args.dry_run else "✅ Банк вопросов загружен")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,138 +1,508 @@
-import psycopg2
-from data.config import DB_CONFIG
+from asakk.database import get_connection, get_backend, like_pattern
+from asakk import rollups
+from asakk.cache import bump_data_version
+from asakk.metrics import instrumented, record_cache
+from data.config import CACHE_CONFIG, INGEST_CONFIG
+import datetime
+import json
 import logging
+import os
+import socket
+import threading
+import time
+import uuid
 from tkinter import messagebox
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
-file_handler = logging.FileHandler("asakk.log", encoding="utf-8")
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-logger.propagate = False  # ❌ Отключаем вывод в консоль
+# --- Каталог вопросов ---
+#
+# Категории и вопросы меняются редко, поэтому клиент держит их в памяти и в
+# локальном файле CACHE_CONFIG['catalog_path'] (переживает перезапуск).
+# Каталог помечен версией из таблицы catalog_version; она увеличивается в той
+# же транзакции, что и добавление или удаление вопросов. Версия сверяется с БД
+# не чаще раза в CACHE_CONFIG['catalog_check_interval'] секунд; если БД
+# недоступна, используется уже загруженный каталог.
+
+_catalog = None  # {"source", "version", "categories", "counts", "questions"}
+_catalog_checked_at = 0.0
+_catalog_lock = threading.Lock()
+
+
+def bump_catalog_version(cursor):
+    """Увеличивает версию каталога вопросов в текущей транзакции (фиксирует вызывающий)"""
+    global _catalog_checked_at
+    cursor.execute("UPDATE catalog_version SET version = version + 1 WHERE id = 1")
+    _catalog_checked_at = 0.0
+
+
+def _build_catalog(source, version, rows):
+    categories, questions = [], {}
+    for question_id, text, category in rows:
+        if category not in questions:
+            categories.append(category)
+            questions[category] = []
+        questions[category].append((question_id, text, category))
+    return {
+        "source": source,
+        "version": version,
+        "categories": categories,
+        "counts": {category: len(items) for category, items in questions.items()},
+        "questions": questions,
+    }
+
+
+def _read_catalog_file(source):
+    path = CACHE_CONFIG['catalog_path']
+    if not path:
+        return None
+    try:
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        if data["source"] != source:
+            return None
+        return _build_catalog(source, data["version"], [tuple(row) for row in data["questions"]])
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Повреждённая копия каталога вопросов {path}: {e}")
+        return None
+
+
+def _write_catalog_file(catalog):
+    path = CACHE_CONFIG['catalog_path']
+    if not path:
+        return
+    data = {
+        "source": catalog["source"],
+        "version": catalog["version"],
+        "questions": [
+            list(question)
+            for category in catalog["categories"]
+            for question in catalog["questions"][category]
+        ],
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Не удалось сохранить каталог вопросов в {path}: {e}")
+
+
+@instrumented
+def get_catalog(refresh=False):
+    """
+    Каталог вопросов: {"version", "categories", "counts", "questions": {категория: [(id, text, category)]}}.
+    Возвращаемый словарь общий для всех вызовов — не изменяйте его.
+    :param refresh: сверить версию с БД сейчас, не дожидаясь интервала
+    """
+    global _catalog, _catalog_checked_at
+    with _catalog_lock:
+        source = get_backend().source
+        now = time.monotonic()
+        if _catalog is None or _catalog["source"] != source:
+            _catalog = _read_catalog_file(source)
+            _catalog_checked_at = 0.0
+        if (_catalog is not None and not refresh and _catalog_checked_at
+                and now - _catalog_checked_at < CACHE_CONFIG['catalog_check_interval']):
+            record_cache(True)
+            return _catalog
+
+        try:
+            with get_connection() as conn:
+                cursor = conn.cursor()
+                # Версия читается до вопросов: при параллельном изменении каталог
+                # окажется новее своей версии и просто перезагрузится в следующий раз
+                cursor.execute("SELECT version FROM catalog_version WHERE id = 1")
+                version = cursor.fetchone()[0]
+                if _catalog is not None and _catalog["version"] == version:
+                    _catalog_checked_at = now
+                    record_cache(True)
+                    return _catalog
+                cursor.execute("SELECT id, text, category FROM questions ORDER BY id")
+                rows = cursor.fetchall()
+        except Exception as e:
+            if _catalog is None:
+                raise
+            logger.warning(f"Не удалось сверить каталог вопросов с БД, используется сохранённый: {e}")
+            _catalog_checked_at = now
+            return _catalog
+
+        record_cache(False)
+        _catalog = _build_catalog(source, version, rows)
+        _catalog_checked_at = now
+        _write_catalog_file(_catalog)
+        logger.info(f"Каталог вопросов загружен: версия {version}, вопросов {len(rows)}")
+        return _catalog
+
+
+def prefetch_catalog():
+    """Загружает каталог в фоновом потоке (например, пока открыто окно входа)"""
+    def load():
+        try:
+            get_catalog()
+        except Exception as e:
+            logger.warning(f"Не удалось заранее загрузить каталог вопросов: {e}")
+
+    threading.Thread(target=load, name="asakk-catalog", daemon=True).start()
+
+
+def invalidate_catalog():
+    """Забывает каталог в памяти; следующий вызов сверит версию с БД"""
+    global _catalog, _catalog_checked_at
+    with _catalog_lock:
+        _catalog = None
+        _catalog_checked_at = 0.0
+
 
 def get_categories():
-    logger.debug("Запрос категорий из БД")
-    conn = None
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT category FROM questions")
-        categories = [row[0] for row in cursor.fetchall()]
-        logger.info(f"Категории загружены: {categories}")
+        categories = list(get_catalog()["categories"])
+        logger.debug(f"Категории: {categories}")
         return categories
     except Exception as e:
         logger.error(f"Не удалось загрузить категории: {e}", exc_info=True)
         return []
-    finally:
-        if conn:
-            conn.close()
 
+
+def get_question_counts():
+    """Число вопросов по категориям: {категория: количество}"""
+    return dict(get_catalog()["counts"])
+
+@instrumented
 def get_questions_by_category(category=None):
     """
     Возвращает все вопросы из указанной категории.
     Если category == 'Все категории', возвращаются все вопросы
     """
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        if category == "Все категории":
+            cursor.execute("SELECT id, text, category FROM questions")
+        else:
+            cursor.execute("SELECT id, text, category FROM questions WHERE category=%s", (category,))
+
+        return cursor.fetchall()
 
-    if category == "Все категории":
-        cursor.execute("SELECT id, text, category FROM questions")
+# Сколько строк отправляется в одном INSERT ... VALUES
+BULK_PAGE_SIZE = 5000
+
+
+def insert_answers(cursor, rows):
+    """
+    Вставляет ответы массовой вставкой бэкенда и обновляет сводку оценок
+    в той же транзакции (без её фиксации).
+    :param rows: список кортежей (user_id, question_id, score) или
+        (user_id, question_id, score, timestamp), если ответы записываются
+        позже, чем были даны
+    :return: количество вставленных строк
+    """
+    if not rows:
+        return 0
+    if len(rows[0]) == 3:
+        columns, scores = "user_id, question_id, score", rows
     else:
-        cursor.execute("SELECT id, text, category FROM questions WHERE category=%s", (category,))
-    
-    questions = cursor.fetchall()
-    conn.close()
-    return questions
+        columns, scores = "user_id, question_id, score, timestamp", [row[:3] for row in rows]
+    get_backend().insert_many(
+        cursor,
+        f"INSERT INTO answers ({columns}) VALUES %s",
+        rows,
+        page_size=BULK_PAGE_SIZE
+    )
+    rollups.apply_answers(cursor, scores)
+    return len(rows)
+
+
+@instrumented
+def save_submissions(submissions):
+    """
+    Сохраняет пакет прохождений опроса в одной транзакции.
+    :param submissions: список пар (user_id, {question_id: score})
+    :return: количество записанных строк
+    """
+    rows = [
+        (user_id, q_id, score)
+        for user_id, answers in submissions
+        for q_id, score in answers.items()
+    ]
+    if not rows:
+        return 0
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            count = insert_answers(cursor, rows)
+            bump_data_version(cursor)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Не удалось сохранить ответы: {e}", exc_info=True)
+            raise
+    logger.info(f"Сохранено ответов: {count} (прохождений: {len(submissions)})")
+    return count
+
+
+@instrumented
+def save_keyed_submissions(submissions):
+    """
+    Идемпотентно сохраняет пакет прохождений в одной транзакции: ключи
+    записываются в submissions одним многострочным INSERT, и ответы
+    добавляются только для новых ключей. Повторная отправка того же ключа
+    (например, после обрыва связи до ответа сервера) ничего не добавляет.
+    :param submissions: список (ключ, user_id, {question_id: score}, время прохождения)
+    :return: количество новых прохождений
+    """
+    if not submissions:
+        return 0
+
+    # Повтор ключа внутри пакета учитывается один раз
+    unique = {}
+    for submission in submissions:
+        unique.setdefault(submission[0], submission)
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            new_keys = {row[0] for row in get_backend().insert_many(
+                cursor,
+                "INSERT INTO submissions (key, user_id, completed_at) VALUES %s "
+                "ON CONFLICT (key) DO NOTHING RETURNING key",
+                [(key, user_id, completed_at) for key, user_id, _, completed_at in unique.values()],
+                fetch=True
+            )}
+            accepted = len(new_keys)
+            rows = [
+                (user_id, q_id, score, completed_at)
+                for key, user_id, answers, completed_at in unique.values() if key in new_keys
+                for q_id, score in answers.items()
+            ]
+            if rows:
+                insert_answers(cursor, rows)
+                bump_data_version(cursor)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Не удалось сохранить прохождения: {e}", exc_info=True)
+            raise
+    logger.info(f"Сохранено прохождений: {accepted} из {len(submissions)}, ответов: {len(rows)}")
+    return accepted
+
 
 def save_answers(user_id, answers):
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    for q_id, score in answers.items():
-        cursor.execute(
-            "INSERT INTO answers (user_id, question_id, score) VALUES (%s, %s, %s)",
-            (user_id, q_id, score)
-        )
+    """
+    Сохраняет ответы одного пользователя.
+    :param answers: словарь {question_id: score}
+    :return: количество записанных строк
+    """
+    return save_submissions([(user_id, answers)])
+
+
+# --- Режим клиента сервера приёма (asakk.ingest) ---
+#
+# При INGEST_CONFIG['client_mode'] прохождения отправляются серверу приёма,
+# который объединяет их в групповые транзакции на нескольких соединениях,
+# вместо того чтобы каждый клиент открывал своё соединение с БД.
 
+class SubmissionRejected(Exception):
+    """Прохождение отклонено из-за данных (а не недоступности БД или сервера)"""
+
+    def __init__(self, message, errors=None):
+        """
+        :param errors: {ключ: сообщение} отклонённых прохождений пакета; остальные
+            прохождения пакета сохранены. None — неизвестно, какие именно отклонены
+        """
+        super().__init__(message)
+        self.errors = errors
+
+
+def ingest_request(request):
+    """Один запрос к серверу приёма (протокол — в asakk.ingest)"""
+    address = (INGEST_CONFIG['host'], INGEST_CONFIG['port'])
+    with socket.create_connection(address, timeout=INGEST_CONFIG['timeout']) as sock:
+        sock.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as file:
+            line = file.readline()
+    if not line:
+        raise ConnectionError("Сервер приёма закрыл соединение без ответа")
+    return json.loads(line)
+
+
+def send_submissions(submissions):
+    """
+    Отправляет пакет прохождений серверу приёма; пока его очередь переполнена,
+    повторяет с паузой. Формат — как у save_keyed_submissions.
+    :return: количество сохранённых прохождений (включая уже записанные ранее)
+    :raise SubmissionRejected: сервер отклонил данные части прохождений
+        (ключи — в errors, остальные сохранены) или весь запрос как некорректный
+        (errors=None, ничего не сохранено)
+    :raise ConnectionError: сервер или БД недоступны
+    """
+    request = {"op": "submit", "submissions": [
+        {
+            "key": key,
+            "user_id": user_id,
+            "answers": {str(q_id): score for q_id, score in answers.items()},
+            "completed_at": completed_at.isoformat(" "),
+        }
+        for key, user_id, answers, completed_at in submissions
+    ]}
+    for attempt in range(INGEST_CONFIG['busy_retries'] + 1):
+        response = ingest_request(request)
+        if response["ok"] or response["error"] != "busy":
+            break
+        logger.debug(f"Сервер приёма занят (очередь {response['queue_depth']}), повтор")
+        time.sleep(response["retry_after"] * (attempt + 1))
+    if not response["ok"] and response["error"] == "bad_request":
+        # Тот же запрос сервер не примет и при повторе
+        raise SubmissionRejected(f"Сервер приёма отклонил запрос: {response.get('message', '')}".strip())
+    if not response["ok"]:
+        raise ConnectionError(f"Сервер приёма: {response['error']} {response.get('message', '')}".strip())
+
+    results, errors = response["results"], response["errors"]
+    unavailable = [key for key, outcome in results.items() if outcome == "unavailable"]
+    if unavailable:
+        # Сохранённые прохождения при повторе отправки не задвоятся
+        raise ConnectionError(f"Сервер приёма: БД недоступна ({errors[unavailable[0]]})")
+    rejected = {key: errors[key] for key, outcome in results.items() if outcome == "rejected"}
+    if rejected:
+        raise SubmissionRejected(f"Отклонено прохождений: {len(rejected)}", rejected)
+    return response["stored"]
+
+
+def store_submissions(submissions):
+    """Записывает прохождения через сервер приёма в режиме клиента, иначе прямо в БД"""
+    if INGEST_CONFIG['client_mode']:
+        return send_submissions(submissions)
+    return save_keyed_submissions(submissions)
+
+
+def submission_rejected(error):
+    """
+    Отклонено ли прохождение из-за своих данных: повтор не поможет, и запись
+    откладывается в сторону. Остальные ошибки (недоступность БД или сервера
+    приёма, блокировки, таймауты, пул) временные — прохождение повторяется позже.
+    """
+    if isinstance(error, SubmissionRejected):
+        return True
+    return not INGEST_CONFIG['client_mode'] and get_backend().is_data_error(error)
+
+
+def store_answers(user_id, answers):
+    """Записывает одно прохождение сразу (без журнала) через store_submissions"""
+    return store_submissions([(uuid.uuid4().hex, user_id, answers, datetime.datetime.now())])
+
+
+@instrumented
 def add_question_with_recommendation(category, question_text, event_text):
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    try:
-        # Добавляем вопрос
-        cursor.execute(
-            "INSERT INTO questions (text, category) VALUES (%s, %s) RETURNING id",
-            (question_text, category)
-        )
-        question_id = cursor.fetchone()[0]
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            # Добавляем вопрос
+            cursor.execute(
+                "INSERT INTO questions (text, category) VALUES (%s, %s) RETURNING id",
+                (question_text, category)
+            )
+            question_id = cursor.fetchone()[0]
 
-        # Добавляем рекомендацию с привязкой к вопросу
-        cursor.execute(
-            "INSERT INTO recommendations (category, event, question_id) VALUES (%s, %s, %s)",
-            (category, event_text, question_id)
-        )
+            # Добавляем рекомендацию с привязкой к вопросу
+            cursor.execute(
+                "INSERT INTO recommendations (category, event, question_id) VALUES (%s, %s, %s)",
+                (category, event_text, question_id)
+            )
 
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise Exception(f"Ошибка при добавлении вопроса и мероприятия: {e}")
-    finally:
-        conn.close()
+            bump_data_version(cursor)
+            bump_catalog_version(cursor)
+            conn.commit()
+            return question_id
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Ошибка при добавлении вопроса и мероприятия: {e}")
 
+@instrumented
 def add_question_to_db(text, category):
     logger.debug(f"Добавление вопроса: '{text}' → {category}")
-    conn = None
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO questions (text, category) VALUES (%s, %s) RETURNING id",
-            (text, category)
-        )
-        question_id = cursor.fetchone()[0]
-        conn.commit()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO questions (text, category) VALUES (%s, %s) RETURNING id",
+                (text, category)
+            )
+            question_id = cursor.fetchone()[0]
+            bump_data_version(cursor)
+            bump_catalog_version(cursor)
+            conn.commit()
         logger.info(f"Вопрос '{text}' добавлен (ID={question_id})")
         return question_id
     except Exception as e:
         logger.error(f"Не удалось добавить вопрос: {e}", exc_info=True)
-        if conn:
-            conn.rollback()
         return None
-    finally:
-        if conn:
-            conn.close()
 
 def get_questions_by_categories(categories):
     """
-    Возвращает вопросы из указанных категорий.
+    Возвращает вопросы из указанных категорий (из каталога вопросов).
     categories - список названий категорий.
     """
     if not categories:
         return []
 
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-
-    # Используем SQL IN для выбора вопросов из нескольких категорий
-    placeholders = ', '.join(['%s'] * len(categories))
-    query = f"SELECT id, text, category FROM questions WHERE category IN ({placeholders})"
-    
-    cursor.execute(query, categories)
-    questions = cursor.fetchall()
-    
-    conn.close()
-    return questions
+    questions = get_catalog()["questions"]
+    return [question for category in categories for question in questions.get(category, [])]
 
 
+@instrumented
 def get_all_questions():
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, text, category FROM questions")
-        return cursor.fetchall()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, text, category FROM questions")
+            return cursor.fetchall()
     except Exception as e:
         print(f"Ошибка загрузки вопросов: {e}")
         return []
-    finally:
-        if 'conn' in locals() and conn:
-            conn.close()
\ No newline at end of file
+
+
+def _question_filters(search=None, category=None):
+    conditions, params = [], []
+    if search:
+        conditions.append("LOWER(text) LIKE %s ESCAPE '\\'")
+        params.append(like_pattern(search))
+    if category:
+        conditions.append("category = %s")
+        params.append(category)
+    return conditions, params
+
+
+@instrumented
+def get_questions_page(after=None, limit=100, search=None, category=None):
+    """
+    Страница вопросов по возрастанию id (постраничный вывод по ключу).
+    :param after: id последнего вопроса предыдущей страницы; None — первая страница
+    :param search: подстрока текста вопроса без учёта регистра
+    :return: список (id, text, category)
+    """
+    conditions, params = _question_filters(search, category)
+    if after is not None:
+        conditions.append("id > %s")
+        params.append(after)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT id, text, category FROM questions {where} ORDER BY id LIMIT %s",
+            params + [limit]
+        )
+        return cursor.fetchall()
+
+
+@instrumented
+def count_questions(search=None, category=None):
+    conditions, params = _question_filters(search, category)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM questions {where}", params)
+        return cursor.fetchone()[0]
@@ -0,0 +1,43 @@
+"""
+Линейная регрессия методом наименьших квадратов в замкнутой форме.
+
+Заменяет sklearn.linear_model.LinearRegression для рядов вида
+y = slope * x + intercept, где x = 0, 1, ..., n-1 (порядковый номер ответа).
+Все ряды подгоняются одним векторизованным вычислением в numpy.
+"""
+
+
+def fit_lines(series):
+    """
+    Подгоняет прямую к каждому ряду.
+    :param series: словарь {ключ: [y0, y1, ...]}; ряды короче 2 точек пропускаются
+    :return: словарь {ключ: (slope, intercept)}
+    """
+    import numpy as np
+
+    keys = [key for key, values in series.items() if len(values) >= 2]
+    if not keys:
+        return {}
+
+    lengths = np.array([len(series[key]) for key in keys], dtype=np.int64)
+    y = np.concatenate([np.asarray(series[key], dtype=np.float64) for key in keys])
+    group = np.repeat(np.arange(len(keys)), lengths)
+    starts = np.cumsum(lengths) - lengths
+    x = np.arange(len(y), dtype=np.float64) - np.repeat(starts, lengths)
+
+    n = lengths.astype(np.float64)
+    # Для x = 0..n-1: среднее и сумма квадратов отклонений известны заранее
+    x_mean = (n - 1) / 2
+    sxx = n * (n * n - 1) / 12
+    sum_y = np.bincount(group, weights=y, minlength=len(keys))
+    sum_xy = np.bincount(group, weights=x * y, minlength=len(keys))
+
+    slope = (sum_xy - x_mean * sum_y) / sxx
+    intercept = sum_y / n - slope * x_mean
+
+    return {key: (float(slope[i]), float(intercept[i])) for i, key in enumerate(keys)}
+
+
+def fit_line(values):
+    """Подгоняет прямую к одному ряду; None, если точек меньше двух"""
+    return fit_lines({0: values}).get(0)
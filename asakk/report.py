@@ -1,23 +1,20 @@
-import psycopg2
-import matplotlib.pyplot as plt
-from data.config import DB_CONFIG
+from asakk.database import get_connection, get_backend
+from asakk.quiz import save_submissions, bump_catalog_version
+from asakk import rollups
+from asakk.cache import cached, bump_data_version
+from asakk.metrics import instrumented
 import logging
-import numpy as np
+import math
 from collections import defaultdict
-from sklearn.linear_model import LinearRegression
+from asakk.regression import fit_line, fit_lines
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-file_handler = logging.FileHandler('asakk.log', encoding='utf-8')
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-logger.addHandler(logging.StreamHandler())
-logger.propagate = False
 
 
 # --- СТАТИСТИЧЕСКИЙ АНАЛИЗ ---
-def analyze_survey_data():
+@instrumented
+@cached
+def analyze_survey_data(server_side=True):
     """
     Анализ опроса: расчёт средних значений, дисперсий и выявление аномалий.
     Возвращает словарь:
@@ -30,42 +27,109 @@ def analyze_survey_data():
             },
             ...
         }
+    :param server_side: агрегировать в СУБД одним GROUP BY GROUPING SETS
+        (по умолчанию); False — выгрузить все ответы и посчитать в Python
     """
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT q.category, q.text, a.score
-        FROM answers a
-        JOIN questions q ON a.question_id = q.id
-    ''')
-    results = cursor.fetchall()
-    conn.close()
+    if server_side:
+        category_stats, question_stats = _fetch_survey_aggregates()
+    else:
+        category_stats, question_stats = _aggregate_survey_rows()
+    return _build_survey_analysis(category_stats, question_stats)
 
-    category_scores = defaultdict(list)
-    question_scores = defaultdict(list)
 
+def _fetch_survey_aggregates():
+    """
+    Возвращает суммы (count, sum, sum of squares) по категориям и по вопросам,
+    посчитанные в СУБД одним запросом по сводке score_rollups.
+    """
+    if get_backend().dialect == "sqlite":
+        # В SQLite нет GROUPING SETS — те же два уровня через UNION ALL
+        query = '''
+            SELECT q.category, NULL, 1 AS is_category,
+                   SUM(r.answers_count), SUM(r.score_sum), SUM(r.score_sum * r.score)
+            FROM score_rollups r
+            JOIN questions q ON r.question_id = q.id
+            WHERE r.answers_count > 0
+            GROUP BY q.category
+            UNION ALL
+            SELECT q.category, q.text, 0 AS is_category,
+                   SUM(r.answers_count), SUM(r.score_sum), SUM(r.score_sum * r.score)
+            FROM score_rollups r
+            JOIN questions q ON r.question_id = q.id
+            WHERE r.answers_count > 0
+            GROUP BY q.category, q.text
+        '''
+    else:
+        query = '''
+            SELECT q.category, q.text, GROUPING(q.text) AS is_category,
+                   SUM(r.answers_count)::bigint,
+                   SUM(r.score_sum)::bigint,
+                   SUM(r.score_sum * r.score)::bigint
+            FROM score_rollups r
+            JOIN questions q ON r.question_id = q.id
+            WHERE r.answers_count > 0
+            GROUP BY GROUPING SETS ((q.category), (q.category, q.text))
+            ORDER BY q.category, is_category DESC, q.text
+        '''
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query)
+        rows = cursor.fetchall()
+
+    category_stats = {}
+    question_stats = {}
+    for category, question, is_category, count, total, total_sq in rows:
+        if is_category:
+            category_stats[category] = (count, total, total_sq)
+        else:
+            question_stats[(category, question)] = (count, total, total_sq)
+    return category_stats, question_stats
+
+
+def _aggregate_survey_rows():
+    """То же, что _fetch_survey_aggregates, но с выгрузкой всех ответов в Python"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT q.category, q.text, a.score
+            FROM answers a
+            JOIN questions q ON a.question_id = q.id
+        ''')
+        results = cursor.fetchall()
+
+    category_stats = defaultdict(lambda: (0, 0, 0))
+    question_stats = defaultdict(lambda: (0, 0, 0))
     for category, question, score in results:
-        category_scores[category].append(score)
-        question_scores[(category, question)].append(score)
+        count, total, total_sq = category_stats[category]
+        category_stats[category] = (count + 1, total + score, total_sq + score * score)
+        count, total, total_sq = question_stats[(category, question)]
+        question_stats[(category, question)] = (count + 1, total + score, total_sq + score * score)
+    return category_stats, question_stats
+
+
+def _build_survey_analysis(category_stats, question_stats):
+    """Считает mean/std/var и аномалии (отклонение среднего вопроса > 2σ) по суммам"""
+    questions_by_category = defaultdict(list)
+    for (category, question), (count, total, _) in question_stats.items():
+        questions_by_category[category].append((question, total / count))
 
     analysis = {}
 
-    for category, scores in category_scores.items():
-        mean = np.mean(scores)
-        std = np.std(scores)
-        var = np.var(scores)
+    for category, (count, total, total_sq) in category_stats.items():
+        mean = total / count
+        var = max(total_sq / count - mean * mean, 0.0)
+        std = math.sqrt(var)
 
         anomalies = []
 
-        for (cat, question), q_scores in question_scores.items():
-            if cat == category:
-                q_mean = np.mean(q_scores)
-                if abs(q_mean - mean) > 2 * std:
-                    anomalies.append({
-                        'question': question,
-                        'avg_score': round(q_mean, 2),
-                        'deviation': round(abs(q_mean - mean), 2)
-                    })
+        for question, q_mean in questions_by_category[category]:
+            if abs(q_mean - mean) > 2 * std:
+                anomalies.append({
+                    'question': question,
+                    'avg_score': round(q_mean, 2),
+                    'deviation': round(abs(q_mean - mean), 2)
+                })
 
         analysis[category] = {
             'mean': round(mean, 2),
@@ -79,6 +143,7 @@ def analyze_survey_data():
 
 # --- ОТЧЁТЫ СО СТАТИСТИКОЙ ---
 
+@instrumented
 def analyze_all_results():
     """Общий отчет по всем категориям с отклонениями"""
     survey_data = analyze_survey_data()
@@ -87,6 +152,13 @@ def analyze_all_results():
         messagebox.showinfo("Нет данных", "Нет результатов для анализа")
         return None
 
+    return build_overall_chart(survey_data)
+
+
+def build_overall_chart(survey_data):
+    """Строит график средних по категориям по результату analyze_survey_data"""
+    import matplotlib.pyplot as plt
+
     categories = list(survey_data.keys())
     means = [survey_data[c]['mean'] for c in categories]
     stds = [survey_data[c]['std'] for c in categories]
@@ -102,89 +174,194 @@ def analyze_all_results():
     return fig
 
 
+@instrumented
+@cached
 def calculate_category_trend(category):
     """
     Возвращает данные для построения тренда методом наименьших квадратов.
     """
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT a.score, a.timestamp
-        FROM answers a
-        JOIN questions q ON a.question_id = q.id
-        WHERE q.category = %s
-        ORDER BY a.timestamp
-    ''', (category,))
-    results = cursor.fetchall()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT a.score, a.timestamp
+            FROM answers a
+            JOIN questions q ON a.question_id = q.id
+            WHERE q.category = %s
+            ORDER BY a.timestamp
+        ''', (category,))
+        results = cursor.fetchall()
 
     if len(results) < 2:
         return None
 
     scores = [r[0] for r in results]
-    X = np.arange(len(scores)).reshape(-1, 1)
-    y = np.array(scores).reshape(-1, 1)
+    return _trend_data(scores, *fit_line(scores))
+
 
-    model = LinearRegression()
-    model.fit(X, y)
+def _trend_data(scores, slope, intercept):
+    import numpy as np
 
-    trend_line = model.predict(X).flatten().tolist()
+    trend_line = (intercept + slope * np.arange(len(scores))).tolist()
 
+    # slope/intercept — массивы из одного элемента, как coef_[0]/intercept_ у sklearn
     return {
         "scores": scores,
         "trend": trend_line,
-        "slope": model.coef_[0],
-        "intercept": model.intercept_
+        "slope": np.array([slope]),
+        "intercept": np.array([intercept])
     }
 
 
+@instrumented
+@cached
+def calculate_trends(by="category"):
+    """
+    Коэффициенты тренда сразу для всех категорий (by="category")
+    или всех вопросов (by="question") одним запросом и одним расчётом.
+    Возвращает словарь {категория или ID вопроса: (slope, intercept)}.
+    """
+    key_column = {"category": "q.category", "question": "q.id"}[by]
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT {key_column}, a.score
+            FROM answers a
+            JOIN questions q ON a.question_id = q.id
+            ORDER BY {key_column}, a.timestamp
+        ''')
+        rows = cursor.fetchall()
+
+    series = defaultdict(list)
+    for key, score in rows:
+        series[key].append(score)
+    return fit_lines(series)
+
+
 # --- ГРАФИЧЕСКИЕ ФУНКЦИИ ДЛЯ GUI ---
 
+@instrumented
+@cached
 def analyze_category_data(category):
     """Возвращает данные по категории без построения графика"""
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT q.text, a.score
-        FROM answers a
-        JOIN questions q ON a.question_id = q.id
-        WHERE q.category = %s
-    ''', (category,))
-    results = cursor.fetchall()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT q.text, a.score
+            FROM answers a
+            JOIN questions q ON a.question_id = q.id
+            WHERE q.category = %s
+        ''', (category,))
+        results = cursor.fetchall()
 
     if not results:
         return None
 
     questions, scores = zip(*results)
+    return _category_data(questions, scores)
+
+
+def _category_data(questions, scores):
     max_length = 20
     short_questions = [q[:max_length] + '...' if len(q) > max_length else q for q in questions]
 
     return {
         "questions": short_questions,
-        "scores": scores
+        "scores": tuple(scores)
     }
 
 
+@instrumented
+def get_category_reports():
+    """
+    Данные analyze_category_data и calculate_category_trend сразу для всех
+    категорий — одним проходом по ответам (пакетная генерация отчётов).
+    Возвращает {категория: (данные категории, данные тренда или None)}.
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, text FROM questions")
+        texts = dict(cursor.fetchall())
+        cursor.execute('''
+            SELECT q.category, a.question_id, a.score
+            FROM answers a
+            JOIN questions q ON a.question_id = q.id
+            ORDER BY q.category, a.timestamp
+        ''')
+        question_ids, scores = defaultdict(list), defaultdict(list)
+        for category, question_id, score in cursor:
+            question_ids[category].append(question_id)
+            scores[category].append(score)
+
+    trends = fit_lines(scores)
+    return {
+        category: (
+            _category_data([texts[question_id] for question_id in question_ids[category]], category_scores),
+            _trend_data(category_scores, *trends[category]) if category in trends else None
+        )
+        for category, category_scores in scores.items()
+    }
+
+
+@instrumented
+@cached
+def get_score_matrix():
+    """
+    Число ответов по каждой оценке во всех категориях — одним запросом по сводке.
+    Возвращает (categories, counts): список категорий и numpy-массив int64
+    формы (len(categories), 5), где counts[i][score] — число ответов с этой оценкой.
+    """
+    import numpy as np
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT category, score, CAST(SUM(answers_count) AS BIGINT) AS count
+            FROM score_rollups
+            GROUP BY category, score
+            HAVING SUM(answers_count) > 0
+            ORDER BY category, score
+        ''')
+        rows = cursor.fetchall()
+
+    categories = sorted({category for category, _, _ in rows})
+    index = {category: i for i, category in enumerate(categories)}
+    counts = np.zeros((len(categories), 5), dtype=np.int64)
+    for category, score, count in rows:
+        counts[index[category], score] = count
+    return categories, counts
+
+
+def score_counts_from_matrix(matrix, category):
+    """Строка матрицы get_score_matrix в виде [(score, count), ...] без нулевых оценок"""
+    categories, counts = matrix
+    if category not in categories:
+        return []
+    row = counts[categories.index(category)]
+    return [(score, int(count)) for score, count in enumerate(row) if count > 0]
+
+
+def get_score_counts(category):
+    """Число ответов по каждой оценке в категории: [(score, count), ...]"""
+    return score_counts_from_matrix(get_score_matrix(), category)
+
+
+@instrumented
 def score_distribution_by_category(category):
     """Гистограмма распределения оценок по категории"""
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT a.score, COUNT(*) AS count
-        FROM answers a
-        JOIN questions q ON a.question_id = q.id
-        WHERE q.category = %s
-        GROUP BY a.score
-    ''', (category,))
-    results = cursor.fetchall()
-    conn.close()
+    results = get_score_counts(category)
 
     if not results:
         from tkinter import messagebox
         messagebox.showinfo("Нет данных", f"Нет результатов для категории '{category}'")
         return None
 
+    return build_score_distribution_chart(results, category)
+
+
+def build_score_distribution_chart(results, category):
+    """Строит гистограмму по результату get_score_counts"""
+    import matplotlib.pyplot as plt
+
     scores, counts = zip(*results)
 
     fig, ax = plt.subplots(figsize=(8, 5))
@@ -198,25 +375,23 @@ def score_distribution_by_category(category):
     return fig
 
 
+@instrumented
 def pie_chart_by_category(category):
     """Круговая диаграмма оценок по категории"""
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT a.score, COUNT(*) AS count
-        FROM answers a
-        JOIN questions q ON a.question_id = q.id
-        WHERE q.category = %s
-        GROUP BY a.score
-    ''', (category,))
-    results = cursor.fetchall()
-    conn.close()
+    results = get_score_counts(category)
 
     if not results:
         from tkinter import messagebox
         messagebox.showinfo("Нет данных", f"Нет результатов для категории '{category}'")
         return None
 
+    return build_score_pie_chart(results, category)
+
+
+def build_score_pie_chart(results, category):
+    """Строит круговую диаграмму по результату get_score_counts"""
+    import matplotlib.pyplot as plt
+
     score_counts = dict(results)
     labels = []
     sizes = []
@@ -246,32 +421,28 @@ def pie_chart_by_category(category):
 
 # --- РЕКОМЕНДАЦИИ И ПРОГНОЗИРОВАНИЕ ---
 
+@instrumented
+@cached
 def generate_recommendations():
     """Формирует рекомендации на основе слабых категорий"""
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    # Средние оценки по категориям
-    cursor.execute('''
-        SELECT q.category, AVG(a.score) AS avg_score
-        FROM answers a
-        JOIN questions q ON a.question_id = q.id
-        GROUP BY q.category
-    ''')
-    results = cursor.fetchall()
-    conn.close()
+    import numpy as np
 
-    low_categories = [cat for cat, score in results if score < 2]
+    # Средние оценки по категориям — из матрицы распределения оценок
+    categories, counts = get_score_matrix()
+    averages = (counts * np.arange(5)).sum(axis=1) / counts.sum(axis=1) if categories else []
+
+    low_categories = [cat for cat, score in zip(categories, averages) if score < 2]
     if not low_categories:
         return {}
 
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT category, event FROM recommendations
-        WHERE category = ANY(%s)
-    ''', (low_categories,))
-    events = cursor.fetchall()
-    conn.close()
+    placeholders = ', '.join(['%s'] * len(low_categories))
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT category, event FROM recommendations
+            WHERE category IN ({placeholders})
+        ''', low_categories)
+        events = cursor.fetchall()
 
     # Группируем мероприятия по категориям
     recommendations = {}
@@ -284,26 +455,29 @@ def generate_recommendations():
     return recommendations
 
 
-def predict_culture():
+@instrumented
+def predict_culture(limit=10, since=None):
     """
-    Прогнозирует изменение показателей культуры на основе последних 10 оценок.
+    Прогнозирует изменение показателей культуры на основе последних limit (10) оценок.
     Возвращает словарь с прогнозом на следующий шаг (например, следующая оценка).
+    :param since: учитывать только ответы начиная с этого момента
     """
-    data = get_last_10_scores_per_category()
-    predictions = {}
-
-    for category, scores in data.items():
-        if len(scores) < 2:
-            continue  # Нужно минимум 2 точки для прогноза
+    return predict_from_scores(get_last_scores_per_category(limit, since))
 
-        X = np.array(range(len(scores))).reshape(-1, 1)
-        y = np.array(scores).reshape(-1, 1)
 
-        model = LinearRegression()
-        model.fit(X, y)
+def predict_from_scores(data):
+    """
+    Расчётная часть predict_culture без обращения к БД
+    (можно выполнять в отдельном процессе).
+    :param data: словарь {категория: [оценки, самые свежие первыми]}
+    """
+    # Все категории подгоняются одним расчётом; ряды короче 2 точек пропускаются
+    coefficients = fit_lines(data)
+    predictions = {}
 
-        next_point = np.array([[len(scores)]])  # Предсказываем следующую точку
-        prediction = model.predict(next_point)[0][0]
+    for category, (slope, intercept) in coefficients.items():
+        scores = data[category]
+        prediction = intercept + slope * len(scores)  # Предсказываем следующую точку
 
         predicted_score = round(prediction, 1)
         last_score = round(scores[-1], 1)
@@ -320,53 +494,153 @@ def predict_culture():
     return predictions
 
 
-def get_last_10_scores_per_category():
-    """
-    Забирает последние 10 оценок по каждой категории из базы данных.
+@instrumented
+@cached
+def get_last_scores_per_category(limit=10, since=None):
     """
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    query = """
-        SELECT q.category, a.score, a.timestamp
-        FROM answers a
-        JOIN questions q ON a.question_id = q.id
-        ORDER BY q.category, a.timestamp DESC
+    Забирает последние limit оценок по каждой категории (самые свежие первыми).
+    :param since: учитывать только ответы начиная с этого момента
+    Для каждого вопроса берутся limit последних ответов по индексу
+    answers(question_id, timestamp DESC), затем ROW_NUMBER() по категории
+    оставляет limit на категорию — из БД передаётся не больше limit × категорий строк.
     """
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    conn.close()
+    since_filter = "AND a.timestamp >= %(since)s" if since is not None else ""
+    if get_backend().dialect == "sqlite":
+        # В SQLite нет LATERAL: коррелированный подзапрос в условии соединения
+        # так же берёт limit последних ответов каждого вопроса по индексу
+        query = f"""
+            SELECT category, score
+            FROM (
+                SELECT q.category, t.score,
+                       ROW_NUMBER() OVER (PARTITION BY q.category ORDER BY t.timestamp DESC) AS rn
+                FROM questions q
+                JOIN answers t ON t.id IN (
+                    SELECT a.id
+                    FROM answers a
+                    WHERE a.question_id = q.id {since_filter}
+                    ORDER BY a.timestamp DESC
+                    LIMIT %(limit)s
+                )
+            ) ranked
+            WHERE rn <= %(limit)s
+            ORDER BY category, rn
+        """
+    else:
+        query = f"""
+            SELECT category, score
+            FROM (
+                SELECT q.category, t.score,
+                       ROW_NUMBER() OVER (PARTITION BY q.category ORDER BY t.timestamp DESC) AS rn
+                FROM questions q
+                CROSS JOIN LATERAL (
+                    SELECT a.score, a.timestamp
+                    FROM answers a
+                    WHERE a.question_id = q.id {since_filter}
+                    ORDER BY a.timestamp DESC
+                    LIMIT %(limit)s
+                ) t
+            ) ranked
+            WHERE rn <= %(limit)s
+            ORDER BY category, rn
+        """
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, {"limit": limit, "since": since})
+        rows = cursor.fetchall()
 
     scores_by_category = defaultdict(list)
-    for category, score, timestamp in rows:
+    for category, score in rows:
         scores_by_category[category].append(score)
+    return dict(scores_by_category)
 
-    # Оставляем только последние 10 записей для каждой категории
-    for cat in scores_by_category:
-        scores_by_category[cat] = scores_by_category[cat][:10]
 
-    return scores_by_category
+def get_last_10_scores_per_category():
+    """
+    Забирает последние 10 оценок по каждой категории из базы данных.
+    """
+    return get_last_scores_per_category(10)
 
 
 # --- ЭКСПОРТ И УПРАВЛЕНИЕ ДАННЫМИ ---
 
-def export_to_csv(filename="results.csv"):
-    """Экспорт всех данных в CSV-файл"""
-    import csv
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT u.username, q.text, q.category, a.score
+# Как часто (в строках) вызывать callback прогресса при экспорте
+EXPORT_PROGRESS_EVERY = 10000
+
+
+class _CopyProgressWriter:
+    """Файловая обёртка для выгрузки в CSV: считает строки и сообщает прогресс"""
+
+    def __init__(self, file, progress=None, every=EXPORT_PROGRESS_EVERY):
+        self.file = file
+        self.progress = progress
+        self.every = every
+        self.rows = -1  # первая строка — заголовок
+
+    def write(self, data):
+        # Бэкенд передаёт в write() по одной строке результата
+        self.file.write(data)
+        self.rows += 1
+        if self.progress and self.rows > 0 and self.rows % self.every == 0:
+            self.progress(self.rows)
+
+
+@instrumented
+def export_to_csv(filename="results.csv", compress=None, category=None,
+                  date_from=None, date_to=None, user_id=None, progress=None):
+    """
+    Потоковый экспорт ответов в CSV (в PostgreSQL — через COPY ... TO STDOUT).
+    Строки пишутся на диск по мере получения, расход памяти не зависит от размера таблицы.
+    :param compress: сжимать gzip; по умолчанию — если имя файла оканчивается на .gz
+    :param category: только указанная категория
+    :param date_from: ответы начиная с этого момента (включительно)
+    :param date_to: ответы до этого момента (не включительно)
+    :param user_id: только ответы указанного пользователя
+    :param progress: callback(rows), вызывается каждые EXPORT_PROGRESS_EVERY строк и в конце
+    :return: количество выгруженных строк
+    """
+    import gzip
+
+    conditions = []
+    params = []
+    if category is not None:
+        conditions.append("q.category = %s")
+        params.append(category)
+    if date_from is not None:
+        conditions.append("a.timestamp >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append("a.timestamp < %s")
+        params.append(date_to)
+    if user_id is not None:
+        conditions.append("a.user_id = %s")
+        params.append(user_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    if compress is None:
+        compress = filename.endswith(".gz")
+
+    query = f'''
+        SELECT u.username AS "Пользователь", q.text AS "Вопрос",
+               q.category AS "Категория", a.score AS "Оценка"
         FROM answers a
         JOIN users u ON a.user_id = u.id
         JOIN questions q ON a.question_id = q.id
-    ''')
-    data = cursor.fetchall()
-    conn.close()
+        {where}
+    '''
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        opener = gzip.open if compress else open
+        with opener(filename, mode='wb') as file:
+            writer = _CopyProgressWriter(file, progress)
+            get_backend().copy_to_csv(cursor, query, params, writer)
 
-    with open(filename, mode='w', encoding='utf-8', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(["Пользователь", "Вопрос", "Категория", "Оценка"])
-        writer.writerows(data)
+    rows = max(writer.rows, 0)
+    if progress:
+        progress(rows)
+    logger.info(f"Экспортировано строк: {rows} → {filename}")
+    return rows
 
 
 def save_answers(user_id, answers):
@@ -374,37 +648,26 @@ def save_answers(user_id, answers):
     Сохраняет ответы пользователя в БД
     :param user_id: ID пользователя
     :param answers: словарь {question_id: score}
+    :return: количество записанных строк
     """
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    for question_id, score in answers.items():
-        cursor.execute(
-            "INSERT INTO answers (user_id, question_id, score) VALUES (%s, %s, %s)",
-            (user_id, question_id, score)
-        )
-    conn.commit()
-    conn.close()
+    return save_submissions([(user_id, answers)])
 
 
+@instrumented
 def add_recommendation_to_db(category, event):
     logger.debug(f"Добавление мероприятия: {event} → {category}")
-    conn = None
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO recommendations (category, event) VALUES (%s, %s)",
-            (category, event)
-        )
-        conn.commit()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO recommendations (category, event) VALUES (%s, %s)",
+                (category, event)
+            )
+            bump_data_version(cursor)
+            conn.commit()
         logger.info(f"Мероприятие '{event}' добавлено в '{category}'")
     except Exception as e:
         logger.error(f"Не удалось добавить мероприятие: {e}", exc_info=True)
-        if conn:
-            conn.rollback()
-    finally:
-        if conn:
-            conn.close()
 
 
 def get_categ_to_adm():
@@ -418,55 +681,76 @@ def get_categ_to_adm():
     ]
 
 
+@instrumented
 def add_question_with_recommendation(category, question_text, event_text):
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    try:
-        # Добавляем вопрос
-        cursor.execute(
-            "INSERT INTO questions (text, category) VALUES (%s, %s) RETURNING id",
-            (question_text, category)
-        )
-        question_id = cursor.fetchone()[0]
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            # Добавляем вопрос
+            cursor.execute(
+                "INSERT INTO questions (text, category) VALUES (%s, %s) RETURNING id",
+                (question_text, category)
+            )
+            question_id = cursor.fetchone()[0]
+
+            # Добавляем рекомендацию с привязкой к вопросу
+            cursor.execute(
+                "INSERT INTO recommendations (category, event, question_id) VALUES (%s, %s, %s)",
+                (category, event_text, question_id)
+            )
+
+            bump_data_version(cursor)
+            bump_catalog_version(cursor)
+            conn.commit()
+            return question_id
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Ошибка при добавлении вопроса и мероприятия: {e}")
 
-        # Добавляем рекомендацию с привязкой к вопросу
-        cursor.execute(
-            "INSERT INTO recommendations (category, event, question_id) VALUES (%s, %s, %s)",
-            (category, event_text, question_id)
-        )
+@instrumented
+def delete_question_by_id(question_id):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            # Проверяем, существует ли вопрос
+            cursor.execute("SELECT 1 FROM questions WHERE id = %s", (question_id,))
+            if cursor.fetchone() is None:
+                raise Exception(f"Вопрос с ID {question_id} не найден")
+
+            # Удаляем связанные ответы, сводку по ним и сам вопрос
+            cursor.execute("DELETE FROM answers WHERE question_id = %s", (question_id,))
+            rollups.remove_question(cursor, question_id)
+            cursor.execute("DELETE FROM questions WHERE id = %s", (question_id,))
+            bump_data_version(cursor)
+            bump_catalog_version(cursor)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Ошибка при удалении вопроса: {e}")
 
+@instrumented
+def delete_recommendation_by_category(category):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM recommendations WHERE category = %s", (category,))
+        bump_data_version(cursor)
         conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise Exception(f"Ошибка при добавлении вопроса и мероприятия: {e}")
-    finally:
-        conn.close()
 
-def delete_question_by_id(question_id):
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    try:
-        # Проверяем, существует ли вопрос
-        cursor.execute("SELECT 1 FROM questions WHERE id = %s", (question_id,))
-        if cursor.fetchone() is None:
-            raise Exception(f"Вопрос с ID {question_id} не найден")
-
-        # Удаляем связанные ответы и сам вопрос
-        cursor.execute("DELETE FROM answers WHERE question_id = %s", (question_id,))
-        cursor.execute("DELETE FROM questions WHERE id = %s", (question_id,))
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise Exception(f"Ошибка при удалении вопроса: {e}")
-    finally:
-        conn.close()
+def build_trend_chart(trend_data, category):
+    """Строит график оценок и линии тренда по результату calculate_category_trend"""
+    import matplotlib.pyplot as plt
 
-def delete_recommendation_by_category(category):
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM recommendations WHERE category = %s", (category,))
-    conn.commit()
-    conn.close()
+    fig, ax = plt.subplots(figsize=(7, 4))
+    x = list(range(len(trend_data["scores"])))
+    ax.plot(x, trend_data["scores"], label="Оценки", marker='o', linestyle='')
+    ax.plot(x, trend_data["trend"], color='red',
+            label=f'Тренд (y = {trend_data["slope"][0]:.2f}x + {trend_data["intercept"][0]:.2f})')
+    ax.set_title(f"Тренд по категории: {category}")
+    ax.set_xlabel("Порядковый номер ответа")
+    ax.set_ylabel("Оценка")
+    ax.legend()
+    plt.tight_layout()
+    return fig
 
 def build_category_bar_chart(data, category):
     """Строит график по данным категории"""
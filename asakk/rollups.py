@@ -0,0 +1,138 @@
+"""
+Сводные таблицы оценок (score_rollups).
+
+Для каждой пары (вопрос, оценка 0–4) хранится число ответов и сумма баллов,
+плюс категория вопроса. Отчёты читают сводку вместо полного сканирования
+answers, поэтому их стоимость зависит от числа вопросов, а не ответов.
+
+Сводка обновляется в той же транзакции, что и вставка/удаление ответов
+(asakk.quiz.insert_answers, asakk.auth.delete_user_from_db,
+asakk.report.delete_question_by_id). Полный пересчёт:
+    python -m asakk.rollups rebuild
+"""
+import logging
+import sys
+from collections import Counter
+
+from asakk.database import get_connection, get_backend, in_list
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_DDL = '''
+    CREATE TABLE IF NOT EXISTS score_rollups (
+        question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+        category TEXT NOT NULL,
+        score SMALLINT NOT NULL,
+        answers_count BIGINT NOT NULL DEFAULT 0,
+        score_sum BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (question_id, score)
+    );
+    CREATE INDEX IF NOT EXISTS idx_score_rollups_category ON score_rollups (category);
+'''
+
+
+def create_rollup_tables(cursor):
+    get_backend().execute_script(cursor, ROLLUP_DDL)
+
+
+def apply_answers(cursor, rows):
+    """
+    Добавляет в сводку только что вставленные ответы (без фиксации транзакции).
+    :param rows: список кортежей (user_id, question_id, score)
+    """
+    counts = Counter((question_id, score) for _, question_id, score in rows)
+    if not counts:
+        return
+    backend = get_backend()
+    values = [(question_id, score, cnt) for (question_id, score), cnt in sorted(counts.items())]
+    if backend.dialect == "sqlite":
+        # WHERE true нужен SQLite, чтобы отличить ON CONFLICT от условия соединения
+        cursor.executemany('''
+            INSERT INTO score_rollups (question_id, category, score, answers_count, score_sum)
+            SELECT q.id, q.category, %(score)s, %(cnt)s, %(score)s * %(cnt)s
+            FROM questions q
+            WHERE q.id = %(question_id)s AND true
+            ON CONFLICT (question_id, score) DO UPDATE
+            SET answers_count = answers_count + excluded.answers_count,
+                score_sum = score_sum + excluded.score_sum
+        ''', [
+            {"question_id": question_id, "score": score, "cnt": cnt}
+            for question_id, score, cnt in values
+        ])
+        return
+    backend.insert_many(
+        cursor,
+        '''
+        INSERT INTO score_rollups (question_id, category, score, answers_count, score_sum)
+        SELECT q.id, q.category, v.score, v.cnt, v.score * v.cnt
+        FROM (VALUES %s) AS v (question_id, score, cnt)
+        JOIN questions q ON q.id = v.question_id
+        ON CONFLICT (question_id, score) DO UPDATE
+        SET answers_count = score_rollups.answers_count + EXCLUDED.answers_count,
+            score_sum = score_rollups.score_sum + EXCLUDED.score_sum
+        ''',
+        values,
+        template="(%s::integer, %s::smallint, %s::bigint)"
+    )
+
+
+def remove_user_answers(cursor, user_id):
+    """Вычитает из сводки ответы пользователя; вызывать до удаления самих ответов"""
+    cursor.execute('''
+        UPDATE score_rollups AS r
+        SET answers_count = r.answers_count - d.cnt,
+            score_sum = r.score_sum - d.score * d.cnt
+        FROM (
+            SELECT question_id, score, COUNT(*) AS cnt
+            FROM answers
+            WHERE user_id = %s
+            GROUP BY question_id, score
+        ) d
+        WHERE r.question_id = d.question_id AND r.score = d.score
+    ''', (user_id,))
+
+
+def remove_question(cursor, question_id):
+    remove_questions(cursor, [question_id])
+
+
+def remove_questions(cursor, question_ids):
+    condition, params = in_list("question_id", question_ids)
+    cursor.execute(f"DELETE FROM score_rollups WHERE {condition}", params)
+
+
+def rebuild_rollups():
+    """Пересчитывает сводку целиком по таблице answers. Возвращает число строк сводки"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            create_rollup_tables(cursor)
+            # Блокируем вставку ответов на время пересчёта, чтобы не потерять их в сводке
+            # (в SQLite запись и так сериализована блокировкой базы)
+            if get_backend().dialect == "postgres":
+                cursor.execute("LOCK TABLE answers IN SHARE MODE")
+            cursor.execute("DELETE FROM score_rollups")
+            cursor.execute('''
+                INSERT INTO score_rollups (question_id, category, score, answers_count, score_sum)
+                SELECT q.id, q.category, a.score, COUNT(*), SUM(a.score)
+                FROM answers a
+                JOIN questions q ON a.question_id = q.id
+                GROUP BY q.id, q.category, a.score
+            ''')
+            count = cursor.rowcount
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Не удалось пересчитать сводку оценок: {e}", exc_info=True)
+            raise
+    logger.info(f"Сводка оценок пересчитана: {count} строк")
+    return count
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        print("Использование: python -m asakk.rollups rebuild")
+        sys.exit(1)
+    from asakk.logging_config import setup_logging
+    setup_logging()
+    print(f"✅ Сводка оценок пересчитана: {rebuild_rollups()} строк")
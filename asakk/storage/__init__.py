@@ -0,0 +1,24 @@
+"""
+Бэкенды хранилища: PostgreSQL (по умолчанию) и встроенный SQLite.
+
+Бэкенд выбирается в data/config.py (STORAGE_CONFIG) или переменными окружения:
+    ASAKK_BACKEND=sqlite ASAKK_SQLITE_PATH=bench.sqlite3 python run.py
+"""
+from asakk.storage.base import PoolError, StorageBackend
+
+
+def create_backend(config):
+    """
+    Создаёт бэкенд по настройкам вида STORAGE_CONFIG.
+    Модуль psycopg2 импортируется только для бэкенда postgres.
+    """
+    name = config.get("backend", "postgres")
+    if name == "postgres":
+        from asakk.storage.postgres import PostgresBackend
+        from data.config import DB_CONFIG, POOL_CONFIG
+        return PostgresBackend(DB_CONFIG, **POOL_CONFIG)
+    if name == "sqlite":
+        from asakk.storage.sqlite import SqliteBackend
+        return SqliteBackend(config.get("sqlite_path", "asakk.sqlite3"),
+                             timeout=config.get("sqlite_timeout", 30.0))
+    raise ValueError(f"Неизвестный бэкенд хранилища: {name}")
@@ -0,0 +1,76 @@
+"""
+Интерфейс хранилища.
+
+Модули auth, quiz, report и rollups пишут SQL в общем подмножестве
+PostgreSQL/SQLite и выполняют его через соединение из backend.connection()
+в стиле DB-API (плейсхолдеры %s и %(name)s, commit/rollback).
+Всё, что в СУБД устроено по-разному — массовая вставка, потоковая выгрузка
+в CSV, многооператорные скрипты, блокировка на время миграций, — вынесено
+в методы бэкенда. Запросы, которые нельзя записать переносимо, выбирают
+вариант по backend.dialect.
+"""
+from contextlib import contextmanager
+
+
+class PoolError(Exception):
+    """Пул не смог выдать соединение (таймаут ожидания или пул закрыт)"""
+
+
+class StorageBackend:
+    """Базовый класс бэкенда хранилища"""
+
+    #: имя диалекта SQL: 'postgres' или 'sqlite'
+    dialect = None
+
+    #: где лежат данные (сервер/база или файл); отличает базы в ключах локальных кэшей
+    source = None
+
+    def connection(self):
+        """
+        Контекстный менеджер, выдающий соединение:
+            with backend.connection() as conn:
+                cursor = conn.cursor()
+                ...
+        Незакоммиченные изменения откатываются при возврате соединения.
+        """
+        raise NotImplementedError
+
+    def insert_many(self, cursor, query, rows, page_size=1000, template=None, fetch=False):
+        """
+        Многострочная вставка. query содержит единственный плейсхолдер
+        VALUES %s, вместо которого подставляются строки rows.
+        :param template: шаблон одной строки для PostgreSQL (с приведением типов)
+        :param fetch: вернуть строки RETURNING всех пачек (иначе None)
+        """
+        raise NotImplementedError
+
+    def copy_to_csv(self, cursor, query, params, file):
+        """
+        Выгружает результат запроса в CSV с заголовком в бинарный файл file (UTF-8).
+        file.write() вызывается по одному разу на строку результата.
+        """
+        raise NotImplementedError
+
+    def execute_script(self, cursor, sql):
+        """Выполняет несколько операторов SQL в текущей транзакции"""
+        raise NotImplementedError
+
+    @contextmanager
+    def migration_lock(self, cursor, lock_id):
+        """Не даёт двум клиентам применять миграции одновременно"""
+        yield
+
+    def is_data_error(self, error):
+        """
+        Ошибка вызвана самими данными (нарушение ограничения, недопустимое
+        значение), и повтор того же запроса не поможет. Прочие ошибки —
+        недоступность, блокировки, таймауты, пул — считаются временными.
+        """
+        return False
+
+    def stats(self):
+        """Снимок состояния соединений"""
+        return {"backend": self.dialect}
+
+    def close(self):
+        """Закрывает все соединения"""
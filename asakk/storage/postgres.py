@@ -0,0 +1,227 @@
+"""Бэкенд PostgreSQL: пул соединений psycopg2"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.extras import execute_values
+
+from asakk.storage.base import PoolError, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    Ограниченный пул соединений с PostgreSQL.
+
+    - не более maxconn открытых соединений одновременно;
+    - простаивающее дольше max_idle секунд соединение проверяется запросом SELECT 1;
+    - при ошибке подключения выполняется повтор с экспоненциальной задержкой;
+    - соединение выдаётся через контекстный менеджер connection().
+    """
+
+    def __init__(self, db_config, maxconn=5, acquire_timeout=10.0, max_idle=60.0,
+                 max_retries=3, backoff=0.5):
+        self.db_config = dict(db_config)
+        self.maxconn = maxconn
+        self.acquire_timeout = acquire_timeout
+        self.max_idle = max_idle
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self._idle = []  # [(conn, время последнего возврата)]
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            "created": 0,
+            "reused": 0,
+            "discarded": 0,
+            "reconnects": 0,
+            "waits": 0,
+            "timeouts": 0,
+        }
+
+    def _connect(self):
+        """Открывает новое соединение, повторяя попытки с экспоненциальной задержкой"""
+        attempt = 0
+        while True:
+            try:
+                conn = psycopg2.connect(**self.db_config)
+                with self._cond:
+                    self._stats["created"] += 1
+                return conn
+            except psycopg2.OperationalError as e:
+                if attempt >= self.max_retries:
+                    logger.error(f"Не удалось подключиться к БД после {attempt + 1} попыток: {e}")
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                logger.warning(f"Ошибка подключения к БД, повтор через {delay:.1f} с: {e}")
+                with self._cond:
+                    self._stats["reconnects"] += 1
+                time.sleep(delay)
+                attempt += 1
+
+    def _is_healthy(self, conn, last_used):
+        if conn.closed:
+            return False
+        status = conn.get_transaction_status()
+        if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if time.monotonic() - last_used < self.max_idle:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def acquire(self):
+        """Выдаёт соединение из пула, при необходимости ожидая освобождения"""
+        deadline = time.monotonic() + self.acquire_timeout
+        conn = None
+        last_used = 0.0
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("Пул соединений закрыт")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._in_use + len(self._idle) < self.maxconn:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolError(f"Нет свободных соединений в течение {self.acquire_timeout} с")
+                self._stats["waits"] += 1
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        try:
+            if conn is not None:
+                if self._is_healthy(conn, last_used):
+                    with self._cond:
+                        self._stats["reused"] += 1
+                    return conn
+                logger.warning("Соединение из пула неработоспособно, переподключаемся")
+                self._close_quietly(conn)
+                with self._cond:
+                    self._stats["discarded"] += 1
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, discard=False):
+        """Возвращает соединение в пул; незавершённая транзакция откатывается"""
+        if not discard and not conn.closed:
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.closed or self._closed:
+                self._stats["discarded"] += 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Контекстный менеджер: with pool.connection() as conn: ..."""
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def stats(self):
+        """Снимок состояния пула"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "maxconn": self.maxconn,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "size": self._in_use + len(self._idle),
+            })
+            return stats
+
+    def close(self):
+        """Закрывает все простаивающие соединения и запрещает выдачу новых"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+
+
+class PostgresBackend(StorageBackend):
+    dialect = "postgres"
+
+    def __init__(self, db_config, **pool_config):
+        self.pool = ConnectionPool(db_config, **pool_config)
+        self.source = f"{db_config.get('host', '')}:{db_config.get('port', '')}/{db_config.get('dbname', '')}"
+
+    def connection(self):
+        return self.pool.connection()
+
+    def insert_many(self, cursor, query, rows, page_size=1000, template=None, fetch=False):
+        """
+        execute_values: строки уходят пачками по page_size в одном INSERT ... VALUES.
+        :param template: шаблон строки, например "(%s::integer, %s::smallint)"
+        """
+        return execute_values(cursor, query, rows, template=template, page_size=page_size, fetch=fetch)
+
+    def copy_to_csv(self, cursor, query, params, file):
+        # COPY не принимает параметры — подставляем их на клиенте
+        query = cursor.mogrify(query, params).decode("utf-8")
+        cursor.execute("SET LOCAL client_encoding TO 'UTF8'")
+        cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)", file)
+
+    def execute_script(self, cursor, sql):
+        cursor.execute(sql)
+
+    @contextmanager
+    def migration_lock(self, cursor, lock_id):
+        cursor.execute("SELECT pg_advisory_lock(%s)", (lock_id,))
+        try:
+            yield
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (lock_id,))
+
+    def is_data_error(self, error):
+        return isinstance(error, (psycopg2.DataError, psycopg2.IntegrityError))
+
+    def stats(self):
+        stats = self.pool.stats()
+        stats["backend"] = self.dialect
+        return stats
+
+    def close(self):
+        self.pool.close()
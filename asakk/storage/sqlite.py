@@ -0,0 +1,286 @@
+"""
+Встроенный бэкенд SQLite: файл или база в памяти.
+
+Соединения ведут себя как у psycopg2: плейсхолдеры %s и %(name)s,
+транзакция открывается первым оператором и завершается commit()/rollback()
+(в том числе для DDL). Каждый поток получает своё соединение; вложенные
+get_connection() в одном потоке используют его же, поэтому не блокируют
+друг друга. В скриптах миграций поддерживается ADD COLUMN IF NOT EXISTS,
+как в PostgreSQL. Файловая база открывается в режиме WAL: отчёты читают данные
+параллельно с записью ответов.
+"""
+import csv
+import datetime
+import hashlib
+import io
+import itertools
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from asakk.storage.base import PoolError, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+# Сколько строк выбирать за раз при выгрузке в CSV
+COPY_FETCH_SIZE = 5000
+# Предел числа параметров одного запроса (SQLITE_MAX_VARIABLE_NUMBER с версии 3.32)
+MAX_VARIABLES = 32766
+
+_PLACEHOLDER_RE = re.compile(r"%\((\w+)\)s|%s|%%")
+_memory_ids = itertools.count(1)
+# ADD COLUMN IF NOT EXISTS из PostgreSQL: в SQLite такой формы нет
+_ADD_COLUMN_RE = re.compile(
+    r"^\s*ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+(IF\s+NOT\s+EXISTS\s+)(\w+)", re.IGNORECASE
+)
+
+
+def _translate_placeholder(match):
+    if match.group(1):
+        return f":{match.group(1)}"
+    return "?" if match.group(0) == "%s" else "%"
+
+
+def translate_query(query):
+    """Переводит плейсхолдеры psycopg2 (%s, %(name)s, %%) в синтаксис sqlite3"""
+    return _PLACEHOLDER_RE.sub(_translate_placeholder, query)
+
+
+# Столбцы TIMESTAMP хранятся строками ISO 8601 и читаются как datetime, как в psycopg2
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.datetime.fromisoformat(value.decode()))
+
+
+def _sha256_hex(value):
+    return None if value is None else hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def _lower(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+class SqliteCursor:
+    """Курсор с плейсхолдерами psycopg2 и неявным BEGIN"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = connection.raw.cursor()
+
+    def _begin(self):
+        if not self.connection.raw.in_transaction:
+            self._cursor.execute("BEGIN")
+
+    def execute(self, query, params=None):
+        self._begin()
+        if params is None:
+            self._cursor.execute(query)
+        else:
+            self._cursor.execute(translate_query(query), params)
+        return self
+
+    def executemany(self, query, seq_of_params):
+        self._begin()
+        self._cursor.executemany(translate_query(query), seq_of_params)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SqliteConnection:
+    """Обёртка над sqlite3.Connection с интерфейсом соединения psycopg2"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.depth = 0  # вложенность backend.connection() в текущем потоке
+
+    def cursor(self):
+        return SqliteCursor(self)
+
+    def commit(self):
+        if self.raw.in_transaction:
+            self.raw.commit()
+
+    def rollback(self):
+        if self.raw.in_transaction:
+            self.raw.rollback()
+
+    def close(self):
+        self.raw.close()
+
+
+class SqliteBackend(StorageBackend):
+    dialect = "sqlite"
+
+    def __init__(self, path="asakk.sqlite3", timeout=30.0):
+        """
+        :param path: путь к файлу базы или ':memory:' (общая для всех потоков
+            база в памяти, живёт до close())
+        :param timeout: сколько ждать снятия блокировки записи другим соединением, с
+        """
+        self.path = path
+        self.timeout = timeout
+        self.memory = path == ":memory:"
+        if self.memory:
+            self._target = f"file:asakk-memory-{next(_memory_ids)}?mode=memory&cache=shared"
+        else:
+            self._target = path
+        self.source = self._target if self.memory else os.path.abspath(path)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._closed = False
+        # База в памяти существует, пока открыто хотя бы одно соединение
+        self._anchor = self._open() if self.memory else None
+
+    def _open(self):
+        raw = sqlite3.connect(
+            self._target,
+            timeout=self.timeout,
+            isolation_level=None,  # транзакциями управляет SqliteCursor
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,  # close() вызывается из другого потока
+            uri=self.memory
+        )
+        raw.execute("PRAGMA foreign_keys = ON")
+        # Аналог encode(sha256(...), 'hex') из PostgreSQL для миграций
+        raw.create_function("sha256_hex", 1, _sha256_hex, deterministic=True)
+        # Встроенная LOWER() в SQLite не знает кириллицу
+        raw.create_function("lower", 1, _lower, deterministic=True)
+        if not self.memory:
+            raw.execute("PRAGMA journal_mode = WAL")
+            raw.execute("PRAGMA synchronous = NORMAL")
+        conn = SqliteConnection(raw)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        if self._closed:
+            raise PoolError("Хранилище SQLite закрыто")
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+        conn.depth += 1
+        try:
+            yield conn
+        finally:
+            conn.depth -= 1
+            if conn.depth == 0:
+                try:
+                    conn.rollback()
+                except sqlite3.Error as e:
+                    logger.warning(f"Не удалось откатить транзакцию SQLite: {e}")
+
+    def insert_many(self, cursor, query, rows, page_size=1000, template=None, fetch=False):
+        if not rows:
+            return [] if fetch else None
+        row_placeholder = "(" + ", ".join(["%s"] * len(rows[0])) + ")"
+        if not fetch:
+            # Для встроенной базы executemany не уступает многострочному VALUES
+            cursor.executemany(query.replace("%s", row_placeholder, 1), rows)
+            return None
+        # executemany не возвращает строки RETURNING: многострочный VALUES пачками
+        page_size = max(1, min(page_size, MAX_VARIABLES // len(rows[0])))
+        result = []
+        for start in range(0, len(rows), page_size):
+            page = rows[start:start + page_size]
+            cursor.execute(
+                query.replace("%s", ", ".join([row_placeholder] * len(page)), 1),
+                [value for row in page for value in row]
+            )
+            result.extend(cursor.fetchall())
+        return result
+
+    def copy_to_csv(self, cursor, query, params, file):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+
+        def write_row(row):
+            writer.writerow(row)
+            file.write(buffer.getvalue().encode("utf-8"))
+            buffer.seek(0)
+            buffer.truncate()
+
+        cursor.execute(query, params)
+        write_row([column[0] for column in cursor.description])
+        while True:
+            rows = cursor.fetchmany(COPY_FETCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                write_row(row)
+
+    def execute_script(self, cursor, sql):
+        # executescript() фиксирует транзакцию, поэтому операторы выполняются по одному
+        statement = ""
+        for part in sql.split(";"):
+            statement += part + ";"
+            if sqlite3.complete_statement(statement):
+                if statement.strip(" \t\r\n;"):
+                    self._execute_statement(cursor, statement)
+                statement = ""
+
+    @staticmethod
+    def _execute_statement(cursor, statement):
+        match = _ADD_COLUMN_RE.match(statement)
+        if match:
+            table, _, column = match.groups()
+            cursor.execute(f"PRAGMA table_info({table})")
+            if any(row[1] == column for row in cursor.fetchall()):
+                return
+            statement = statement[:match.start(2)] + statement[match.end(2):]
+        cursor.execute(statement)
+
+    def is_data_error(self, error):
+        return isinstance(error, (sqlite3.DataError, sqlite3.IntegrityError))
+
+    def stats(self):
+        with self._lock:
+            connections = len(self._connections)
+        return {"backend": self.dialect, "path": self.path, "connections": connections}
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
@@ -0,0 +1,80 @@
+"""
+Сравнение построчной вставки ответов с пакетной (asakk.quiz.insert_answers).
+
+Запуск:
+    python -m benchmarks.bench_save_answers --employees 200 --repeat 3
+
+Берёт существующих пользователей и вопросы из БД, формирует синтетические
+прохождения и вставляет их обоими способами. Каждый прогон выполняется в
+транзакции, которая затем откатывается, поэтому данные в БД не меняются.
+"""
+import argparse
+import random
+import time
+
+from asakk.database import get_connection
+from asakk.quiz import insert_answers
+
+
+def build_rows(user_ids, question_ids, employees, seed=42):
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(employees):
+        user_id = user_ids[i % len(user_ids)]
+        for q_id in question_ids:
+            rows.append((user_id, q_id, rnd.randint(0, 4)))
+    return rows
+
+
+def insert_row_by_row(cursor, rows):
+    """Прежний способ: один INSERT на каждый ответ"""
+    for row in rows:
+        cursor.execute(
+            "INSERT INTO answers (user_id, question_id, score) VALUES (%s, %s, %s)",
+            row
+        )
+    return len(rows)
+
+
+def run_once(insert_func, rows):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        start = time.perf_counter()
+        insert_func(cursor, rows)
+        elapsed = time.perf_counter() - start
+        conn.rollback()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк сохранения ответов")
+    parser.add_argument("--employees", type=int, default=200, help="число прохождений в пакете")
+    parser.add_argument("--repeat", type=int, default=3, help="число повторов каждого способа")
+    args = parser.parse_args()
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM users")
+        user_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT id FROM questions")
+        question_ids = [row[0] for row in cursor.fetchall()]
+
+    if not user_ids or not question_ids:
+        print("В БД нет пользователей или вопросов — нечего измерять")
+        return
+
+    rows = build_rows(user_ids, question_ids, args.employees)
+    print(f"Строк в пакете: {len(rows)} ({args.employees} прохождений × {len(question_ids)} вопросов)")
+
+    results = {}
+    for name, func in (("построчно", insert_row_by_row), ("пакетно", insert_answers)):
+        timings = [run_once(func, rows) for _ in range(args.repeat)]
+        best = min(timings)
+        results[name] = best
+        print(f"{name:>10}: {best:.3f} с (лучший из {args.repeat}), {len(rows) / best:,.0f} строк/с")
+
+    print(f"Ускорение: ×{results['построчно'] / results['пакетно']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
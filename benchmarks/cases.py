@@ -0,0 +1,98 @@
+"""
+Измеряемые функции отчётов и записи ответов.
+
+Каждый случай — функция, принимающая контекст (см. prepare_context).
+Отчёты вызываются через .uncached, чтобы измерять запрос и расчёт, а не кэш.
+Случаи записи работают от отдельного пользователя bench_ingest и после
+каждого прогона удаляют его ответы, поэтому набор данных не меняется.
+"""
+import os
+import random
+import tempfile
+
+from asakk import report, rollups
+from asakk.auth import add_user_to_db
+from asakk.cache import bump_data_version
+from asakk.database import get_connection
+from asakk.quiz import get_categories, get_all_questions, save_answers, save_submissions
+
+INGEST_USERNAME = "bench_ingest"
+
+# Отчёты с выгрузкой всех ответов в Python на больших наборах меряют скорее своп
+ROW_SCAN_LIMIT = 2_000_000
+
+
+class BenchCase:
+    def __init__(self, name, func, teardown=None, max_answers=None):
+        self.name = name
+        self.func = func
+        self.teardown = teardown
+        self.max_answers = max_answers  # на наборах больше этого случай пропускается
+
+
+def prepare_context(tmp_dir=None):
+    """Данные, общие для всех случаев: категории, вопросы, пользователь для записи"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM users WHERE username = %s", (INGEST_USERNAME,))
+        row = cursor.fetchone()
+    if row is None:
+        add_user_to_db(INGEST_USERNAME, "bench-key-ingest")
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM users WHERE username = %s", (INGEST_USERNAME,))
+            row = cursor.fetchone()
+
+    categories = get_categories()
+    question_ids = [question[0] for question in get_all_questions()]
+    rnd = random.Random(7)
+    return {
+        "category": sorted(categories)[0] if categories else None,
+        "ingest_user_id": row[0],
+        "submission": {q_id: rnd.randint(0, 4) for q_id in question_ids},
+        "tmp_dir": tmp_dir or tempfile.gettempdir(),
+    }
+
+
+def remove_ingested(ctx):
+    user_id = ctx["ingest_user_id"]
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        rollups.remove_user_answers(cursor, user_id)
+        cursor.execute("DELETE FROM answers WHERE user_id = %s", (user_id,))
+        bump_data_version(cursor)
+        conn.commit()
+
+
+def _export(ctx):
+    path = os.path.join(ctx["tmp_dir"], "bench_export.csv")
+    try:
+        return report.export_to_csv(path)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+CASES = [
+    BenchCase("analyze_survey_data", lambda ctx: report.analyze_survey_data.uncached()),
+    BenchCase("analyze_survey_data_rows",
+              lambda ctx: report.analyze_survey_data.uncached(server_side=False),
+              max_answers=ROW_SCAN_LIMIT),
+    BenchCase("calculate_category_trend",
+              lambda ctx: report.calculate_category_trend.uncached(ctx["category"])),
+    BenchCase("calculate_trends", lambda ctx: report.calculate_trends.uncached()),
+    BenchCase("analyze_category_data",
+              lambda ctx: report.analyze_category_data.uncached(ctx["category"]),
+              max_answers=ROW_SCAN_LIMIT),
+    BenchCase("get_score_matrix", lambda ctx: report.get_score_matrix.uncached()),
+    BenchCase("generate_recommendations", lambda ctx: report.generate_recommendations.uncached()),
+    BenchCase("get_last_scores_per_category",
+              lambda ctx: report.get_last_scores_per_category.uncached(10)),
+    BenchCase("export_to_csv", _export),
+    BenchCase("save_answers",
+              lambda ctx: save_answers(ctx["ingest_user_id"], ctx["submission"]),
+              teardown=remove_ingested),
+    BenchCase("save_submissions_200",
+              lambda ctx: save_submissions([(ctx["ingest_user_id"], ctx["submission"])] * 200),
+              teardown=remove_ingested),
+]
@@ -0,0 +1,217 @@
+"""
+Детерминированный генератор синтетических данных опроса.
+
+Запуск:
+    python -m benchmarks.datagen --size 1m --out benchmarks/data/bench_1m.sqlite3
+
+Вопросы и мероприятия берутся из data/questions_db.py, пользователи и ответы
+генерируются: сотрудники проходят опрос волнами раз в месяц, в рабочие часы
+одной недели, отвечая на все вопросы подряд. У каждой категории своя средняя
+оценка и медленный дрейф от волны к волне, у каждого сотрудника — своё смещение.
+При одинаковых size и seed получаются одинаковые данные.
+
+Данные записываются в текущий бэкенд (asakk.database.get_backend), после
+вставки сводка score_rollups пересчитывается целиком.
+"""
+import argparse
+import datetime
+import logging
+import math
+import random
+import time
+
+from asakk import rollups
+from asakk.auth import key_fingerprint
+from asakk.cache import bump_data_version
+from asakk.database import get_backend, get_connection, set_backend
+from asakk.migrations import migrate
+from data.questions_db import questions_db, events_db
+
+logger = logging.getLogger(__name__)
+
+SIZES = {
+    "10k": 10_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+
+# Волны опроса: первая начинается в понедельник START, следующие — каждые WAVE_INTERVAL
+START = datetime.datetime(2024, 1, 8, 9, 0)
+WAVE_INTERVAL = datetime.timedelta(days=28)
+WAVES = 12
+WORKDAY_SECONDS = 9 * 3600
+
+# Сколько ответов вставляется в одной транзакции
+CHUNK_SIZE = 100_000
+
+BENCH_DATASET_DDL = '''
+    CREATE TABLE IF NOT EXISTS bench_dataset (
+        name TEXT PRIMARY KEY,
+        seed INTEGER NOT NULL,
+        answers BIGINT NOT NULL,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+
+def parse_size(size):
+    """'10k', '1m', '10m' или число ответов"""
+    if isinstance(size, int):
+        return size
+    return SIZES.get(size.lower()) or int(size)
+
+
+def dataset_info(cursor):
+    """Описание уже сгенерированного набора (name, seed, answers) или None"""
+    cursor.execute(BENCH_DATASET_DDL)
+    cursor.execute("SELECT name, seed, answers FROM bench_dataset")
+    return cursor.fetchone()
+
+
+def iter_answer_chunks(question_ids, user_ids, answers, seed=42, chunk_size=CHUNK_SIZE):
+    """
+    Генерирует ответы пачками по chunk_size строк (user_id, question_id, score, timestamp).
+    :param question_ids: список пар (question_id, category)
+    """
+    rnd = random.Random(seed)
+    categories = sorted({category for _, category in question_ids})
+    base_mean = {category: rnd.uniform(1.2, 3.2) for category in categories}
+    drift = {category: rnd.uniform(-0.06, 0.06) for category in categories}
+    user_bias = {user_id: rnd.gauss(0, 0.5) for user_id in user_ids}
+
+    chunk = []
+    produced = 0
+    submissions_per_wave = len(user_ids)
+    submission = 0
+    while produced < answers:
+        wave, index = divmod(submission, submissions_per_wave)
+        user_id = user_ids[index]
+        wave_start = START + WAVE_INTERVAL * wave
+        moment = wave_start + datetime.timedelta(days=rnd.randrange(5), seconds=rnd.randrange(WORKDAY_SECONDS))
+        for question_id, category in question_ids:
+            if produced >= answers:
+                break
+            mean = base_mean[category] + drift[category] * wave + user_bias[user_id]
+            score = min(4, max(0, round(rnd.gauss(mean, 0.9))))
+            moment += datetime.timedelta(seconds=rnd.randint(5, 40))
+            chunk.append((user_id, question_id, score, moment))
+            produced += 1
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        submission += 1
+    if chunk:
+        yield chunk
+
+
+def generate(size="10k", seed=42, progress=None):
+    """
+    Заполняет пустую базу текущего бэкенда синтетическими данными.
+    :param size: ключ SIZES или число ответов
+    :param progress: callback(вставлено ответов)
+    :return: число вставленных ответов
+    """
+    answers = parse_size(size)
+    backend = get_backend()
+    question_count = sum(len(texts) for texts in questions_db.values())
+    user_count = max(1, math.ceil(answers / (question_count * WAVES)))
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        if dataset_info(cursor) is not None:
+            raise RuntimeError("База уже содержит сгенерированный набор данных")
+
+        backend.insert_many(
+            cursor,
+            "INSERT INTO users (username, role, ssh_key, key_fingerprint) VALUES %s",
+            [(name, role, key, key_fingerprint(key)) for name, role, key in [
+                (f"bench_{i:06d}", "Employee", f"bench-key-{i:06d}") for i in range(user_count)
+            ] + [("bench_manager", "Manager", "bench-key-manager")]]
+        )
+        backend.insert_many(
+            cursor,
+            "INSERT INTO questions (text, category) VALUES %s",
+            [(text, category) for category, texts in questions_db.items() for text in texts]
+        )
+        backend.insert_many(
+            cursor,
+            "INSERT INTO recommendations (category, event) VALUES %s",
+            [(category, event) for category, events in events_db.items() for event in events]
+        )
+        cursor.execute("SELECT id FROM users WHERE role = 'Employee' ORDER BY id")
+        user_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT id, category FROM questions ORDER BY id")
+        question_ids = cursor.fetchall()
+        conn.commit()
+
+        inserted = 0
+        for chunk in iter_answer_chunks(question_ids, user_ids, answers, seed):
+            backend.insert_many(
+                cursor,
+                "INSERT INTO answers (user_id, question_id, score, timestamp) VALUES %s",
+                chunk,
+                page_size=5000
+            )
+            conn.commit()
+            inserted += len(chunk)
+            if progress:
+                progress(inserted)
+
+    rollups.rebuild_rollups()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO bench_dataset (name, seed, answers) VALUES (%s, %s, %s)",
+            (str(size), seed, inserted)
+        )
+        bump_data_version(cursor)
+        conn.commit()
+    logger.info(f"Сгенерировано ответов: {inserted} (пользователей: {len(user_ids)})")
+    return inserted
+
+
+def ensure_sqlite_dataset(path, size="10k", seed=42, progress=None):
+    """
+    Подключает файл SQLite как бэкенд процесса и при необходимости
+    создаёт в нём набор данных. Повторные запуски используют готовый файл.
+    :return: описание набора (name, seed, answers)
+    """
+    from asakk.storage.sqlite import SqliteBackend
+
+    set_backend(SqliteBackend(path))
+    migrate()
+    with get_connection() as conn:
+        info = dataset_info(conn.cursor())
+        conn.commit()
+    if info is None:
+        generate(size, seed, progress)
+        with get_connection() as conn:
+            info = dataset_info(conn.cursor())
+    elif info[0] != str(size) or info[1] != seed:
+        raise RuntimeError(f"{path} содержит другой набор данных: {info[0]}, seed={info[1]}")
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных опроса")
+    parser.add_argument("--size", default="10k", help=f"{', '.join(SIZES)} или число ответов")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="файл SQLite; без него данные пишутся в бэкенд из STORAGE_CONFIG")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+
+    def report_progress(rows):
+        print(f"\r  вставлено {rows:,} строк", end="", flush=True)
+
+    if args.out:
+        info = ensure_sqlite_dataset(args.out, args.size, args.seed, report_progress)
+        answers = info[2]
+    else:
+        migrate()
+        answers = generate(args.size, args.seed, report_progress)
+    print(f"\n✅ Набор {args.size}: {answers:,} ответов за {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
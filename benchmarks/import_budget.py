@@ -0,0 +1,86 @@
+"""
+Проверка бюджета времени импорта для окна входа.
+
+Запуск:
+    python -m benchmarks.import_budget [--budget-ms 500]
+
+Для каждого модуля интерфейса выполняется `python -X importtime -c "import <модуль>"`
+в отдельном процессе. Проверка не проходит (код возврата 1), если:
+- при импорте подтягиваются тяжёлые библиотеки (matplotlib, numpy, sklearn, pandas) —
+  они должны загружаться только при первом построении графика или модели;
+- суммарное время импорта ui.login_gui (путь run.py → LoginWindow) превышает бюджет.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("matplotlib", "numpy", "sklearn", "pandas")
+
+# Модули, которые не должны тянуть тяжёлые библиотеки при импорте
+CHECKED_MODULES = (
+    "ui.login_gui",
+    "ui.gui",
+    "ui.quiz_form",
+    "ui.admin_gui",
+    "ui.question_editor",
+    "ui.manager_gui",
+    "asakk.report",
+)
+
+LOGIN_MODULE = "ui.login_gui"
+
+
+def measure_imports(module):
+    """
+    Импортирует модуль в чистом интерпретаторе с -X importtime.
+    Возвращает (время импорта модуля в мс, список загруженных пакетов верхнего уровня).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Не удалось импортировать {module}:\n{result.stderr}")
+
+    total_us = 0
+    packages = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        packages.add(name.split(".")[0])
+        if name == module:
+            total_us = int(cumulative)
+    return total_us / 1000, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бюджет времени импорта окна входа")
+    parser.add_argument("--budget-ms", type=float, default=500.0,
+                        help=f"допустимое время импорта {LOGIN_MODULE}, мс")
+    args = parser.parse_args()
+
+    failed = False
+    for module in CHECKED_MODULES:
+        elapsed_ms, packages = measure_imports(module)
+        heavy = sorted(p for p in packages if p in HEAVY_MODULES)
+        status = "OK"
+        if heavy:
+            status = f"ОШИБКА: загружены {', '.join(heavy)}"
+            failed = True
+        elif module == LOGIN_MODULE and elapsed_ms > args.budget_ms:
+            status = f"ОШИБКА: превышен бюджет {args.budget_ms:.0f} мс"
+            failed = True
+        print(f"{module:<22} {elapsed_ms:8.1f} мс  {status}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Нагрузочный тест: одновременное прохождение опроса многими сотрудниками.
+
+Запуск:
+    python -m benchmarks.load_test --employees 500 --ramp linear:60
+    python -m benchmarks.load_test --employees 200 --ramp steps:4:15 --sqlite /tmp/load.sqlite3
+    python -m benchmarks.load_test --employees 300 --connections 50 --json load.json
+
+Каждый сотрудник — отдельный поток, который проходит те же этапы, что и
+EmployeeApp/QuizFormApp:
+    1. asakk.auth.authenticate
+    2. asakk.quiz.get_questions_by_categories (1–3 случайные категории)
+    3. asakk.quiz.save_answers
+По каждому этапу выводятся число операций, пропускная способность,
+p50/p95/p99 задержки и доля ошибок.
+
+Вопросы берутся из каталога в памяти процесса (asakk.quiz.get_catalog),
+общего для всех потоков. Каталог загружается один раз до начала замера
+(его время — catalog_load в результате), поэтому этап get_questions
+измеряет только выборку из кэша, а не обращение к БД.
+
+Профиль нарастания (--ramp):
+    0            — все сотрудники стартуют одновременно;
+    linear:S     — старты равномерно распределены по S секундам;
+    steps:N:S    — N равных волн с интервалом S секунд.
+
+Тест работает с бэкендом из STORAGE_CONFIG (например, локальным PostgreSQL)
+или с файлом SQLite (--sqlite). Пользователи load_NNNNNN создаются при
+первом запуске; ответы остаются в базе.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asakk.auth import authenticate, key_fingerprint
+from asakk.database import get_backend, get_connection, set_backend
+from asakk.migrations import migrate
+from asakk.quiz import get_catalog, get_categories, get_questions_by_categories, save_answers
+
+STAGES = ("authenticate", "get_questions", "save_answers")
+USERNAME_PREFIX = "load_"
+
+
+def ramp_offsets(employees, profile):
+    """Моменты старта сотрудников (секунды от начала теста) по профилю нарастания"""
+    if profile in ("0", "", None):
+        return [0.0] * employees
+    kind, _, params = profile.partition(":")
+    if kind == "linear":
+        duration = float(params)
+        return [duration * i / employees for i in range(employees)]
+    if kind == "steps":
+        steps, interval = params.split(":")
+        steps, interval = int(steps), float(interval)
+        per_step = -(-employees // steps)
+        return [interval * (i // per_step) for i in range(employees)]
+    raise ValueError(f"Неизвестный профиль нарастания: {profile}")
+
+
+def percentile(sorted_values, p):
+    """Перцентиль методом ближайшего ранга"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class StageStats:
+    """Задержки и ошибки по этапам; пополняется из рабочих потоков"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {stage: [] for stage in STAGES}
+        self.errors = {stage: 0 for stage in STAGES}
+        self.error_samples = {}
+
+    def record(self, stage, elapsed, error=None):
+        with self._lock:
+            if error is None:
+                self.latencies[stage].append(elapsed)
+            else:
+                self.errors[stage] += 1
+                self.error_samples.setdefault(stage, str(error))
+
+    def summary(self, wall_time):
+        result = {}
+        for stage in STAGES:
+            values = sorted(self.latencies[stage])
+            total = len(values) + self.errors[stage]
+            result[stage] = {
+                "ok": len(values),
+                "errors": self.errors[stage],
+                "error_rate": self.errors[stage] / total if total else 0.0,
+                "throughput": len(values) / wall_time if wall_time else 0.0,
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+                "max": values[-1] if values else None,
+                "first_error": self.error_samples.get(stage),
+            }
+        return result
+
+
+def ensure_load_users(employees):
+    """Создаёт недостающих пользователей load_NNNNNN; возвращает [(username, ssh_key)]"""
+    credentials = [(f"{USERNAME_PREFIX}{i:06d}", f"load-key-{i:06d}") for i in range(employees)]
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT username FROM users WHERE username LIKE %s", (USERNAME_PREFIX + "%",))
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [
+            (name, "Employee", key, key_fingerprint(key))
+            for name, key in credentials if name not in existing
+        ]
+        if missing:
+            get_backend().insert_many(
+                cursor, "INSERT INTO users (username, role, ssh_key, key_fingerprint) VALUES %s", missing
+            )
+        conn.commit()
+    return credentials
+
+
+def ensure_questions():
+    """Для пустой базы загружает вопросы из data/questions_db.py"""
+    from data.questions_db import questions_db
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM questions")
+        if cursor.fetchone()[0] == 0:
+            get_backend().insert_many(
+                cursor,
+                "INSERT INTO questions (text, category) VALUES %s",
+                [(text, category) for category, texts in questions_db.items() for text in texts]
+            )
+        conn.commit()
+
+
+def simulate_employee(username, ssh_key, categories, start_at, think_time, seed, stats):
+    """Один сотрудник: вход, загрузка вопросов, отправка ответов"""
+    rnd = random.Random(seed)
+    delay = start_at - time.perf_counter()
+    if delay > 0:
+        time.sleep(delay)
+
+    started = time.perf_counter()
+    try:
+        user = authenticate(username, ssh_key)
+        if user is None:
+            raise RuntimeError("authenticate вернул None")
+    except Exception as e:
+        stats.record("authenticate", time.perf_counter() - started, e)
+        return False
+    stats.record("authenticate", time.perf_counter() - started)
+
+    chosen = rnd.sample(categories, min(len(categories), rnd.randint(1, 3)))
+    started = time.perf_counter()
+    try:
+        questions = get_questions_by_categories(chosen)
+    except Exception as e:
+        stats.record("get_questions", time.perf_counter() - started, e)
+        return False
+    stats.record("get_questions", time.perf_counter() - started)
+
+    if think_time:
+        time.sleep(rnd.uniform(0.5, 1.5) * think_time)
+
+    answers = {question[0]: rnd.randint(0, 4) for question in questions}
+    started = time.perf_counter()
+    try:
+        save_answers(user[0], answers)
+    except Exception as e:
+        stats.record("save_answers", time.perf_counter() - started, e)
+        return False
+    stats.record("save_answers", time.perf_counter() - started)
+    return True
+
+
+def run(employees, ramp="0", think_time=0.0, seed=42):
+    """
+    Запускает нагрузку на текущем бэкенде.
+    :return: словарь с параметрами, временем, числом успешных прохождений и сводкой по этапам
+    """
+    ensure_questions()
+    credentials = ensure_load_users(employees)
+    # Каталог вопросов — вне замера: дальше этап get_questions обслуживается из кэша
+    catalog_started = time.perf_counter()
+    get_catalog(refresh=True)
+    catalog_load = time.perf_counter() - catalog_started
+    categories = get_categories()
+    if not categories:
+        raise RuntimeError("В базе нет вопросов")
+
+    offsets = ramp_offsets(employees, ramp)
+    stats = StageStats()
+    started = time.perf_counter() + 0.1  # время на запуск потоков
+    with ThreadPoolExecutor(max_workers=employees, thread_name_prefix="load") as pool:
+        futures = [
+            pool.submit(simulate_employee, username, ssh_key, categories,
+                        started + offsets[i], think_time, seed + i, stats)
+            for i, (username, ssh_key) in enumerate(credentials)
+        ]
+        completed = sum(1 for future in futures if future.result())
+    wall_time = time.perf_counter() - started
+
+    return {
+        "backend": get_backend().dialect,
+        "employees": employees,
+        "ramp": ramp,
+        "think_time": think_time,
+        "wall_time": wall_time,
+        "catalog_load": catalog_load,
+        "completed": completed,
+        "submissions_per_second": completed / wall_time if wall_time else 0.0,
+        "stages": stats.summary(wall_time),
+        "backend_stats": get_backend().stats(),
+    }
+
+
+def print_report(result):
+    def ms(value):
+        return f"{value * 1000:8.1f}" if value is not None else "       —"
+
+    print(f"Бэкенд: {result['backend']}, сотрудников: {result['employees']}, "
+          f"профиль: {result['ramp']}, время: {result['wall_time']:.1f} с")
+    print(f"Успешных прохождений: {result['completed']} "
+          f"({result['submissions_per_second']:.1f} в секунду)")
+    print(f"Загрузка каталога вопросов до замера: {ms(result['catalog_load']).strip()} мс "
+          f"(этап get_questions — только кэш)")
+    print(f"{'этап':<15}{'ок':>7}{'ошибки':>8}{'оп/с':>9}{'p50 мс':>9}{'p95 мс':>9}{'p99 мс':>9}{'max мс':>9}")
+    for stage, item in result["stages"].items():
+        print(f"{stage:<15}{item['ok']:>7}{item['error_rate']:>7.1%} {item['throughput']:>8.1f}"
+              f" {ms(item['p50'])} {ms(item['p95'])} {ms(item['p99'])} {ms(item['max'])}")
+        if item["first_error"]:
+            print(f"    первая ошибка: {item['first_error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест прохождения опроса")
+    parser.add_argument("--employees", type=int, default=100, help="число одновременных сотрудников")
+    parser.add_argument("--ramp", default="0", help="профиль нарастания: 0, linear:S, steps:N:S")
+    parser.add_argument("--think", type=float, default=0.0,
+                        help="среднее время заполнения анкеты между загрузкой вопросов и отправкой, с")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sqlite", help="файл SQLite вместо бэкенда из STORAGE_CONFIG")
+    parser.add_argument("--connections", type=int,
+                        help="размер пула соединений PostgreSQL (по умолчанию POOL_CONFIG['maxconn'])")
+    parser.add_argument("--json", help="записать результат в JSON-файл")
+    args = parser.parse_args()
+
+    ramp_offsets(1, args.ramp)  # проверка формата профиля
+    if args.sqlite:
+        from asakk.storage.sqlite import SqliteBackend
+        set_backend(SqliteBackend(args.sqlite))
+    elif args.connections:
+        from asakk.storage.postgres import PostgresBackend
+        from data.config import DB_CONFIG, POOL_CONFIG
+        set_backend(PostgresBackend(DB_CONFIG, **dict(POOL_CONFIG, maxconn=args.connections)))
+    migrate()
+
+    result = run(args.employees, args.ramp, args.think, args.seed)
+    print_report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Запуск бенчмарков отчётов и записи ответов с сравнением с базовой линией.
+
+Запуск:
+    python -m benchmarks.runner --sizes 10k,1m --repeat 3
+    python -m benchmarks.runner --sizes 10k --update-baseline
+    python -m benchmarks.runner --current     # на базе из STORAGE_CONFIG, без генерации
+
+Для каждого размера набора (benchmarks.datagen.SIZES) используется файл SQLite
+в --data-dir; при первом запуске он генерируется, дальше переиспользуется.
+Для каждого случая из benchmarks.cases записываются лучшее время из --repeat
+прогонов и пиковый объём памяти Python (tracemalloc, отдельным прогоном).
+
+Результаты пишутся в JSON (--out). Если есть базовая линия (--baseline),
+случаи, ставшие медленнее или прожорливее больше чем на --threshold,
+помечаются как регрессии, и код возврата равен 1.
+
+Базовая линия benchmarks/baseline.json хранится в репозитории. Она снята на
+эталонных наборах (SQLite, размеры 10k и 1m, seed 42) командой
+    python -m benchmarks.runner --sizes 10k,1m --update-baseline
+Времена зависят от машины: для CI базовую линию стоит пересоздать той же
+командой на самом сборочном агенте и закоммитить.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from asakk.cache import clear_cache
+from asakk.database import get_backend, get_connection
+from benchmarks.cases import CASES, prepare_context
+from benchmarks.datagen import ensure_sqlite_dataset, parse_size
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Разница меньше этого не считается регрессией: шум таймера и планировщика
+MIN_TIME_DELTA = 0.005  # с
+MIN_MEMORY_DELTA = 1.0  # МБ
+
+
+def measure(case, ctx, repeat):
+    """Возвращает (лучшее время, все времена, пик памяти в МБ)"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        try:
+            case.func(ctx)
+        finally:
+            elapsed = time.perf_counter() - start
+            if case.teardown:
+                case.teardown(ctx)
+        timings.append(elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.func(ctx)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        if case.teardown:
+            case.teardown(ctx)
+    return min(timings), timings, peak / (1024 * 1024)
+
+
+def count_answers():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM answers")
+        return cursor.fetchone()[0]
+
+
+def run_suite(size_label, repeat, selected=None):
+    """Прогоняет все случаи на текущем бэкенде"""
+    clear_cache()
+    answers = count_answers()
+    ctx = prepare_context()
+    results = []
+    for case in CASES:
+        if selected and case.name not in selected:
+            continue
+        if case.max_answers is not None and answers > case.max_answers:
+            print(f"  {case.name:<30} пропущен (ответов больше {case.max_answers:,})")
+            continue
+        best, timings, peak_mb = measure(case, ctx, repeat)
+        print(f"  {case.name:<30} {best * 1000:>10.1f} мс  {peak_mb:>8.1f} МБ")
+        results.append({
+            "case": case.name,
+            "size": size_label,
+            "answers": answers,
+            "seconds": best,
+            "runs": timings,
+            "peak_mb": peak_mb,
+        })
+    return results
+
+
+def find_regressions(results, baseline, threshold):
+    """Сравнивает результаты с базовой линией по ключу (случай, размер)"""
+    previous = {(item["case"], item["size"]): item for item in baseline.get("results", [])}
+    regressions = []
+    for item in results:
+        base = previous.get((item["case"], item["size"]))
+        if base is None:
+            continue
+        for metric, min_delta in (("seconds", MIN_TIME_DELTA), ("peak_mb", MIN_MEMORY_DELTA)):
+            current, before = item[metric], base[metric]
+            if current > before * (1 + threshold) and current - before > min_delta:
+                regressions.append({
+                    "case": item["case"],
+                    "size": item["size"],
+                    "metric": metric,
+                    "baseline": before,
+                    "current": current,
+                    "ratio": current / before if before else None,
+                })
+    return regressions
+
+
+def load_json(path):
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def save_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(data, file, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки отчётов и записи ответов АСАКК")
+    parser.add_argument("--sizes", default="10k", help="размеры наборов через запятую: 10k,1m,10m")
+    parser.add_argument("--current", action="store_true",
+                        help="мерить на бэкенде из STORAGE_CONFIG без генерации данных")
+    parser.add_argument("--cases", help="только указанные случаи через запятую")
+    parser.add_argument("--repeat", type=int, default=3, help="прогонов на случай (берётся лучший)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=os.path.join(BENCH_DIR, "data"), help="каталог файлов SQLite с наборами")
+    parser.add_argument("--out", default=os.path.join(BENCH_DIR, "results.json"))
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline.json"))
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="допустимое ухудшение относительно базовой линии (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="записать результаты как новую базовую линию")
+    args = parser.parse_args()
+
+    selected = set(args.cases.split(",")) if args.cases else None
+    results = []
+    if args.current:
+        print(f"Набор current ({get_backend().dialect}):")
+        results += run_suite("current", args.repeat, selected)
+    else:
+        os.makedirs(args.data_dir, exist_ok=True)
+        for size in [s.strip().lower() for s in args.sizes.split(",") if s.strip()]:
+            parse_size(size)  # проверка формата до долгой генерации
+            path = os.path.join(args.data_dir, f"bench_{size}_seed{args.seed}.sqlite3")
+            print(f"Набор {size} ({path}):")
+            ensure_sqlite_dataset(path, size, args.seed,
+                                  lambda rows: print(f"\r  генерация: {rows:,} строк", end="", flush=True))
+            print("\r" + " " * 40 + "\r", end="")
+            results += run_suite(size, args.repeat, selected)
+
+    baseline = load_json(args.baseline)
+    if baseline is None:
+        print(f"Базовая линия {args.baseline} не найдена, сравнение пропущено "
+              f"(создать: python -m benchmarks.runner --sizes {args.sizes} --update-baseline)")
+        baseline = {}
+    regressions = find_regressions(results, baseline, args.threshold)
+    output = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": get_backend().dialect,
+        "repeat": args.repeat,
+        "threshold": args.threshold,
+        "results": results,
+        "regressions": regressions,
+    }
+    save_json(args.out, output)
+    if args.update_baseline:
+        save_json(args.baseline, output)
+        print(f"Базовая линия обновлена: {args.baseline}")
+
+    for item in regressions:
+        unit = "с" if item["metric"] == "seconds" else "МБ"
+        print(f"⚠️  Регрессия {item['case']}@{item['size']} ({item['metric']}): "
+              f"{item['baseline']:.3f} → {item['current']:.3f} {unit}")
+    print(f"Результаты: {args.out}")
+    sys.exit(1 if regressions and not args.update_baseline else 0)
+
+
+if __name__ == "__main__":
+    main()
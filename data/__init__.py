@@ -1,13 +1,12 @@
 from .config import DB_CONFIG
-from asakk.database import get_connection
 
 def check_connection():
+    from asakk.database import get_connection
     try:
-        conn = get_connection()
-        print("Подключение к базе данных успешно!")
-        conn.close()
+        with get_connection():
+            print("Подключение к базе данных успешно!")
     except Exception as e:
         print(f"Ошибка подключения к БД: {e}")
 
 if __name__ == "__main__":
-    check_connection()
\ No newline at end of file
+    check_connection()
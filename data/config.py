@@ -1,7 +1,88 @@
+import os
+
 DB_CONFIG = {
     'dbname': 'asakkdb',
     'user': 'deadfairy',
     'password': 'supersecretpassword',
     'host': 'postgres.deadfairy.space',
     'port': 5432
-}
\ No newline at end of file
+}
+
+# Пул соединений (asakk.storage.postgres.ConnectionPool)
+POOL_CONFIG = {
+    'maxconn': 5,            # максимум одновременно открытых соединений
+    'acquire_timeout': 10.0, # сколько ждать свободное соединение, с
+    'max_idle': 60.0,        # после такого простоя соединение проверяется SELECT 1, с
+    'max_retries': 3,        # повторы подключения при ошибке
+    'backoff': 0.5           # начальная задержка между повторами, с
+}
+
+
+# Хранилище (asakk.storage): 'postgres' — сервер из DB_CONFIG, 'sqlite' — локальный файл
+STORAGE_CONFIG = {
+    'backend': os.environ.get('ASAKK_BACKEND', 'postgres'),
+    'sqlite_path': os.environ.get('ASAKK_SQLITE_PATH', 'asakk.sqlite3'),  # ':memory:' — база в памяти
+    'sqlite_timeout': 30.0   # ожидание блокировки записи, с
+}
+
+
+# Авторизация (asakk.auth)
+AUTH_CONFIG = {
+    'login_cache_ttl': 300.0   # сколько помнить успешный вход, с; 0 — не кэшировать
+}
+
+
+# Кэш отчётов (asakk.cache)
+CACHE_CONFIG = {
+    'maxsize': 128,                 # записей в памяти
+    'ttl': 300.0,                   # время жизни записи, с
+    'disk_dir': None,               # каталог дискового кэша, например '.asakk_cache'; None — отключён
+    'version_check_interval': 5.0,  # как часто перечитывать версию данных из БД, с
+    'catalog_path': '.asakk_catalog.json',  # локальная копия каталога вопросов (asakk.quiz); None — не сохранять
+    'catalog_check_interval': 60.0  # как часто сверять версию каталога вопросов с БД, с
+}
+
+
+# Локальный журнал прохождений (asakk.journal)
+JOURNAL_CONFIG = {
+    'path': '.asakk_journal.sqlite3',  # файл журнала
+    'batch_size': 50,         # прохождений в одной транзакции при выгрузке в БД
+    'flush_interval': 5.0,    # как часто проверять журнал без новых записей, с
+    'max_backoff': 60.0,      # предельная пауза между попытками при недоступной БД, с
+    'max_attempts': 5         # после стольких отказов БД (не связи) запись откладывается как ошибочная
+}
+
+
+# Сервер приёма прохождений (asakk.ingest) и режим клиента в asakk.quiz
+INGEST_CONFIG = {
+    'host': os.environ.get('ASAKK_INGEST_HOST', '127.0.0.1'),
+    'port': int(os.environ.get('ASAKK_INGEST_PORT', '8765')),
+    'client_mode': os.environ.get('ASAKK_INGEST_CLIENT', '0') == '1',  # клиенты пишут через сервер, а не в БД
+    'max_queue': 2000,     # прохождений в очереди сервера; при переполнении клиент получает отказ busy
+    'batch_size': 200,     # прохождений в одной групповой транзакции
+    'max_delay': 0.02,     # сколько ждать попутчиков для неполной группы, с
+    'writers': 2,          # параллельных транзакций (соединений с БД)
+    'timeout': 10.0,       # ожидание ответа сервера клиентом, с
+    'busy_retries': 5      # повторы клиента при отказе busy
+}
+
+
+# Журналирование (asakk.logging_config)
+LOGGING_CONFIG = {
+    'path': os.environ.get('ASAKK_LOG_PATH', 'asakk.log'),
+    'level': os.environ.get('ASAKK_LOG_LEVEL', 'INFO'),  # уровень по умолчанию
+    'levels': {},                 # уровни модулей, например {'asakk.auth': 'DEBUG', 'ui': 'WARNING'}
+    'format': 'text',             # 'text' или 'json' (одна JSON-строка на запись)
+    'max_bytes': 10 * 1024 * 1024,  # ротация по размеру, байт; 0 — без неё
+    'when': 'midnight',           # ротация по времени (TimedRotatingFileHandler); None — только по размеру
+    'backup_count': 14,           # сколько старых файлов хранить
+    'console': False              # дублировать записи в stderr
+}
+
+
+# Метрики горячих путей (asakk.metrics)
+METRICS_CONFIG = {
+    'enabled': os.environ.get('ASAKK_METRICS', '1') == '1',  # False — функции не оборачиваются вовсе
+    'dump_path': os.environ.get('ASAKK_METRICS_PATH'),  # файл в формате Prometheus, например 'asakk.prom'; None — не писать
+    'dump_interval': 15.0         # как часто перезаписывать файл метрик, с
+}
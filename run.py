@@ -1,7 +1,11 @@
 import tkinter as tk
+from asakk.logging_config import setup_logging
+from asakk.metrics import start_metrics_dump
 from ui.login_gui import LoginWindow
 
 def main():
+    setup_logging()
+    start_metrics_dump()
     root = tk.Tk()
     app = LoginWindow(root)
     root.mainloop()
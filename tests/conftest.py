@@ -0,0 +1,91 @@
+"""
+Общие фикстуры тестов: база SQLite в памяти со всеми миграциями.
+
+Запуск из корня репозитория:
+    python -m pytest -q
+"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asakk import cache, database, quiz  # noqa: E402
+from asakk.migrations import migrate  # noqa: E402
+from asakk.storage.sqlite import SqliteBackend  # noqa: E402
+from data.config import CACHE_CONFIG, INGEST_CONFIG  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def local_state(monkeypatch, tmp_path):
+    """Локальные файлы кэшей — во временном каталоге, запись напрямую в БД"""
+    monkeypatch.setitem(CACHE_CONFIG, 'catalog_path', str(tmp_path / "catalog.json"))
+    monkeypatch.setitem(INGEST_CONFIG, 'client_mode', False)
+
+
+@pytest.fixture
+def backend():
+    """Бэкенд процесса — чистая база SQLite в памяти со схемой последней версии"""
+    backend = database.set_backend(SqliteBackend(":memory:"))
+    migrate()
+    cache.clear_cache()
+    cache._version_checked_at = 0.0
+    quiz._catalog = None
+    yield backend
+    database.set_backend(None)
+
+
+@pytest.fixture
+def make_user(backend):
+    """Создаёт пользователя и возвращает его id"""
+    def make(username="user", role="Employee"):
+        with database.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO users (username, ssh_key, key_fingerprint, role) "
+                "VALUES (%s, %s, %s, %s) RETURNING id",
+                (username, f"ssh-ed25519 {username}", f"fp-{username}", role)
+            )
+            user_id = cursor.fetchone()[0]
+            conn.commit()
+        return user_id
+    return make
+
+
+@pytest.fixture
+def make_question(backend):
+    """Создаёт вопрос и возвращает его id"""
+    def make(text, category):
+        with database.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO questions (text, category) VALUES (%s, %s) RETURNING id", (text, category))
+            question_id = cursor.fetchone()[0]
+            conn.commit()
+        return question_id
+    return make
+
+
+class FakeRoot:
+    """Вместо Tk: отложенные вызовы after выполняются в pump()"""
+
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, callback):
+        self.pending.append(callback)
+
+    def pump(self, until, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not until():
+            assert time.monotonic() < deadline, "условие не выполнилось"
+            pending, self.pending = self.pending, []
+            for callback in pending:
+                callback()
+            time.sleep(0.005)
+
+
+@pytest.fixture
+def fake_root():
+    return FakeRoot()
@@ -0,0 +1,99 @@
+import pytest
+
+from asakk import auth
+from asakk.auth import authenticate, count_users, delete_user_from_db, key_fingerprint, provision_users
+from asakk.database import get_connection
+
+KEY = "ssh-ed25519 AAAA alice"
+
+
+@pytest.fixture
+def alice(backend):
+    """Пользователь с ключом KEY; кэш входов пуст до и после теста"""
+    auth.invalidate_login_cache()
+    provision_users([{"username": "alice", "role": "Manager", "ssh_key": KEY}])
+    yield
+    auth.invalidate_login_cache()
+
+
+def stored_fingerprint(username):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT key_fingerprint FROM users WHERE username = %s", (username,))
+        return cursor.fetchone()[0]
+
+
+def rows(*usernames, role="Employee"):
+    return [{"username": name, "role": role, "ssh_key": f"ssh-ed25519 {name}"} for name in usernames]
+
+
+def test_provision_reports_inserted_skipped_and_errors(backend, make_user):
+    make_user("bob")
+
+    report = provision_users(rows("alice", "bob", "carol") + [{"username": "dave", "role": "Boss", "ssh_key": "k"}])
+
+    assert (report["inserted"], report["updated"], report["skipped"]) == (2, 0, 1)
+    assert [(item["username"], item["error"]) for item in report["errors"]] == [
+        ("bob", "уже существует"),
+        ("dave", "неизвестная роль 'Boss'"),
+    ]
+    assert count_users() == 3
+
+
+def test_provision_counts_concurrent_insert_as_skipped(backend, monkeypatch):
+    insert_many = backend.insert_many
+
+    def racing_insert_many(cursor, query, values, **kwargs):
+        # Пользователь появился между проверкой и вставкой
+        cursor.execute(
+            "INSERT INTO users (username, role, ssh_key, key_fingerprint) VALUES (%s, %s, %s, %s)",
+            ("bob", "Employee", "ssh-ed25519 other", key_fingerprint("ssh-ed25519 other"))
+        )
+        monkeypatch.setattr(backend, "insert_many", insert_many)
+        return insert_many(cursor, query, values, **kwargs)
+
+    monkeypatch.setattr(backend, "insert_many", racing_insert_many)
+
+    report = provision_users(rows("alice", "bob"))
+
+    assert (report["inserted"], report["skipped"]) == (1, 1)
+    assert [item["username"] for item in report["errors"]] == ["bob"]
+
+
+def test_provision_updates_existing(backend, make_user):
+    make_user("bob")
+
+    report = provision_users(rows("bob", "alice", role="Manager"), update_existing=True)
+
+    assert (report["inserted"], report["updated"], report["skipped"]) == (1, 1, 0)
+
+
+def test_authenticate_checks_key(alice):
+    user = authenticate("alice", KEY)
+
+    assert user[1:] == ("alice", "Manager")
+    assert authenticate("alice", KEY + "x") is None
+    assert authenticate("mallory", KEY) is None
+    # Кэш входа не пускает с другим ключом
+    assert authenticate("alice", "ssh-ed25519 BBBB") is None
+    assert authenticate("alice", KEY) == user
+
+
+def test_legacy_user_gets_fingerprint_on_first_login(alice):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE users SET key_fingerprint = NULL WHERE username = 'alice'")
+        conn.commit()
+
+    assert authenticate("alice", "ssh-ed25519 wrong") is None
+    assert stored_fingerprint("alice") is None
+    assert authenticate("alice", KEY) is not None
+    assert stored_fingerprint("alice") == key_fingerprint(KEY)
+
+
+def test_deleted_user_is_dropped_from_login_cache(alice, monkeypatch):
+    monkeypatch.setitem(auth.AUTH_CONFIG, 'login_cache_ttl', 3600.0)
+    user_id = authenticate("alice", KEY)[0]
+
+    assert delete_user_from_db(user_id)
+    assert authenticate("alice", KEY) is None
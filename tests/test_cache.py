@@ -0,0 +1,62 @@
+from asakk import cache, database
+from asakk.migrations import migrate
+from asakk.quiz import add_question_to_db, save_submissions
+from asakk.report import (
+    add_recommendation_to_db, delete_recommendation_by_category, generate_recommendations,
+)
+from asakk.storage.sqlite import SqliteBackend
+
+
+@cache.cached
+def count_questions_cached():
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM questions")
+        return cursor.fetchone()[0]
+
+
+def test_cache_is_invalidated_by_data_version(backend, make_question, monkeypatch):
+    monkeypatch.setitem(cache.CACHE_CONFIG, 'version_check_interval', 0.0)
+    assert count_questions_cached() == 0
+    make_question("Вопрос", "Ценности")
+    assert count_questions_cached() == 0  # версия данных не изменилась
+
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        cache.bump_data_version(cursor)
+        conn.commit()
+    assert count_questions_cached() == 1
+
+
+def test_databases_do_not_share_cached_reports(backend, make_question, monkeypatch, tmp_path):
+    monkeypatch.setattr(cache, "_cache", cache.ReportCache(disk_dir=str(tmp_path / "cache")))
+    make_question("Вопрос", "Ценности")
+    assert count_questions_cached() == 1
+
+    # Другая база с той же версией данных
+    database.set_backend(SqliteBackend(":memory:"))
+    migrate()
+    assert count_questions_cached() == 0
+
+    # Дисковый уровень после перезапуска тоже различает базы
+    monkeypatch.setattr(cache, "_cache", cache.ReportCache(disk_dir=str(tmp_path / "cache")))
+    assert count_questions_cached() == 0
+    assert cache.cache_stats()["disk_hits"] == 1
+
+
+def test_adding_question_bumps_data_version(backend):
+    version = cache.current_data_version()
+    assert add_question_to_db("Новый вопрос", "Ценности") is not None
+    assert cache.current_data_version() == version + 1
+
+
+def test_recommendation_changes_invalidate_cache(backend, make_user, make_question, monkeypatch):
+    monkeypatch.setitem(cache.CACHE_CONFIG, 'version_check_interval', 0.0)
+    save_submissions([(make_user(), {make_question("Вопрос", "Ценности"): 0})])
+    assert generate_recommendations() == {"Ценности": []}
+
+    add_recommendation_to_db("Ценности", "Тренинг")
+    assert generate_recommendations() == {"Ценности": ["Тренинг"]}
+
+    delete_recommendation_by_category("Ценности")
+    assert generate_recommendations() == {"Ценности": []}
@@ -0,0 +1,105 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ui import manager_gui
+from ui.executor import TaskExecutor
+
+
+class FakeButton:
+    def __init__(self):
+        self.state = "normal"
+
+    def cget(self, name):
+        return self.state
+
+    def configure(self, state):
+        self.state = state
+
+    def winfo_exists(self):
+        return True
+
+
+class FakeVar:
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+@pytest.fixture
+def manager(monkeypatch, fake_root):
+    root = fake_root
+    app = manager_gui.ManagerApp.__new__(manager_gui.ManagerApp)
+    app.root = root
+    app.executor = TaskExecutor(root)
+    # Этап расчёта — в потоке вместо пула процессов
+    app.executor._cpu_pool = ThreadPoolExecutor(max_workers=1)
+    app.buttons = {"prediction": FakeButton()}
+    app.category_var = FakeVar("Ценности")
+    app.shown = []
+    app.display_prediction = lambda category, prediction, trend: app.shown.append(prediction)
+    yield app
+    app.executor.shutdown()
+
+
+def test_prediction_is_not_restarted_while_any_stage_runs(manager, monkeypatch):
+    fetched, fitted = threading.Event(), threading.Event()
+    calls = {"fetch": 0, "fit": 0}
+
+    def fetch(category):
+        calls["fetch"] += 1
+        fetched.wait(5)
+        return {"Ценности": [1, 2, 3]}, None
+
+    def fit(scores):
+        calls["fit"] += 1
+        fitted.wait(5)
+        return {"Ценности": "рост"}
+
+    monkeypatch.setattr(manager_gui, "_fetch_prediction_data", fetch)
+    monkeypatch.setattr(manager_gui, "predict_from_scores", fit)
+    button = manager.buttons["prediction"]
+
+    manager.show_prediction()
+    manager.show_prediction()
+    assert button.state == "disabled"
+
+    fetched.set()
+    manager.root.pump(lambda: calls["fit"] == 1)
+    manager.show_prediction()
+    assert button.state == "disabled"
+
+    fitted.set()
+    manager.root.pump(lambda: manager.shown)
+    assert calls == {"fetch": 1, "fit": 1}
+    assert manager.shown == [{"Ценности": "рост"}]
+    assert button.state == "normal"
+
+
+def test_same_key_is_skipped_until_task_finishes(fake_root):
+    root = fake_root
+    executor = TaskExecutor(root)
+    release = threading.Event()
+    results = []
+    try:
+        assert executor.submit("task", release.wait, 5, on_success=results.append)
+        assert not executor.submit("task", release.wait, 5, on_success=results.append)
+        release.set()
+        root.pump(lambda: results)
+        assert results == [True]
+        assert not executor.is_running("task")
+    finally:
+        executor.shutdown()
+
+
+def test_progress_is_refused_for_process_pool_tasks(fake_root):
+    executor = TaskExecutor(fake_root)
+    try:
+        with pytest.raises(ValueError):
+            executor.submit("task", sum, [1, 2], cpu=True, on_progress=print)
+        assert not executor.is_running("task")
+    finally:
+        executor.shutdown()
@@ -0,0 +1,14 @@
+import subprocess
+import sys
+
+from benchmarks.import_budget import PROJECT_ROOT
+
+
+def test_ui_modules_fit_import_budget():
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.import_budget"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,229 @@
+import asyncio
+import datetime
+import threading
+
+import pytest
+
+from asakk import quiz
+from asakk.database import get_connection
+from asakk.ingest import IngestServer
+from asakk.journal import SubmissionJournal
+from asakk.storage import PoolError
+from data.config import INGEST_CONFIG
+
+COMPLETED_AT = datetime.datetime(2024, 5, 1, 12, 0)
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Запускает IngestServer в отдельном потоке; клиентские функции quiz направляются к нему"""
+    running = []
+
+    def serve(**kwargs):
+        server = IngestServer(port=0, writers=1, **kwargs)
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(server.start())
+            ready.set()
+            loop.run_forever()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        assert ready.wait(5)
+        running.append((server, loop, thread))
+        monkeypatch.setitem(INGEST_CONFIG, 'host', server.host)
+        monkeypatch.setitem(INGEST_CONFIG, 'port', server.port)
+        return server
+
+    yield serve
+    for server, loop, thread in running:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
+
+
+def submit_request(*submissions):
+    return {"op": "submit", "submissions": [
+        {"key": key, "user_id": user_id, "answers": answers, "completed_at": COMPLETED_AT.isoformat(" ")}
+        for key, user_id, answers in submissions
+    ]}
+
+
+def stored_keys():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT key FROM submissions ORDER BY key")
+        return [row[0] for row in cursor.fetchall()]
+
+
+@pytest.fixture
+def survey(make_user, make_question):
+    return make_user("alice"), make_question("Вопрос", "Ценности")
+
+
+def test_partial_failure_reports_outcome_per_key(serve, survey):
+    user_id, question_id = survey
+    server = serve()
+
+    response = quiz.ingest_request(submit_request(
+        ("a", user_id, {question_id: 4}),
+        ("b", user_id + 100, {question_id: 1}),  # такого пользователя нет
+        ("c", user_id, {question_id: 2}),
+    ))
+
+    assert response["ok"]
+    assert response["stored"] == 2
+    assert response["results"] == {"a": "stored", "b": "rejected", "c": "stored"}
+    assert set(response["errors"]) == {"b"}
+    assert stored_keys() == ["a", "c"]
+    stats = server.stats()
+    assert (stats["stored"], stats["rejected"], stats["unavailable"]) == (2, 1, 0)
+
+
+def test_resend_is_idempotent(serve, survey):
+    user_id, question_id = survey
+    serve()
+    request = submit_request(("a", user_id, {question_id: 3}))
+
+    first, second = quiz.ingest_request(request), quiz.ingest_request(request)
+
+    assert first["results"] == second["results"] == {"a": "stored"}
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM answers")
+        assert cursor.fetchone()[0] == 1
+
+
+def test_busy_when_request_does_not_fit_queue(serve, survey):
+    user_id, question_id = survey
+    server = serve(max_queue=2)
+
+    response = quiz.ingest_request(submit_request(*[(str(n), user_id, {question_id: 1}) for n in range(3)]))
+
+    assert not response["ok"]
+    assert response["error"] == "busy"
+    assert response["retry_after"] > 0
+    assert server.stats()["busy"] == 1
+    assert stored_keys() == []
+
+
+def test_transient_database_errors_are_unavailable(serve, survey):
+    def sink(submissions):
+        raise PoolError("Нет свободных соединений")
+
+    user_id, question_id = survey
+    serve(sink=sink)
+
+    response = quiz.ingest_request(submit_request(("a", user_id, {question_id: 1}), ("b", user_id, {question_id: 2})))
+
+    assert response["ok"]
+    assert response["results"] == {"a": "unavailable", "b": "unavailable"}
+    assert response["stored"] == 0
+
+
+def test_send_submissions_raises_only_for_rejected_keys(serve, survey, monkeypatch):
+    user_id, question_id = survey
+    serve()
+    monkeypatch.setitem(INGEST_CONFIG, 'client_mode', True)
+
+    with pytest.raises(quiz.SubmissionRejected) as error:
+        quiz.send_submissions([
+            ("a", user_id, {question_id: 4}, COMPLETED_AT),
+            ("b", user_id + 100, {question_id: 4}, COMPLETED_AT),
+        ])
+
+    assert set(error.value.errors) == {"b"}
+    assert stored_keys() == ["a"]
+
+
+def test_send_submissions_treats_busy_as_transient(serve, survey, monkeypatch):
+    user_id, question_id = survey
+    serve(max_queue=1)
+    monkeypatch.setitem(INGEST_CONFIG, 'busy_retries', 1)
+
+    with pytest.raises(ConnectionError):
+        quiz.send_submissions([(str(n), user_id, {question_id: 1}, COMPLETED_AT) for n in range(2)])
+
+
+def test_send_submissions_rejects_malformed_request(serve, survey):
+    user_id, _ = survey
+    serve()
+
+    with pytest.raises(quiz.SubmissionRejected) as error:
+        quiz.send_submissions([("a", user_id, {"не число": 1}, COMPLETED_AT)])
+
+    assert error.value.errors is None
+    assert quiz.submission_rejected(error.value)
+    assert stored_keys() == []
+
+
+def test_journal_parks_entries_the_server_cannot_parse(serve, survey, monkeypatch, tmp_path):
+    user_id, question_id = survey
+    serve()
+    monkeypatch.setitem(INGEST_CONFIG, 'client_mode', True)
+    broken = set()
+
+    def sink(submissions):
+        # Запись, которую сервер не может разобрать (например, клиент другой версии)
+        return quiz.send_submissions([
+            (key, user_id, {"не число": 1} if key in broken else answers, completed_at)
+            for key, user_id, answers, completed_at in submissions
+        ])
+
+    journal = SubmissionJournal(str(tmp_path / "journal.sqlite3"), sink=sink)
+    try:
+        broken.add(journal.append(user_id, {question_id: 3}))
+        good = journal.append(user_id, {question_id: 3})
+
+        assert journal.flush(batch_size=10, max_attempts=1) == 1
+        assert journal.stats() == {"pending": 0, "failed": 1}
+        assert stored_keys() == [good]
+    finally:
+        journal.close()
+
+
+def test_journal_keeps_entries_while_database_behind_server_is_down(serve, survey, monkeypatch, tmp_path):
+    def sink(submissions):
+        raise PoolError("Нет свободных соединений")
+
+    user_id, question_id = survey
+    serve(sink=sink)
+    monkeypatch.setitem(INGEST_CONFIG, 'client_mode', True)
+    journal = SubmissionJournal(str(tmp_path / "journal.sqlite3"))
+    try:
+        journal.append(user_id, {question_id: 3})
+        for _ in range(6):
+            with pytest.raises(ConnectionError):
+                journal.flush(batch_size=10, max_attempts=5)
+        assert journal.stats() == {"pending": 1, "failed": 0}
+    finally:
+        journal.close()
+
+
+def test_journal_parks_only_rejected_keys_in_client_mode(serve, survey, monkeypatch, tmp_path):
+    user_id, question_id = survey
+    serve()
+    monkeypatch.setitem(INGEST_CONFIG, 'client_mode', True)
+    journal = SubmissionJournal(str(tmp_path / "journal.sqlite3"))
+    try:
+        good = journal.append(user_id, {question_id: 3})
+        journal.append(user_id + 100, {question_id: 3})
+
+        assert journal.flush(batch_size=10, max_attempts=1) == 1
+        assert journal.stats() == {"pending": 0, "failed": 1}
+        assert stored_keys() == [good]
+    finally:
+        journal.close()
+
+
+def test_keyed_batch_is_deduplicated(survey):
+    user_id, question_id = survey
+    submission = ("a", user_id, {question_id: 2}, COMPLETED_AT)
+
+    assert quiz.save_keyed_submissions([submission, submission]) == 1
+    assert quiz.save_keyed_submissions([submission, ("b", user_id, {question_id: 1}, COMPLETED_AT)]) == 1
+    assert stored_keys() == ["a", "b"]
@@ -0,0 +1,151 @@
+import datetime
+import sqlite3
+import time
+
+import pytest
+
+from asakk import quiz
+from asakk.journal import JournalFlusher, SubmissionJournal
+from asakk.storage import PoolError
+
+
+class FlakySink:
+    """Получатель, отвечающий ошибкой error на первые fail_times вызовов"""
+
+    def __init__(self, error=None, fail_times=float("inf"), reject_users=()):
+        self.error = error
+        self.fail_times = fail_times
+        self.reject_users = set(reject_users)
+        self.calls = 0
+        self.stored = []
+
+    def __call__(self, batch):
+        self.calls += 1
+        if self.error is not None and self.calls <= self.fail_times:
+            raise self.error
+        if any(user_id in self.reject_users for _, user_id, _, _ in batch):
+            raise sqlite3.IntegrityError("FOREIGN KEY constraint failed")
+        self.stored.extend(batch)
+
+
+@pytest.fixture
+def journal_factory(tmp_path, backend):
+    journals = []
+
+    def make(sink):
+        journal = SubmissionJournal(str(tmp_path / f"journal{len(journals)}.sqlite3"), sink=sink)
+        journals.append(journal)
+        return journal
+
+    yield make
+    for journal in journals:
+        journal.close()
+
+
+@pytest.mark.parametrize("error", [
+    PoolError("Нет свободных соединений"),
+    sqlite3.OperationalError("database is locked"),
+    ConnectionError("Сервер приёма: unavailable"),
+    TimeoutError("timed out"),
+])
+def test_transient_errors_keep_entries_pending(journal_factory, error):
+    sink = FlakySink(error)
+    journal = journal_factory(sink)
+    journal.append(1, {1: 4})
+
+    for _ in range(10):
+        with pytest.raises(type(error)):
+            journal.flush(batch_size=10, max_attempts=2)
+
+    assert journal.stats() == {"pending": 1, "failed": 0}
+    # Пакет не разбирается поштучно — одна попытка на выгрузку
+    assert sink.calls == 10
+
+
+def test_entries_are_stored_once_outage_ends(journal_factory):
+    sink = FlakySink(PoolError("Пул соединений закрыт"), fail_times=3)
+    journal = journal_factory(sink)
+    keys = [journal.append(user_id, {1: 4}) for user_id in (1, 2, 3)]
+
+    for _ in range(3):
+        with pytest.raises(PoolError):
+            journal.flush(batch_size=10, max_attempts=1)
+    assert journal.flush(batch_size=10, max_attempts=1) == 3
+
+    assert [entry[0] for entry in sink.stored] == keys
+    assert journal.stats() == {"pending": 0, "failed": 0}
+
+
+def test_data_errors_are_parked_after_max_attempts(journal_factory):
+    sink = FlakySink(reject_users={2})
+    journal = journal_factory(sink)
+    for user_id in (1, 2, 3):
+        journal.append(user_id, {1: 3})
+
+    assert journal.flush(batch_size=10, max_attempts=2) == 2
+    assert journal.stats() == {"pending": 1, "failed": 0}
+    assert journal.flush(batch_size=10, max_attempts=2) == 0
+    assert journal.stats() == {"pending": 0, "failed": 1}
+    assert sorted(user_id for _, user_id, _, _ in sink.stored) == [1, 3]
+
+
+def test_transient_error_during_entry_retry_is_raised(journal_factory):
+    class Sink(FlakySink):
+        def __call__(self, batch):
+            self.calls += 1
+            if len(batch) > 1:
+                raise sqlite3.IntegrityError("CHECK constraint failed")
+            raise sqlite3.OperationalError("database is locked")
+
+    journal = journal_factory(Sink())
+    journal.append(1, {1: 1})
+    journal.append(2, {1: 1})
+
+    with pytest.raises(sqlite3.OperationalError):
+        journal.flush(batch_size=10, max_attempts=1)
+    assert journal.stats() == {"pending": 2, "failed": 0}
+
+
+def test_default_sink_rejects_only_bad_submission(tmp_path, make_user, make_question):
+    user_id = make_user("alice")
+    question_id = make_question("Вопрос", "Ценности")
+    journal = SubmissionJournal(str(tmp_path / "journal.sqlite3"))
+    try:
+        journal.append(user_id, {question_id: 4})
+        journal.append(user_id + 100, {question_id: 1})  # такого пользователя нет
+
+        assert journal.flush(batch_size=10, max_attempts=1) == 1
+        assert journal.stats() == {"pending": 0, "failed": 1}
+    finally:
+        journal.close()
+
+
+def test_submission_rejected_classification(backend, monkeypatch):
+    assert quiz.submission_rejected(quiz.SubmissionRejected("bad"))
+    assert quiz.submission_rejected(sqlite3.IntegrityError("UNIQUE constraint failed"))
+    assert quiz.submission_rejected(sqlite3.DataError("bad value"))
+    assert not quiz.submission_rejected(sqlite3.OperationalError("database is locked"))
+    assert not quiz.submission_rejected(PoolError("timeout"))
+    assert not quiz.submission_rejected(ConnectionError("unavailable"))
+
+    # В режиме клиента о данных судит только сервер приёма
+    monkeypatch.setitem(quiz.INGEST_CONFIG, 'client_mode', True)
+    assert quiz.submission_rejected(quiz.SubmissionRejected("bad"))
+    assert not quiz.submission_rejected(sqlite3.IntegrityError("UNIQUE constraint failed"))
+
+
+def test_flusher_backs_off_while_sink_is_unavailable(journal_factory):
+    sink = FlakySink(PoolError("Пул соединений закрыт"))
+    journal = journal_factory(sink)
+    journal.append(1, {1: 2}, completed_at=datetime.datetime(2024, 1, 1))
+
+    flusher = JournalFlusher(journal, flush_interval=0.01, max_backoff=60.0, max_attempts=1)
+    flusher.start()
+    flusher.notify()
+    time.sleep(0.3)
+    calls = sink.calls
+    flusher.stop(timeout=1.0)
+
+    # Без паузы за 0.3 с было бы около 30 попыток
+    assert 1 <= calls <= 2
+    assert journal.stats() == {"pending": 1, "failed": 0}
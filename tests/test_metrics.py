@@ -0,0 +1,56 @@
+import pytest
+
+from asakk import metrics
+from asakk.database import get_connection
+from asakk.report import get_categ_to_adm
+
+
+@metrics.instrumented(site="test.inner")
+def inner(make_question):
+    make_question("Вопрос", "Ценности")
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, text FROM questions")
+        return cursor.fetchall()
+
+
+@metrics.instrumented(site="test.outer")
+def outer(make_question, fail=False):
+    metrics.record_cache(False)
+    rows = inner(make_question)
+    metrics.record_cache(True)
+    if fail:
+        raise RuntimeError("сбой")
+    return rows
+
+
+def test_site_records_rows_connections_and_cache(make_question):
+    metrics.reset()
+    outer(make_question)
+    with pytest.raises(RuntimeError):
+        outer(make_question, fail=True)
+
+    snapshot = metrics.snapshot()
+    inner_site, outer_site = snapshot["test.inner"], snapshot["test.outer"]
+    assert (inner_site["calls"], inner_site["errors"]) == (2, 0)
+    # По вызову: строка RETURNING вставки и вся выборка (1 и 2 вопроса);
+    # вложенный вызов учитывается и во внешней точке
+    assert inner_site["rows"] == outer_site["rows"] == (1 + 1) + (1 + 2)
+    assert (outer_site["calls"], outer_site["errors"]) == (2, 1)
+    assert (outer_site["cache_hits"], outer_site["cache_misses"]) == (2, 2)
+    assert outer_site["acquire"]["count"] == 2
+    assert outer_site["wall"]["max"] >= outer_site["db"]["max"] > 0
+
+
+def test_prometheus_text_lists_sites(make_question):
+    metrics.reset()
+    outer(make_question)
+    text = metrics.prometheus_text()
+
+    assert 'asakk_calls_total{site="test.outer"} 1' in text
+    assert 'asakk_call_duration_seconds_bucket{site="test.outer",le="+Inf"} 1' in text
+
+
+def test_static_helpers_are_not_sites():
+    get_categ_to_adm()
+    assert "report.get_categ_to_adm" not in metrics.snapshot()
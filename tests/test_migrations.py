@@ -0,0 +1,34 @@
+from asakk import database
+from asakk.database import get_connection
+from asakk.migrations import MIGRATIONS, migrate, status
+from asakk.storage.sqlite import SqliteBackend
+
+ALL_VERSIONS = [version for version, _, _ in MIGRATIONS]
+
+
+def test_migrations_apply_in_steps_and_only_once(backend):
+    database.set_backend(SqliteBackend(":memory:"))
+    assert migrate(target=3) == [1, 2, 3]
+    assert [applied for _, _, applied in status()] == [version <= 3 for version in ALL_VERSIONS]
+
+    assert migrate() == [version for version in ALL_VERSIONS if version > 3]
+    assert migrate() == []
+    assert all(applied for _, _, applied in status())
+
+
+def test_migrations_reapply_over_existing_schema(backend, make_user, make_question):
+    user_id = make_user()
+    question_id = make_question("Вопрос", "Ценности")
+    # База, созданная без учёта версий: таблицы есть, записей о миграциях нет
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM schema_migrations")
+        conn.commit()
+
+    assert migrate() == ALL_VERSIONS
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM users")
+        assert cursor.fetchall() == [(user_id,)]
+        cursor.execute("SELECT id FROM questions")
+        assert cursor.fetchall() == [(question_id,)]
@@ -0,0 +1,26 @@
+from asakk.database import get_connection
+from asakk.question_bank import load_bank
+from asakk.quiz import save_submissions
+
+
+def table_rows(query):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query)
+        return cursor.fetchall()
+
+
+def test_prune_removes_questions_answers_and_events(backend, make_user):
+    bank = {"Ценности": [f"Вопрос {n}" for n in range(5)], "Лидерство": ["Оставить"]}
+    load_bank(bank, events={"Ценности": ["Тренинг", "Семинар"], "Лидерство": ["Курс"]})
+    question_ids = [row[0] for row in table_rows("SELECT id FROM questions")]
+    save_submissions([(make_user(), {q_id: 1 for q_id in question_ids})])
+
+    report = load_bank({"Лидерство": ["Оставить"]}, events={"Лидерство": ["Курс"]}, prune=True)
+
+    assert report["questions"] == {"inserted": 0, "unchanged": 1, "removed": 5}
+    assert report["events"] == {"inserted": 0, "unchanged": 1, "removed": 2}
+    assert table_rows("SELECT category, text FROM questions") == [("Лидерство", "Оставить")]
+    assert table_rows("SELECT category, event FROM recommendations") == [("Лидерство", "Курс")]
+    assert table_rows("SELECT COUNT(*) FROM answers") == [(1,)]
+    assert table_rows("SELECT SUM(answers_count) FROM score_rollups") == [(1,)]
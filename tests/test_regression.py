@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from asakk.regression import fit_line, fit_lines
+
+
+def reference_fit(values):
+    slope, intercept = np.polyfit(np.arange(len(values)), values, 1)
+    return slope, intercept
+
+
+def test_fit_lines_match_reference_fit():
+    rnd = np.random.default_rng(11)
+    series = {
+        f"ряд{n}": list(rnd.integers(0, 5, size=length))
+        for n, length in enumerate([2, 3, 7, 50, 1000])
+    }
+    series["растущий"] = [0, 1, 2, 3, 4]
+    series["постоянный"] = [3, 3, 3]
+
+    fits = fit_lines(series)
+
+    assert set(fits) == set(series)
+    for key, values in series.items():
+        assert fits[key] == pytest.approx(reference_fit(values), abs=1e-9)
+    assert fits["растущий"] == pytest.approx((1.0, 0.0))
+    assert fits["постоянный"] == pytest.approx((0.0, 3.0))
+
+
+def test_short_series_are_skipped():
+    assert fit_lines({"пустой": [], "одна точка": [4], "две": [1, 3]}) == {"две": pytest.approx((2.0, 1.0))}
+    assert fit_lines({}) == {}
+    assert fit_line([2]) is None
+    assert fit_line([1, 2, 4]) == pytest.approx(reference_fit([1, 2, 4]))
@@ -0,0 +1,53 @@
+import datetime
+import random
+
+import numpy as np
+import pytest
+
+from asakk import report
+from asakk.quiz import save_keyed_submissions
+
+CATEGORIES = ("Ценности", "Лидерство", "Инновации")
+
+
+@pytest.fixture
+def answered(make_user, make_question):
+    """Три категории по два вопроса; 20 прохождений с разным временем"""
+    rnd = random.Random(7)
+    users = [make_user(f"user{n}") for n in range(4)]
+    questions = {
+        category: [make_question(f"{category}: вопрос номер {n} с длинным текстом", category) for n in range(2)]
+        for category in CATEGORIES
+    }
+    start = datetime.datetime(2024, 1, 1, 9, 0)
+    save_keyed_submissions([
+        (
+            f"key{n}",
+            users[n % len(users)],
+            {q_id: rnd.randint(0, 4) for ids in questions.values() for q_id in ids},
+            start + datetime.timedelta(hours=n),
+        )
+        for n in range(20)
+    ])
+    return questions
+
+
+def test_category_reports_match_per_category_queries(answered):
+    reports = report.get_category_reports()
+
+    assert set(reports) == set(CATEGORIES)
+    for category in CATEGORIES:
+        category_data, trend_data = reports[category]
+        expected = report.analyze_category_data.uncached(category)
+        assert sorted(zip(category_data["questions"], category_data["scores"])) == \
+            sorted(zip(expected["questions"], expected["scores"]))
+
+        expected_trend = report.calculate_category_trend.uncached(category)
+        assert trend_data["scores"] == expected_trend["scores"]
+        assert np.allclose(trend_data["trend"], expected_trend["trend"])
+        assert np.allclose(trend_data["slope"], expected_trend["slope"])
+        assert np.allclose(trend_data["intercept"], expected_trend["intercept"])
+
+
+def test_category_reports_of_empty_database(backend):
+    assert report.get_category_reports() == {}
@@ -0,0 +1,60 @@
+import datetime
+import random
+
+from asakk.auth import delete_user_from_db
+from asakk.database import get_connection
+from asakk.quiz import save_keyed_submissions, save_submissions
+from asakk.report import delete_question_by_id
+from asakk.rollups import rebuild_rollups
+
+
+def rollup_rows():
+    # Строки с нулевым счётчиком остаются после вычитания и не влияют на отчёты
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT question_id, category, score, answers_count, score_sum
+            FROM score_rollups
+            WHERE answers_count > 0
+            ORDER BY question_id, score
+        ''')
+        return cursor.fetchall()
+
+
+def answer_rows():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT q.id, q.category, a.score, COUNT(*), SUM(a.score)
+            FROM answers a
+            JOIN questions q ON a.question_id = q.id
+            GROUP BY q.id, q.category, a.score
+            ORDER BY q.id, a.score
+        ''')
+        return cursor.fetchall()
+
+
+def test_rollups_follow_saves_and_deletes(make_user, make_question):
+    rnd = random.Random(3)
+    users = [make_user(f"user{n}") for n in range(3)]
+    questions = [make_question(f"Вопрос {n}", ("Ценности", "Лидерство")[n % 2]) for n in range(4)]
+
+    save_submissions([
+        (users[n % len(users)], {q_id: rnd.randint(0, 4) for q_id in questions})
+        for n in range(6)
+    ])
+    keyed = [("key", users[0], {questions[0]: 4, questions[1]: 0}, datetime.datetime(2024, 1, 1))]
+    assert save_keyed_submissions(keyed) == 1
+    assert save_keyed_submissions(keyed) == 0  # повтор ключа не меняет сводку
+    assert rollup_rows() == answer_rows() != []
+
+    assert delete_user_from_db(users[1])
+    assert rollup_rows() == answer_rows()
+
+    delete_question_by_id(questions[2])
+    assert rollup_rows() == answer_rows()
+    assert all(row[0] != questions[2] for row in rollup_rows())
+
+    expected = rollup_rows()
+    assert rebuild_rollups() == len(expected)
+    assert rollup_rows() == expected
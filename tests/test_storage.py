@@ -0,0 +1,129 @@
+import sqlite3
+import threading
+
+import pytest
+
+from asakk.database import get_connection, like_pattern
+from asakk.storage import PoolError, create_backend
+from asakk.storage.sqlite import MAX_VARIABLES, SqliteBackend, translate_query
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("SELECT * FROM users WHERE id = %s", "SELECT * FROM users WHERE id = ?"),
+    ("INSERT INTO t VALUES (%s, %s, %s)", "INSERT INTO t VALUES (?, ?, ?)"),
+    ("SELECT * FROM t WHERE a = %(a)s AND b = %(b_2)s", "SELECT * FROM t WHERE a = :a AND b = :b_2"),
+    ("SELECT '100%%' WHERE x LIKE %s", "SELECT '100%' WHERE x LIKE ?"),
+    ("SELECT 1", "SELECT 1"),
+])
+def test_translate_query(query, expected):
+    assert translate_query(query) == expected
+
+
+def test_cursor_accepts_psycopg2_placeholders(backend):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("CREATE TABLE t (a INTEGER, b TEXT)")
+        cursor.execute("INSERT INTO t VALUES (%s, %s)", (1, "один"))
+        cursor.execute("INSERT INTO t VALUES (%(a)s, %(b)s)", {"a": 2, "b": "100%"})
+        cursor.execute("SELECT a FROM t WHERE b LIKE '100%%' OR a = %s ORDER BY a", (1,))
+        assert cursor.fetchall() == [(1,), (2,)]
+
+
+def test_uncommitted_changes_are_rolled_back(backend):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("CREATE TABLE t (a INTEGER)")
+        conn.commit()
+        cursor.execute("INSERT INTO t VALUES (%s)", (1,))
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM t")
+        assert cursor.fetchone()[0] == 0
+
+
+def test_threads_get_their_own_connections(backend):
+    connections = []
+
+    def grab():
+        with get_connection() as conn:
+            connections.append(conn)
+
+    threads = [threading.Thread(target=grab) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with get_connection() as outer, get_connection() as nested:
+        assert outer is nested
+    assert len({id(conn) for conn in connections + [outer]}) == 4
+
+
+def test_insert_many_returns_rows_across_pages(backend):
+    width = 4
+    rows = [(n, n, n, n) for n in range(MAX_VARIABLES // width + 10)]
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("CREATE TABLE t (a INTEGER PRIMARY KEY, b INTEGER, c INTEGER, d INTEGER)")
+        cursor.execute("INSERT INTO t VALUES (0, 0, 0, 0)")
+        returned = backend.insert_many(
+            cursor, "INSERT INTO t VALUES %s ON CONFLICT (a) DO NOTHING RETURNING a", rows, fetch=True
+        )
+        assert sorted(row[0] for row in returned) == list(range(1, len(rows)))
+        assert backend.insert_many(cursor, "INSERT INTO t VALUES %s", [], fetch=True) == []
+        backend.insert_many(cursor, "INSERT INTO t VALUES %s", [(-1, 0, 0, 0), (-2, 0, 0, 0)])
+        cursor.execute("SELECT COUNT(*) FROM t")
+        assert cursor.fetchone()[0] == len(rows) + 2
+
+
+def test_case_insensitive_search_handles_cyrillic(backend, make_user):
+    make_user("Иванов_И")
+    make_user("Петров")
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT username FROM users WHERE LOWER(username) LIKE %s ESCAPE '\\'",
+                       (like_pattern("ИВАНОВ_"),))
+        assert cursor.fetchall() == [("Иванов_И",)]
+
+
+def test_data_errors_are_classified(backend):
+    assert backend.is_data_error(sqlite3.IntegrityError())
+    assert backend.is_data_error(sqlite3.DataError())
+    assert not backend.is_data_error(sqlite3.OperationalError("database is locked"))
+    assert not backend.is_data_error(PoolError())
+
+
+def test_closed_backend_refuses_connections():
+    backend = SqliteBackend(":memory:")
+    backend.close()
+    with pytest.raises(PoolError):
+        with backend.connection():
+            pass
+
+
+def test_create_backend(tmp_path):
+    backend = create_backend({"backend": "sqlite", "sqlite_path": str(tmp_path / "a.sqlite3")})
+    try:
+        assert backend.dialect == "sqlite"
+        assert backend.source == str(tmp_path / "a.sqlite3")
+    finally:
+        backend.close()
+    with pytest.raises(ValueError):
+        create_backend({"backend": "oracle"})
+
+
+def test_memory_databases_are_separate():
+    first, second = SqliteBackend(":memory:"), SqliteBackend(":memory:")
+    try:
+        assert first.source != second.source
+        with first.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("CREATE TABLE only_here (a INTEGER)")
+            conn.commit()
+        with second.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE name = 'only_here'")
+            assert cursor.fetchall() == []
+    finally:
+        first.close()
+        second.close()
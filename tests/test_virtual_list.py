@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+
+from ui.executor import TaskExecutor
+from ui.virtual_list import VirtualList
+
+
+@pytest.fixture
+def virtual_list(fake_root):
+    """Список без виджетов Tk: загрузка и счётчик работают через TaskExecutor"""
+    executor = TaskExecutor(fake_root)
+    view = VirtualList.__new__(VirtualList)
+    view.fetch_page = lambda after, limit: list(range(limit))
+    view.row_key = lambda row: row
+    view.count = None
+    view.executor = executor
+    view.page_size = 10
+    view.height = 5
+    view.rows, view.keys = [], []
+    view.has_more, view.total, view.offset = True, None, 0
+    view._generation = 0
+    view._task_key = "virtual_list:test"
+    view._render = lambda: None
+    yield view
+    executor.shutdown()
+
+
+def test_count_is_requested_again_after_filter_change(virtual_list, fake_root):
+    release = threading.Event()
+
+    def old_count():
+        release.wait(5)
+        return 100
+
+    virtual_list.reload(count=old_count)
+    # Старый подсчёт ещё идёт: новый запуск с тем же ключом исполнитель пропускает
+    virtual_list.reload(count=lambda: 7)
+    release.set()
+
+    fake_root.pump(lambda: virtual_list.total == 7)
+    assert not virtual_list.executor.is_running("virtual_list:test:count")
@@ -1,19 +1,18 @@
+import csv
 import logging
 import tkinter as tk
-from tkinter import messagebox
-from asakk.auth import get_all_users, add_user_to_db, delete_user_from_db
+from tkinter import messagebox, filedialog
+from asakk.auth import get_users_page, count_users, add_user_to_db, delete_user_from_db, import_users_csv
 from asakk.quiz import add_question_with_recommendation
 from asakk.report import add_recommendation_to_db 
 from ui.question_editor import QuestionEditorApp
+from ui.executor import TaskExecutor
+from ui.virtual_list import VirtualList
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
-file_handler = logging.FileHandler("asakk.log", encoding="utf-8")
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-logger.propagate = False
+# Сколько ошибок импорта показывать в окне сообщения
+IMPORT_ERRORS_SHOWN = 15
 
 
 class AdminApp:
@@ -24,8 +23,11 @@ class AdminApp:
         self.root.geometry("800x600")
         self.root.configure(bg="#f8f9fa")
 
+        self.executor = TaskExecutor(root)
+
         self.center_window()
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
     def center_window(self):
         screen_width = self.root.winfo_screenwidth()
@@ -81,9 +83,36 @@ class AdminApp:
             fg="white"
         ).grid(row=4, columnspan=2, pady=5)
 
+        self.import_button = tk.Button(
+            user_frame,
+            text="Импорт пользователей из CSV",
+            command=self.import_users,
+            width=25,
+            bg="#17a2b8",
+            fg="white"
+        )
+        self.import_button.grid(row=5, columnspan=2, pady=5)
+
+        # Поиск по имени: фильтр выполняется в БД, список грузится страницами
+        tk.Label(user_frame, text="Поиск", bg="#ffffff").grid(row=6, column=0)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.schedule_search())
+        tk.Entry(user_frame, textvariable=self.search_var, width=30).grid(row=6, column=1)
+        self._search_job = None
+
         # Список пользователей
-        self.user_listbox = tk.Listbox(user_frame, height=10, width=70)
-        self.user_listbox.grid(row=5, columnspan=2, pady=10)
+        self.user_list = VirtualList(
+            user_frame,
+            fetch_page=get_users_page,
+            row_key=lambda user: user[1],
+            format_row=lambda user: f"ID: {user[0]} | Имя: {user[1]} | Роль: {user[2]}",
+            count=count_users,
+            executor=self.executor,
+            height=10,
+            width=70,
+            empty_text="Пользователи не найдены"
+        )
+        self.user_list.grid(row=7, columnspan=2, pady=10)
         self.load_users()
 
         # --- Кнопка открытия редактора вопросов ---
@@ -101,7 +130,7 @@ class AdminApp:
         exit_button = tk.Button(
             self.root,
             text="Выйти",
-            command=self.root.destroy,
+            command=self.close,
             width=25,
             bg="#6c757d",
             fg="white"
@@ -109,11 +138,23 @@ class AdminApp:
         exit_button.pack(pady=10)
 
     def load_users(self):
-        from asakk.auth import get_all_users
-        self.user_listbox.delete(0, tk.END)
-        users = get_all_users()
-        for user in users:
-            self.user_listbox.insert(tk.END, f"ID: {user[0]} | Имя: {user[1]} | Роль: {user[2]}")
+        # Строка поиска фиксируется здесь: страницы читаются в фоновом потоке
+        self.search = self.search_var.get().strip()
+        search = self.search
+        self.user_list.reload(
+            fetch_page=lambda after, limit: get_users_page(after, limit, search=search),
+            count=lambda: count_users(search)
+        )
+
+    def schedule_search(self):
+        # Запрос уходит после паузы в наборе, а не на каждую букву
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(300, self.apply_search)
+
+    def apply_search(self):
+        self._search_job = None
+        self.load_users()
 
     def add_user(self):
         username = self.entry_username.get().strip()
@@ -125,49 +166,97 @@ class AdminApp:
             return
 
         try:
-            add_user_to_db(username, ssh_key, role)
+            user_id = add_user_to_db(username, ssh_key, role)
+            if user_id is None:
+                raise Exception("Пользователь не сохранён, подробности в журнале")
             messagebox.showinfo("Готово", "Пользователь успешно добавлен!")
             self.entry_username.delete(0, tk.END)
             self.entry_ssh_key.delete(0, tk.END)
-            self.load_users()
+            if self.search.lower() in username.lower():
+                self.user_list.insert_row((user_id, username, role))
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось добавить пользователя:\n{e}")
 
     def delete_selected(self):
-        selected = self.user_listbox.curselection()
-        if not selected:
+        user = self.user_list.selected_row()
+        if user is None:
             messagebox.showwarning("Ошибка", "Выберите пользователя")
             return
 
-        item = self.user_listbox.get(selected[0])
-    
-        print(f"[DEBUG] Выбран элемент: '{item}'")  # ← Отладка
-        print(f"[DEBUG] Разделение по | : {item.split('|')}")
-
+        user_id = user[0]
         try:
-        # Парсим ID правильно
-            id_str = item.split('|')[0]  # Получаем "ID: 5"
-            user_id = int(id_str.split(':')[1].strip())  # Теперь безопасное извлечение
-            print(f"[DEBUG] Удаляемый ID: {user_id}")
-
-            from asakk.auth import delete_user_from_db
             success = delete_user_from_db(user_id)
 
             if success:
                 messagebox.showinfo("Готово", "Пользователь удален!")
-                self.load_users()
+                self.user_list.remove_row(user_id)
             else:
                 raise Exception("Не удалось удалить пользователя (нет результата)")
-        except IndexError:
-            logger.error("Ошибка разбора строки пользователя")
-            messagebox.showerror("Ошибка", "Не удалось определить ID пользователя")
-        except ValueError:
-            logger.error("Ошибка преобразования ID")
-            messagebox.showerror("Ошибка", "Неверный формат ID")
         except Exception as e:
             logger.error(f"Ошибка при удалении пользователя: {e}", exc_info=True)
             messagebox.showerror("Ошибка", f"Не удалось удалить пользователя:\n{e}")
 
+    def import_users(self):
+        """Импорт пользователей из CSV (username, role, key) в фоновом потоке"""
+        path = filedialog.askopenfilename(
+            title="Файл с пользователями",
+            filetypes=[("CSV", "*.csv"), ("Все файлы", "*.*")]
+        )
+        if not path:
+            return
+        update_existing = messagebox.askyesno(
+            "Импорт пользователей",
+            "Обновить роль и ключ пользователей, которые уже есть в системе?\n"
+            "«Нет» — такие пользователи будут пропущены."
+        )
+        self.import_button.config(text="Импорт...")
+        self.executor.submit(
+            "import_users", import_users_csv, path, update_existing,
+            on_success=self.show_import_report,
+            on_error=self.import_failed,
+            widgets=[self.import_button]
+        )
+
+    def import_failed(self, error):
+        self.import_button.config(text="Импорт пользователей из CSV")
+        messagebox.showerror("Ошибка", f"Не удалось импортировать пользователей:\n{error}")
+
+    def show_import_report(self, report):
+        self.import_button.config(text="Импорт пользователей из CSV")
+        self.load_users()
+        errors = report["errors"]
+        summary = (
+            f"Добавлено: {report['inserted']}\n"
+            f"Обновлено: {report['updated']}\n"
+            f"Пропущено (уже есть): {report['skipped']}\n"
+            f"Не импортировано: {len(errors)}"
+        )
+        if not errors:
+            messagebox.showinfo("Импорт завершён", summary)
+            return
+
+        details = "\n".join(
+            f"строка {item['line']}: {item['username'] or '—'} — {item['error']}"
+            for item in errors[:IMPORT_ERRORS_SHOWN]
+        )
+        if len(errors) > IMPORT_ERRORS_SHOWN:
+            details += f"\n... и ещё {len(errors) - IMPORT_ERRORS_SHOWN}"
+        if messagebox.askyesno("Импорт завершён",
+                               f"{summary}\n\n{details}\n\nСохранить отчёт об ошибках в CSV?"):
+            self.save_import_errors(errors)
+
+    def save_import_errors(self, errors):
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")])
+        if not path:
+            return
+        with open(path, "w", encoding="utf-8-sig", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=["line", "username", "error"])
+            writer.writeheader()
+            writer.writerows(errors)
+
+    def close(self):
+        self.executor.shutdown()
+        self.root.destroy()
 
     def open_question_editor(self):
         editor_root = tk.Tk()
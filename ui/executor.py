@@ -0,0 +1,188 @@
+"""
+Фоновое выполнение задач для окон Tkinter.
+
+Запросы к БД выполняются в пуле потоков, тяжёлые расчёты — в пуле процессов.
+Главный поток Tk периодически (root.after) проверяет готовность задач и
+вызывает обработчики результата уже в нём, поэтому обработчики могут
+безопасно работать с виджетами.
+"""
+import logging
+import multiprocessing
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class _Task:
+    def __init__(self, key, future, saved_states, on_success, on_error, on_progress):
+        self.key = key
+        self.future = future
+        self.saved_states = saved_states  # [(виджет, состояние до запуска задачи)]
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self._progress = None
+        self._progress_shown = None
+        self._lock = threading.Lock()
+
+    def report_progress(self, value):
+        """Вызывается из рабочего потока"""
+        with self._lock:
+            self._progress = value
+
+    def take_progress(self):
+        with self._lock:
+            if self._progress == self._progress_shown:
+                return None
+            self._progress_shown = self._progress
+            return self._progress
+
+
+class TaskExecutor:
+    """
+    Запускает функции вне главного потока и возвращает результат в него.
+
+        executor.submit("export", export_to_csv, on_success=..., widgets=[button])
+
+    - повторный submit с тем же ключом, пока задача выполняется, игнорируется;
+    - переданные виджеты отключаются на время задачи и включаются после неё;
+    - cancel(key) отменяет задачу: результат будет отброшен
+      (уже начатый вызов в потоке прервать нельзя);
+    - on_busy(список ключей) вызывается при изменении набора активных задач.
+    """
+
+    def __init__(self, root, io_workers=4, cpu_workers=2, poll_ms=50, on_busy=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_busy = on_busy
+        self.cpu_workers = cpu_workers
+        self._io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="asakk-io")
+        self._cpu_pool = None  # создаётся при первой CPU-задаче
+        self._tasks = {}
+        self._poll_scheduled = False
+
+    def submit(self, key, func, *args, on_success=None, on_error=None, widgets=(),
+               cpu=False, on_progress=None, **kwargs):
+        """
+        Запускает func(*args, **kwargs) в фоне.
+        :param cpu: выполнить в пуле процессов (func и аргументы должны сериализоваться pickle)
+        :param on_progress: обработчик прогресса в главном потоке; в func передаётся
+            аргумент progress — функция, которую она вызывает со значением прогресса
+            (только для задач в потоках: в другой процесс её не передать)
+        :return: True, если задача запущена; False, если такая уже выполняется
+        """
+        if cpu and on_progress is not None:
+            raise ValueError("on_progress не поддерживается для задач в пуле процессов (cpu=True)")
+        if key in self._tasks:
+            logger.debug(f"Задача '{key}' уже выполняется, повторный запуск пропущен")
+            return False
+
+        saved_states = [(widget, self._get_state(widget)) for widget in widgets]
+        for widget in widgets:
+            self._set_state(widget, "disabled")
+
+        task = _Task(key, None, saved_states, on_success, on_error, on_progress)
+        if on_progress is not None:
+            kwargs["progress"] = task.report_progress
+
+        if cpu:
+            if self._cpu_pool is None:
+                # spawn, а не fork: дочерний процесс не должен наследовать состояние Tk
+                self._cpu_pool = ProcessPoolExecutor(
+                    max_workers=self.cpu_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            task.future = self._cpu_pool.submit(func, *args, **kwargs)
+        else:
+            task.future = self._io_pool.submit(func, *args, **kwargs)
+
+        self._tasks[key] = task
+        self._notify_busy()
+        self._schedule_poll()
+        return True
+
+    def is_running(self, key):
+        return key in self._tasks
+
+    def cancel(self, key):
+        task = self._tasks.pop(key, None)
+        if task is None:
+            return
+        task.future.cancel()
+        self._restore_widgets(task)
+        self._notify_busy()
+        logger.info(f"Задача '{key}' отменена")
+
+    def cancel_all(self):
+        for key in list(self._tasks):
+            self.cancel(key)
+
+    def shutdown(self):
+        self.cancel_all()
+        self._io_pool.shutdown(wait=False, cancel_futures=True)
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _schedule_poll(self):
+        if not self._poll_scheduled:
+            self._poll_scheduled = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._poll_scheduled = False
+        for key, task in list(self._tasks.items()):
+            if task.on_progress is not None:
+                value = task.take_progress()
+                if value is not None:
+                    task.on_progress(value)
+            if not task.future.done():
+                continue
+
+            del self._tasks[key]
+            self._restore_widgets(task)
+            self._notify_busy()
+            try:
+                result = task.future.result()
+            except Exception as e:
+                logger.error(f"Ошибка в фоновой задаче '{key}': {e}", exc_info=True)
+                self._call(task.on_error, e)
+                continue
+            self._call(task.on_success, result)
+
+        if self._tasks:
+            self._schedule_poll()
+
+    @staticmethod
+    def _call(handler, value):
+        # Ошибка в обработчике не должна останавливать опрос остальных задач
+        if handler is None:
+            return
+        try:
+            handler(value)
+        except Exception as e:
+            logger.error(f"Ошибка в обработчике результата задачи: {e}", exc_info=True)
+
+    def _restore_widgets(self, task):
+        for widget, state in task.saved_states:
+            self._set_state(widget, state)
+
+    def _notify_busy(self):
+        if self.on_busy:
+            self.on_busy(list(self._tasks))
+
+    @staticmethod
+    def _get_state(widget):
+        try:
+            return str(widget.cget("state"))
+        except tk.TclError:
+            return "normal"
+
+    @staticmethod
+    def _set_state(widget, state):
+        try:
+            if widget.winfo_exists():
+                widget.configure(state=state)
+        except tk.TclError:
+            pass
@@ -1,8 +1,12 @@
+import logging
 import tkinter as tk
 from tkinter import messagebox
-from asakk.quiz import get_categories, get_questions_by_categories  # Предполагается, что такая функция есть
+from asakk.quiz import get_categories, get_question_counts, get_questions_by_categories
+from asakk.journal import get_journal
 from ui.quiz_form import QuizFormApp
 
+logger = logging.getLogger(__name__)
+
 
 class EmployeeApp:
     def __init__(self, root, user):
@@ -14,6 +18,12 @@ class EmployeeApp:
 
         self.quiz_in_progress = False  # ✅ Флаг активности квиза
 
+        # Запускает выгрузку прохождений, оставшихся в журнале с прошлых запусков
+        try:
+            get_journal()
+        except Exception as e:
+            logger.error(f"Журнал прохождений недоступен: {e}")
+
         self.center_window_on_parent(self.root)
 
         # Заголовок
@@ -33,10 +43,13 @@ class EmployeeApp:
 
         tk.Label(category_frame, text="Категории", font=("Arial", 12), bg="#f8f9fa").pack()
 
+        # Категории и вопросы берутся из каталога, загруженного ещё в окне входа
         categories = get_categories()
+        counts = get_question_counts() if categories else {}
         for category in categories:
             var = tk.BooleanVar()
-            chk = tk.Checkbutton(category_frame, text=category, variable=var, bg="#f8f9fa")
+            chk = tk.Checkbutton(category_frame, text=f"{category} ({counts.get(category, 0)})",
+                                 variable=var, bg="#f8f9fa")
             chk.pack(anchor='w', padx=20)
             self.category_vars[category] = var
 
@@ -75,7 +88,7 @@ class EmployeeApp:
             return
 
         try:
-            questions = get_questions_by_categories(selected_categories)  # Должна поддерживать список категорий
+            questions = get_questions_by_categories(selected_categories)
             if not questions:
                 messagebox.showerror("Ошибка", "Не найдено вопросов по выбранным категориям.")
                 return
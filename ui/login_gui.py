@@ -1,5 +1,6 @@
 import tkinter as tk
 from asakk.auth import authenticate
+from asakk.quiz import prefetch_catalog
 
 class LoginWindow:
     def __init__(self, root):
@@ -23,6 +24,9 @@ class LoginWindow:
 
         tk.Button(root, text="Войти", width=25, command=self.login, bg="#3b8d99", fg="white").pack(pady=10)
 
+        # Пока вводятся логин и ключ, каталог вопросов загружается в фоне
+        prefetch_catalog()
+
     def login(self):
         username = self.entry_user.get()
         key = self.entry_key.get()
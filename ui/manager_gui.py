@@ -1,21 +1,43 @@
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
+from tkinter import ttk, messagebox, filedialog
+
+from asakk import metrics
+from asakk.cache import cache_stats
+from asakk.database import pool_stats
 
 # Импорты из report.py
 from asakk.report import (
-    analyze_all_results,
     analyze_category_data,
-    score_distribution_by_category,
-    pie_chart_by_category,
+    get_score_matrix,
+    score_counts_from_matrix,
     generate_recommendations,
     export_to_csv,
-    predict_culture,
+    get_last_scores_per_category,
+    predict_from_scores,
     calculate_category_trend,
     analyze_survey_data,
+    build_overall_chart,
+    build_score_distribution_chart,
+    build_score_pie_chart,
+    build_trend_chart,
     build_category_bar_chart
 )
+from ui.executor import TaskExecutor
+
+# Сколько секунд матрица распределения оценок используется без повторного запроса
+SCORE_MATRIX_MAX_AGE = 30.0
+# Период обновления окна диагностики, мс
+DIAGNOSTICS_REFRESH_MS = 2000
+
+
+def _fetch_prediction_data(category):
+    """Фоновая часть прогноза: последние оценки по категориям и тренд выбранной категории"""
+    return get_last_scores_per_category(10), calculate_category_trend(category)
+
+
+def _fetch_recommendations():
+    return analyze_survey_data(), generate_recommendations()
 
 
 class ManagerApp:
@@ -23,17 +45,26 @@ class ManagerApp:
         self.root = root
         self.user = user
         self.root.title("АСАКК — Панель менеджера")
-        self.root.geometry("650x500")
+        self.root.geometry("650x600")
         self.root.configure(bg="#f8f9fa")
 
+        self.executor = TaskExecutor(root, on_busy=self.update_status)
+        self.buttons = {}
+        self.score_matrix = None
+        self.score_matrix_loaded_at = 0.0
+
         self.center_window()
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+        # Заранее загружаем распределение оценок по всем категориям
+        self.executor.submit("score_matrix", get_score_matrix, on_success=self.store_score_matrix)
 
     def center_window(self):
         screen_width = self.root.winfo_screenwidth()
         screen_height = self.root.winfo_screenheight()
         window_width = 650
-        window_height = 500
+        window_height = 600
         x = (screen_width // 2) - (window_width // 2)
         y = (screen_height // 2) - (window_height // 2)
         self.root.geometry(f"{window_width}x{window_height}+{x}+{y}")
@@ -69,270 +100,340 @@ class ManagerApp:
         button_frame = tk.Frame(self.root, bg="#f8f9fa")
         button_frame.pack(pady=10)
 
-        tk.Button(button_frame, text="📊 Общий отчет", width=25,
-                  command=lambda: self.show_matplotlib_window(analyze_all_results),
-                  bg="#007bff", fg="white").pack(pady=5)
-
-        tk.Button(button_frame, text="📈 Отчет по категории", width=25,
-                  command=self.show_category_report,
-                  bg="#28a745", fg="white").pack(pady=5)
-
-        tk.Button(button_frame, text="📊 Распределение оценок", width=25,
-                  command=self.show_score_distribution,
-                  bg="#ffc107", fg="black").pack(pady=5)
-
-        tk.Button(button_frame, text="Диаграмма оценок", width=25,
-                  command=self.show_pie_chart,
-                  bg="#17a2b8", fg="white").pack(pady=5)
-
-        tk.Button(button_frame, text="📋 Рекомендации", width=25,
-                  command=self.show_recommendations,
-                  bg="#dc3545", fg="white").pack(pady=5)
-
-        tk.Button(button_frame, text="🔮 Прогнозирование", width=25,
-                  command=self.show_prediction,
-                  bg="#6f42c1", fg="white").pack(pady=5)
-
-        tk.Button(button_frame, text="📤 Экспорт CSV", width=25,
-                  command=self.export_data,
-                  bg="#6c757d", fg="white").pack(pady=5)
+        actions = [
+            ("overall", "📊 Общий отчет", self.show_overall_report, "#007bff", "white"),
+            ("category", "📈 Отчет по категории", self.show_category_report, "#28a745", "white"),
+            ("distribution", "📊 Распределение оценок", self.show_score_distribution, "#ffc107", "black"),
+            ("pie", "Диаграмма оценок", self.show_pie_chart, "#17a2b8", "white"),
+            ("recommendations", "📋 Рекомендации", self.show_recommendations, "#dc3545", "white"),
+            ("prediction", "🔮 Прогнозирование", self.show_prediction, "#6f42c1", "white"),
+            ("export", "📤 Экспорт CSV", self.export_data, "#6c757d", "white"),
+            ("diagnostics", "🩺 Диагностика", self.show_diagnostics, "#adb5bd", "black"),
+        ]
+        for key, text, command, bg, fg in actions:
+            button = tk.Button(button_frame, text=text, width=25, command=command, bg=bg, fg=fg)
+            button.pack(pady=5)
+            self.buttons[key] = button
 
         tk.Button(button_frame, text="🚪 Выйти", width=25,
-                  command=self.root.quit,
+                  command=self.close,
                   bg="#343a40", fg="white").pack(pady=5)
 
-    def disable_main_window(self):
-        for widget in self.root.winfo_children():
-            if isinstance(widget, tk.Toplevel):
-                continue
-            try:
-                widget.configure(state='disabled')
-            except tk.TclError:
-                pass
-
-    def enable_main_window(self):
-        for widget in self.root.winfo_children():
-            if isinstance(widget, tk.Toplevel):
-                continue
-            try:
-                widget.configure(state='normal')
-            except tk.TclError:
-                pass
-
-    def show_matplotlib_window(self, plot_func):
-        self.disable_main_window()
-        fig = None
-        try:
-            fig = plot_func()
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось создать график: {e}")
-            self.enable_main_window()
-            return
-        if fig is None:
-            self.enable_main_window()
-            return
+        # --- Строка состояния фоновых задач ---
+        status_frame = tk.Frame(self.root, bg="#f8f9fa")
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=5)
+
+        self.status_label = tk.Label(status_frame, text="", bg="#f8f9fa", fg="#6c757d", anchor="w")
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        self.cancel_button = tk.Button(status_frame, text="Отмена", command=self.executor.cancel_all)
+        self.progress = ttk.Progressbar(status_frame, mode="indeterminate", length=120)
+
+    def update_status(self, running):
+        """Показывает индикатор выполнения, пока есть активные фоновые задачи"""
+        if running:
+            self.status_label.config(text="Выполняется…")
+            if not self.progress.winfo_ismapped():
+                self.cancel_button.pack(side=tk.RIGHT)
+                self.progress.pack(side=tk.RIGHT, padx=5)
+                self.progress.start(10)
+        else:
+            self.status_label.config(text="")
+            self.progress.stop()
+            self.progress.pack_forget()
+            self.cancel_button.pack_forget()
+
+    def run_task(self, key, func, *args, on_success, **kwargs):
+        """Запускает задачу в фоне, отключая на это время кнопку действия"""
+        button = self.buttons.get(key.split(":")[0])
+        self.executor.submit(
+            key, func, *args,
+            on_success=on_success,
+            on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось выполнить действие: {e}"),
+            widgets=[button] if button else [],
+            **kwargs
+        )
+
+    def close(self):
+        self.executor.shutdown()
+        self.root.quit()
+
+    def show_figure(self, fig, title="График"):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
         graph_window = tk.Toplevel(self.root)
-        graph_window.title("График")
+        graph_window.title(title)
         canvas = FigureCanvasTkAgg(fig, master=graph_window)
         canvas.draw()
         canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        graph_window.protocol("WM_DELETE_WINDOW", lambda: [graph_window.destroy(), self.enable_main_window()])
 
-    def build_category_bar_chart(data, category):
-        """Строит график по данным категории"""
-        import matplotlib.pyplot as plt
-        fig, ax = plt.subplots(figsize=(8, 5))
-        ax.bar(data["questions"], data["scores"])
-        ax.set_title(f"Оценки по категории: {category}")
-        ax.set_xlabel("Вопросы")
-        ax.set_ylabel("Оценка")
-        plt.xticks(rotation=45, fontsize=8, ha='right')
-        plt.tight_layout()
-        return fig
+    def show_overall_report(self):
+        def on_success(survey_data):
+            if not survey_data:
+                messagebox.showinfo("Нет данных", "Нет результатов для анализа")
+                return
+            self.show_figure(build_overall_chart(survey_data), "Общий отчет")
 
+        self.run_task("overall", analyze_survey_data, on_success=on_success)
 
     def show_category_report(self):
-        self.disable_main_window()
         category = self.category_var.get()
-        try:
-            data = analyze_category_data(category)
+
+        def on_success(data):
             if not data:
                 messagebox.showinfo("Нет данных", f"Нет результатов для категории '{category}'")
-                self.enable_main_window()
                 return
+            self.show_figure(build_category_bar_chart(data, category), f"Отчет — {category}")
+
+        self.run_task(f"category:{category}", analyze_category_data, category, on_success=on_success)
 
-            fig = build_category_bar_chart(data, category)
-            if fig:
-                graph_window = tk.Toplevel(self.root)
-                canvas = FigureCanvasTkAgg(fig, master=graph_window)
-                canvas.draw()
-                canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-                graph_window.protocol("WM_DELETE_WINDOW", lambda: [graph_window.destroy(), self.enable_main_window()])
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось создать отчет: {e}")
-            self.enable_main_window()
+    def store_score_matrix(self, matrix):
+        self.score_matrix = matrix
+        self.score_matrix_loaded_at = time.monotonic()
+
+    def with_score_counts(self, key, category, callback):
+        """
+        Передаёт в callback распределение оценок категории. Пока матрица свежая,
+        переключение категорий не требует обращения к БД.
+        """
+        if self.score_matrix is not None and time.monotonic() - self.score_matrix_loaded_at < SCORE_MATRIX_MAX_AGE:
+            callback(score_counts_from_matrix(self.score_matrix, category))
+            return
+
+        def on_success(matrix):
+            self.store_score_matrix(matrix)
+            callback(score_counts_from_matrix(matrix, category))
+
+        self.run_task(key, get_score_matrix, on_success=on_success)
 
     def show_score_distribution(self):
-        self.disable_main_window()
         category = self.category_var.get()
-        try:
-            fig = score_distribution_by_category(category)
-            if fig:
-                graph_window = tk.Toplevel(self.root)
-                canvas = FigureCanvasTkAgg(fig, master=graph_window)
-                canvas.draw()
-                canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-                graph_window.protocol("WM_DELETE_WINDOW", lambda: [graph_window.destroy(), self.enable_main_window()])
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось создать график: {e}")
-            self.enable_main_window()
+
+        def on_counts(results):
+            if not results:
+                messagebox.showinfo("Нет данных", f"Нет результатов для категории '{category}'")
+                return
+            self.show_figure(build_score_distribution_chart(results, category), f"Распределение — {category}")
+
+        self.with_score_counts("distribution", category, on_counts)
 
     def show_pie_chart(self):
-        self.disable_main_window()
         category = self.category_var.get()
-        try:
-            fig = pie_chart_by_category(category)
-            if fig:
-                graph_window = tk.Toplevel(self.root)
-                canvas = FigureCanvasTkAgg(fig, master=graph_window)
-                canvas.draw()
-                canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-                graph_window.protocol("WM_DELETE_WINDOW", lambda: [graph_window.destroy(), self.enable_main_window()])
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось создать диаграмму: {e}")
-            self.enable_main_window()
 
-    def show_recommendations(self):
-        self.disable_main_window()
-        try:
-            analysis = analyze_survey_data()
-            recommendations = generate_recommendations()
-
-            if not analysis and not recommendations:
-                messagebox.showinfo("Нет данных", "Нет слабых мест для рекомендаций.")
-                self.enable_main_window()
+        def on_counts(results):
+            if not results:
+                messagebox.showinfo("Нет данных", f"Нет результатов для категории '{category}'")
                 return
+            self.show_figure(build_score_pie_chart(results, category), f"Диаграмма — {category}")
+
+        self.with_score_counts("pie", category, on_counts)
+
+    def show_recommendations(self):
+        self.run_task("recommendations", _fetch_recommendations, on_success=self.display_recommendations)
+
+    def display_recommendations(self, result):
+        analysis, recommendations = result
 
-            rec_window = tk.Toplevel(self.root)
-            rec_window.title("Рекомендации по улучшению культуры")
-            rec_window.geometry("800x600")
-            rec_window.configure(bg="#ffffff")
+        if not analysis and not recommendations:
+            messagebox.showinfo("Нет данных", "Нет слабых мест для рекомендаций.")
+            return
 
-            rec_text = tk.Text(rec_window, wrap=tk.WORD, height=30, width=100, bg="#f9f9f9", bd=2, relief="sunken")
-            rec_text.pack(padx=10, pady=10)
+        rec_window = tk.Toplevel(self.root)
+        rec_window.title("Рекомендации по улучшению культуры")
+        rec_window.geometry("800x600")
+        rec_window.configure(bg="#ffffff")
 
-            rec_text.insert(tk.END, "📊 Статистика по категориям:\n\n")
+        rec_text = tk.Text(rec_window, wrap=tk.WORD, height=30, width=100, bg="#f9f9f9", bd=2, relief="sunken")
+        rec_text.pack(padx=10, pady=10)
 
-            for cat, data in analysis.items():
-                rec_text.insert(tk.END, f"Категория: {cat}\n")
-                rec_text.insert(tk.END, f"  Среднее: {data['mean']}\n")
-                rec_text.insert(tk.END, f"  Стандартное отклонение: {data['std']}\n")
-                rec_text.insert(tk.END, f"  Дисперсия: {data['var']}\n")
-                rec_text.insert(tk.END, f"  Количество аномальных вопросов: {len(data['anomalies'])}\n\n")
+        rec_text.insert(tk.END, "📊 Статистика по категориям:\n\n")
 
-                if data['anomalies']:
-                    rec_text.insert(tk.END, "  🔍 Аномальные вопросы:\n")
-                    for anomaly in data['anomalies']:
-                        rec_text.insert(tk.END, f"    - {anomaly['question']} | Отклонение: {anomaly['deviation']}\n")
-                    rec_text.insert(tk.END, "\n")
+        for cat, data in analysis.items():
+            rec_text.insert(tk.END, f"Категория: {cat}\n")
+            rec_text.insert(tk.END, f"  Среднее: {data['mean']}\n")
+            rec_text.insert(tk.END, f"  Стандартное отклонение: {data['std']}\n")
+            rec_text.insert(tk.END, f"  Дисперсия: {data['var']}\n")
+            rec_text.insert(tk.END, f"  Количество аномальных вопросов: {len(data['anomalies'])}\n\n")
 
-            rec_text.insert(tk.END, "📋 Рекомендации:\n\n")
+            if data['anomalies']:
+                rec_text.insert(tk.END, "  🔍 Аномальные вопросы:\n")
+                for anomaly in data['anomalies']:
+                    rec_text.insert(tk.END, f"    - {anomaly['question']} | Отклонение: {anomaly['deviation']}\n")
+                rec_text.insert(tk.END, "\n")
 
-            if not recommendations:
-                rec_text.insert(tk.END, "  Нет слабых мест для рекомендаций.\n")
-            else:
-                for cat, events in recommendations.items():
-                    rec_text.insert(tk.END, f"➡️ {cat}:\n")
-                    for event in events:
-                        rec_text.insert(tk.END, f"- {event}\n")
-                    rec_text.insert(tk.END, "\n")
+        rec_text.insert(tk.END, "📋 Рекомендации:\n\n")
 
-            rec_text.config(state=tk.DISABLED)
+        if not recommendations:
+            rec_text.insert(tk.END, "  Нет слабых мест для рекомендаций.\n")
+        else:
+            for cat, events in recommendations.items():
+                rec_text.insert(tk.END, f"➡️ {cat}:\n")
+                for event in events:
+                    rec_text.insert(tk.END, f"- {event}\n")
+                rec_text.insert(tk.END, "\n")
 
-            tk.Button(rec_window, text="Закрыть",
-                      command=lambda: [rec_window.destroy(), self.enable_main_window()],
-                      width=20, bg="#343a40", fg="white").pack(pady=10)
+        rec_text.config(state=tk.DISABLED)
 
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить рекомендации: {e}")
-            self.enable_main_window()
+        tk.Button(rec_window, text="Закрыть",
+                  command=rec_window.destroy,
+                  width=20, bg="#343a40", fg="white").pack(pady=10)
 
     def export_data(self):
-        try:
-            export_to_csv()
-            messagebox.showinfo("Готово", "Данные успешно экспортированы в results.csv")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось экспортировать данные: {e}")
+        def on_progress(rows):
+            self.status_label.config(text=f"Экспорт: {rows:,} строк…")
+
+        def on_success(rows):
+            messagebox.showinfo("Готово", f"Данные успешно экспортированы в results.csv (строк: {rows})")
+
+        self.run_task("export", export_to_csv, on_success=on_success, on_progress=on_progress)
 
     def show_prediction(self):
         """Отображает прогнозирование изменений показателей с графиком тренда"""
-        self.disable_main_window()
         category = self.category_var.get()
 
-        try:
-            # Получаем числовой прогноз
-            prediction = predict_culture()
-            if not prediction:
-                messagebox.showinfo("Нет данных", "Нет исторических данных для прогнозирования.")
-                self.enable_main_window()
-                return
+        def on_data(result):
+            scores, trend_data = result
+            # Подгонка моделей — в пуле процессов, чтобы не занимать поток интерфейса.
+            # Ключ тот же: ключ первого этапа освобождается перед вызовом on_data,
+            # поэтому повторный запуск пропускается и кнопка отключена до конца расчёта
+            self.run_task(
+                "prediction", predict_from_scores, scores, cpu=True,
+                on_success=lambda prediction: self.display_prediction(category, prediction, trend_data)
+            )
 
-            # Получаем данные для графика по выбранной категории
-            trend_data = calculate_category_trend(category)
-            if trend_data is None:
-                messagebox.showinfo("Нет данных", f"Недостаточно данных для категории '{category}'")
-                self.enable_main_window()
-                return
+        self.run_task("prediction", _fetch_prediction_data, category, on_success=on_data)
+
+    def display_prediction(self, category, prediction, trend_data):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        if not prediction:
+            messagebox.showinfo("Нет данных", "Нет исторических данных для прогнозирования.")
+            return
+
+        if trend_data is None:
+            messagebox.showinfo("Нет данных", f"Недостаточно данных для категории '{category}'")
+            return
+
+        # Создаём окно прогноза
+        pred_window = tk.Toplevel(self.root)
+        pred_window.title(f"Прогнозирование культуры — {category}")
+        pred_window.geometry("900x600")
+        pred_window.configure(bg="#ffffff")
+
+        # Левая часть: текстовый прогноз
+        text_frame = tk.Frame(pred_window, bg="#ffffff")
+        text_frame.pack(side=tk.LEFT, padx=10, pady=10, fill=tk.Y)
+
+        tk.Label(text_frame, text="📊 Прогноз на основе линейной регрессии", font=("Arial", 14, "bold"), bg="#ffffff").pack(pady=5)
+
+        pred_text = tk.Text(text_frame, wrap=tk.WORD, height=20, width=40, bg="#f9f9f9", bd=2, relief="sunken")
+        pred_text.pack(padx=5, pady=5)
+
+        for cat, result in prediction.items():
+            pred_text.insert(tk.END, f"{cat}:\n{result}\n\n")
+        pred_text.config(state=tk.DISABLED)
+
+        # Правая часть: график тренда
+        graph_frame = tk.Frame(pred_window, bg="#ffffff")
+        graph_frame.pack(side=tk.RIGHT, padx=10, pady=10, fill=tk.BOTH, expand=True)
+
+        fig = build_trend_chart(trend_data, category)
+        canvas = FigureCanvasTkAgg(fig, master=graph_frame)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        # Кнопка закрытия
+        tk.Button(
+            pred_window,
+            text="Закрыть",
+            command=pred_window.destroy,
+            width=20,
+            bg="#343a40",
+            fg="white"
+        ).pack(pady=10)
+
+    def show_diagnostics(self):
+        """Окно с метриками точек замера (asakk.metrics), пула соединений и кэша отчётов"""
+        diag_window = tk.Toplevel(self.root)
+        diag_window.title("Диагностика")
+        diag_window.geometry("900x450")
+        diag_window.configure(bg="#ffffff")
+
+        columns = [
+            ("site", "Точка замера", 200),
+            ("calls", "Вызовы", 70),
+            ("errors", "Ошибки", 60),
+            ("p50", "p50, мс", 70),
+            ("p95", "p95, мс", 70),
+            ("db", "БД, мс", 70),
+            ("acquire", "Пул, мс", 70),
+            ("rows", "Строки", 80),
+            ("cache", "Кэш, %", 70),
+        ]
+        tree = ttk.Treeview(diag_window, columns=[name for name, _, _ in columns], show="headings", height=14)
+        for name, heading, width in columns:
+            tree.heading(name, text=heading)
+            tree.column(name, width=width, anchor="w" if name == "site" else "e")
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        summary_label = tk.Label(diag_window, text="", bg="#ffffff", fg="#6c757d", anchor="w", justify=tk.LEFT)
+        summary_label.pack(fill=tk.X, padx=10)
+
+        def ms(value):
+            return "—" if value is None else f"{value * 1000:.1f}"
+
+        def refresh():
+            tree.delete(*tree.get_children())
+            for site, data in metrics.snapshot().items():
+                if not data["calls"]:
+                    continue
+                lookups = data["cache_hits"] + data["cache_misses"]
+                tree.insert("", tk.END, values=(
+                    site,
+                    data["calls"],
+                    data["errors"],
+                    ms(data["wall"]["p50"]),
+                    ms(data["wall"]["p95"]),
+                    ms(data["db"]["mean"]),
+                    ms(data["acquire"]["mean"]),
+                    data["rows"],
+                    f"{100 * data['cache_hits'] / lookups:.0f}" if lookups else "—",
+                ))
+
+            pool = pool_stats()
+            cache = cache_stats()
+            summary_label.config(text=(
+                "Пул: " + ", ".join(f"{name} {value}" for name, value in pool.items()) + "\n"
+                + "Кэш отчётов: " + ", ".join(f"{name} {value}" for name, value in cache.items())
+            ))
+
+        def tick():
+            if diag_window.winfo_exists():
+                refresh()
+                diag_window.after(DIAGNOSTICS_REFRESH_MS, tick)
+
+        def reset():
+            metrics.reset()
+            refresh()
+
+        def save():
+            path = filedialog.asksaveasfilename(
+                parent=diag_window,
+                defaultextension=".prom",
+                initialfile="asakk_metrics.prom",
+                filetypes=[("Prometheus", "*.prom"), ("Все файлы", "*.*")]
+            )
+            if path:
+                try:
+                    metrics.dump_metrics(path)
+                except OSError as e:
+                    messagebox.showerror("Ошибка", f"Не удалось сохранить метрики: {e}", parent=diag_window)
+
+        button_frame = tk.Frame(diag_window, bg="#ffffff")
+        button_frame.pack(pady=10)
+        for text, command in (("Обновить", refresh), ("Сбросить", reset), ("Сохранить", save),
+                              ("Закрыть", diag_window.destroy)):
+            tk.Button(button_frame, text=text, width=15, command=command,
+                      bg="#343a40", fg="white").pack(side=tk.LEFT, padx=5)
 
-            # Создаём окно прогноза
-            pred_window = tk.Toplevel(self.root)
-            pred_window.title(f"Прогнозирование культуры — {category}")
-            pred_window.geometry("900x600")
-            pred_window.configure(bg="#ffffff")
-
-            # Левая часть: текстовый прогноз
-            text_frame = tk.Frame(pred_window, bg="#ffffff")
-            text_frame.pack(side=tk.LEFT, padx=10, pady=10, fill=tk.Y)
-
-            tk.Label(text_frame, text="📊 Прогноз на основе линейной регрессии", font=("Arial", 14, "bold"), bg="#ffffff").pack(pady=5)
-
-            pred_text = tk.Text(text_frame, wrap=tk.WORD, height=20, width=40, bg="#f9f9f9", bd=2, relief="sunken")
-            pred_text.pack(padx=5, pady=5)
-
-            for cat, result in prediction.items():
-                pred_text.insert(tk.END, f"{cat}:\n{result}\n\n")
-            pred_text.config(state=tk.DISABLED)
-
-            # Правая часть: график тренда
-            graph_frame = tk.Frame(pred_window, bg="#ffffff")
-            graph_frame.pack(side=tk.RIGHT, padx=10, pady=10, fill=tk.BOTH, expand=True)
-
-            fig, ax = plt.subplots(figsize=(7, 4))
-            x = list(range(len(trend_data["scores"])))
-            ax.plot(x, trend_data["scores"], label="Оценки", marker='o', linestyle='')
-            ax.plot(x, trend_data["trend"], color='red',
-                    label=f'Тренд (y = {trend_data["slope"][0]:.2f}x + {trend_data["intercept"][0]:.2f})')
-            ax.set_title(f"Тренд по категории: {category}")
-            ax.set_xlabel("Порядковый номер ответа")
-            ax.set_ylabel("Оценка")
-            ax.legend()
-            plt.tight_layout()
-
-            canvas = FigureCanvasTkAgg(fig, master=graph_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-            # Кнопка закрытия
-            tk.Button(
-                pred_window,
-                text="Закрыть",
-                command=lambda: [pred_window.destroy(), self.enable_main_window()],
-                width=20,
-                bg="#343a40",
-                fg="white"
-            ).pack(pady=10)
-
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось выполнить прогноз: {e}")
-            self.enable_main_window()
\ No newline at end of file
+        tick()
@@ -3,7 +3,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from asakk.report import add_question_with_recommendation, delete_question_by_id
-from asakk.quiz import get_all_questions
+from asakk.quiz import get_questions_page, count_questions
+from ui.executor import TaskExecutor
+from ui.virtual_list import VirtualList
+
+CATEGORIES = ["Ценности", "Коммуникации", "Лидерство", "Инновации", "Работа в команде", "Работа и личная жизнь"]
+ALL_CATEGORIES = "Все категории"
 
 
 class QuestionEditorApp:
@@ -13,9 +18,12 @@ class QuestionEditorApp:
         self.root.geometry("800x600")
         self.root.configure(bg="#f8f9fa")
 
+        self.executor = TaskExecutor(root)
+
         self.center_window()
         self.create_widgets()
         self.load_questions()  # Загружаем список вопросов сразу
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
     def center_window(self):
         screen_width = self.root.winfo_screenwidth()
@@ -41,13 +49,38 @@ class QuestionEditorApp:
 
         tk.Label(list_frame, text="Существующие вопросы:", bg="#f8f9fa").pack(anchor="w")
 
-        self.question_listbox = tk.Listbox(list_frame, height=8, width=100, font=("Arial", 10))
-        self.question_listbox.pack(side="left", fill="both", expand=True)
-
-        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.question_listbox.yview)
-        scrollbar.pack(side="right", fill="y")
-
-        self.question_listbox.config(yscrollcommand=scrollbar.set)
+        # Поиск и фильтр выполняются в БД, список грузится страницами
+        filter_frame = tk.Frame(list_frame, bg="#f8f9fa")
+        filter_frame.pack(fill="x", pady=5)
+        tk.Label(filter_frame, text="Поиск", bg="#f8f9fa").pack(side="left")
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.schedule_search())
+        tk.Entry(filter_frame, textvariable=self.search_var, width=40).pack(side="left", padx=5)
+        self.filter_combo = ttk.Combobox(
+            filter_frame,
+            values=[ALL_CATEGORIES] + CATEGORIES,
+            state="readonly",
+            width=25
+        )
+        self.filter_combo.set(ALL_CATEGORIES)
+        self.filter_combo.bind("<<ComboboxSelected>>", lambda event: self.load_questions())
+        self.filter_combo.pack(side="left", padx=5)
+        self._search_job = None
+
+        self.question_list = VirtualList(
+            list_frame,
+            fetch_page=get_questions_page,
+            row_key=lambda question: question[0],
+            format_row=lambda question: f"ID: {question[0]} | Категория: {question[2]} | Вопрос: {question[1]}",
+            count=count_questions,
+            executor=self.executor,
+            height=8,
+            width=100,
+            font=("Arial", 10),
+            empty_text="Нет созданных вопросов."
+        )
+        self.question_list.pack(fill="both", expand=True)
+        self.question_list.listbox.bind("<<ListboxSelect>>", self.on_question_selected, add="+")
 
         # --- Форма добавления ---
         form_frame = tk.Frame(self.root, bg="#f8f9fa")
@@ -57,7 +90,7 @@ class QuestionEditorApp:
 
         category_combo = ttk.Combobox(
             form_frame,
-            values=["Ценности", "Коммуникации", "Лидерство", "Инновации", "Работа в команде", "Работа и личная жизнь"],
+            values=CATEGORIES,
             state="readonly",
             width=30
         )
@@ -103,22 +136,43 @@ class QuestionEditorApp:
         tk.Button(
             self.root,
             text="Назад",
-            command=self.root.destroy,
+            command=self.close,
             width=25,
             bg="#6c757d",
             fg="white"
         ).pack(pady=10)
 
     def load_questions(self):
-        """Загружает список вопросов из базы данных"""
-        self.question_listbox.delete(0, tk.END)
-        questions = get_all_questions()
+        """Перезагружает список вопросов с текущими поиском и фильтром"""
+        # Фильтры фиксируются здесь: страницы читаются в фоновом потоке
+        search = self.search_var.get().strip()
+        category = self.filter_combo.get()
+        category = None if category == ALL_CATEGORIES else category
+        self.filters = (search, category)
+        self.question_list.reload(
+            fetch_page=lambda after, limit: get_questions_page(after, limit, search=search, category=category),
+            count=lambda: count_questions(search, category)
+        )
+
+    def schedule_search(self):
+        # Запрос уходит после паузы в наборе, а не на каждую букву
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(300, self.apply_search)
+
+    def apply_search(self):
+        self._search_job = None
+        self.load_questions()
 
-        if not questions:
-            self.question_listbox.insert(tk.END, "Нет созданных вопросов.")
-        else:
-            for question in questions:
-                self.question_listbox.insert(tk.END, f"ID: {question[0]} | Категория: {question[2]} | Вопрос: {question[1]}")
+    def on_question_selected(self, event=None):
+        question = self.question_list.selected_row()
+        if question is not None:
+            self.entry_delete_id.delete(0, tk.END)
+            self.entry_delete_id.insert(0, str(question[0]))
+
+    def matches_filters(self, question_text, category):
+        search, filter_category = self.filters
+        return search.lower() in question_text.lower() and filter_category in (None, category)
 
     def add_question_and_event(self):
         category = self.category_combo.get()
@@ -134,11 +188,12 @@ class QuestionEditorApp:
             return
 
         try:
-            add_question_with_recommendation(category, question_text, event_text)
+            question_id = add_question_with_recommendation(category, question_text, event_text)
             messagebox.showinfo("Готово", "Вопрос и мероприятие успешно добавлены!", parent=self.root)
             self.entry_question.delete(0, tk.END)
             self.entry_event.delete(0, tk.END)
-            self.load_questions()
+            if question_id is not None and self.matches_filters(question_text, category):
+                self.question_list.insert_row((question_id, question_text, category))
             self.root.lift()  # Поднимаем окно редактора поверх других
             self.root.focus_force()  # Фокусируем его
         except Exception as e:
@@ -156,8 +211,12 @@ class QuestionEditorApp:
             delete_question_by_id(qid_int)
             messagebox.showinfo("Готово", f"Вопрос с ID {qid_int} удален.", parent=self.root)
             self.entry_delete_id.delete(0, tk.END)
-            self.load_questions()
+            self.question_list.remove_row(qid_int)
             self.root.lift()
             self.root.focus_force()
         except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось удалить вопрос:\n{e}", parent=self.root)
\ No newline at end of file
+            messagebox.showerror("Ошибка", f"Не удалось удалить вопрос:\n{e}", parent=self.root)
+
+    def close(self):
+        self.executor.shutdown()
+        self.root.destroy()
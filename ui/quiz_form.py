@@ -1,6 +1,11 @@
+import logging
+import sqlite3
 import tkinter as tk
 from tkinter import messagebox
-from asakk.report import save_answers
+from asakk.journal import submit_answers
+from asakk.quiz import store_answers
+
+logger = logging.getLogger(__name__)
 
 
 class QuizFormApp:
@@ -64,7 +69,13 @@ class QuizFormApp:
 
     def finish_quiz(self):
         try:
-            save_answers(self.user[0], self.answers)
+            # Ответы сразу ложатся в локальный журнал, в БД они уйдут в фоне
+            try:
+                submit_answers(self.user[0], self.answers)
+            except (sqlite3.Error, OSError) as e:
+                # Журнал недоступен (заблокирован, повреждён, нет места): пишем напрямую
+                logger.error(f"Не удалось записать прохождение в журнал: {e}", exc_info=True)
+                store_answers(self.user[0], self.answers)
             messagebox.showinfo("Готово", "Ваш опрос пройден!")
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось сохранить данные: {e}")
@@ -0,0 +1,255 @@
+"""
+Виртуализированный список для Tkinter.
+
+В Listbox находятся только видимые строки; полосу прокрутки и колесо мыши
+обрабатывает сам виджет. Данные подгружаются страницами (по ключу последней
+загруженной строки) по мере прокрутки, при наличии TaskExecutor — в фоне.
+После правок список обновляется точечно: insert_row / update_row / remove_row.
+"""
+import bisect
+import itertools
+import tkinter as tk
+from tkinter import ttk
+
+_list_ids = itertools.count(1)
+
+
+class VirtualList(tk.Frame):
+    """
+        VirtualList(parent,
+                    fetch_page=lambda after, limit: get_users_page(after, limit),
+                    row_key=lambda row: row[1],
+                    format_row=lambda row: f"{row[1]} ({row[2]})",
+                    count=count_users,
+                    executor=executor)
+
+    :param fetch_page: (after, limit) -> список строк, отсортированных по row_key;
+        after — row_key последней загруженной строки или None
+    :param row_key: ключ сортировки строки (тот же, что в запросе страницы)
+    :param row_id: идентификатор строки для точечных обновлений (по умолчанию row[0])
+    :param format_row: текст строки в списке
+    :param count: () -> общее число строк, для размера полосы прокрутки (необязательно)
+    :param executor: ui.executor.TaskExecutor; без него страницы грузятся синхронно
+    """
+
+    def __init__(self, master, fetch_page, row_key, format_row, row_id=None, count=None,
+                 executor=None, page_size=200, height=10, empty_text="Нет данных", **listbox_options):
+        super().__init__(master)
+        self.fetch_page = fetch_page
+        self.row_key = row_key
+        self.row_id = row_id or (lambda row: row[0])
+        self.format_row = format_row
+        self.count = count
+        self.executor = executor
+        self.page_size = page_size
+        self.height = height
+        self.empty_text = empty_text
+
+        self.rows = []
+        self.keys = []  # row_key загруженных строк, для вставки на место
+        self.has_more = True
+        self.total = None
+        self.offset = 0
+        self._selected_id = None
+        self._generation = 0
+        self._task_key = f"virtual_list:{next(_list_ids)}"
+
+        self.listbox = tk.Listbox(self, height=height, activestyle="none", **listbox_options)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.listbox.bind("<MouseWheel>", self._on_mousewheel)
+        self.listbox.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll_by(3))
+        self.listbox.bind("<Up>", lambda event: self._move_selection(-1))
+        self.listbox.bind("<Down>", lambda event: self._move_selection(1))
+        self.listbox.bind("<Prior>", lambda event: self._move_selection(-self.height))
+        self.listbox.bind("<Next>", lambda event: self._move_selection(self.height))
+
+    # --- Загрузка данных ---
+
+    def reload(self, fetch_page=None, count=None):
+        """Сбрасывает список и загружает первую страницу (например, после смены фильтра)"""
+        if fetch_page is not None:
+            self.fetch_page = fetch_page
+        if count is not None:
+            self.count = count
+        self._generation += 1
+        self.rows = []
+        self.keys = []
+        self.has_more = True
+        self.total = None
+        self.offset = 0
+        self._render()
+        self._request_count()
+        self._ensure_loaded()
+
+    def _request_count(self):
+        if self.count is not None:
+            self._run(f"{self._task_key}:count", self.count, self._on_count, retry=self._request_count)
+
+    def _run(self, key, func, callback, *args, retry=None):
+        generation = self._generation
+
+        def deliver(result):
+            if generation == self._generation:
+                callback(result)
+            else:
+                # Ответ на запрос до смены фильтра: отбрасываем и запрашиваем заново
+                # (повторный запуск с тем же ключом, пока шёл старый, был пропущен)
+                (retry or self._ensure_loaded)()
+
+        if self.executor is None:
+            deliver(func(*args))
+        else:
+            self.executor.submit(key, func, *args, on_success=deliver)
+
+    def _ensure_loaded(self):
+        needed = self.offset + self.height - len(self.rows)
+        if needed <= 0 or not self.has_more:
+            return
+        if self.executor is not None and self.executor.is_running(self._task_key):
+            return
+        after = self.keys[-1] if self.keys else None
+        limit = needed + self.page_size
+        self._run(self._task_key, self.fetch_page, lambda rows: self._on_page(rows, limit), after, limit)
+
+    def _on_page(self, rows, limit):
+        self.rows.extend(rows)
+        self.keys.extend(self.row_key(row) for row in rows)
+        self.has_more = len(rows) >= limit
+        if not self.has_more:
+            self.total = len(self.rows)
+        self._render()
+        self._ensure_loaded()
+
+    def _on_count(self, total):
+        self.total = total
+        self._render()
+
+    # --- Отрисовка и прокрутка ---
+
+    def _virtual_size(self):
+        size = len(self.rows) + (1 if self.has_more else 0)
+        return max(size, self.total or 0)
+
+    def _render(self):
+        self.listbox.delete(0, tk.END)
+        visible = self.rows[self.offset:self.offset + self.height]
+        for index, row in enumerate(visible):
+            self.listbox.insert(tk.END, self.format_row(row))
+            if self._selected_id is not None and self.row_id(row) == self._selected_id:
+                self.listbox.selection_set(index)
+        if not self.rows and not self.has_more:
+            self.listbox.insert(tk.END, self.empty_text)
+
+        size = self._virtual_size()
+        if size <= self.height:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / size, min(1.0, (self.offset + self.height) / size))
+
+    def scroll_to(self, offset):
+        max_offset = max(0, self._virtual_size() - self.height)
+        offset = min(max(0, int(offset)), max_offset)
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+        self._ensure_loaded()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.offset + rows)
+        return "break"
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.scroll_to(float(args[0]) * self._virtual_size())
+        elif action == "scroll":
+            amount, unit = int(args[0]), args[1]
+            self.scroll_by(amount * (self.height if unit == "pages" else 1))
+
+    def _on_mousewheel(self, event):
+        # Windows: delta кратна 120, macOS: единицы
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll_by(-3 * step)
+
+    # --- Выделение ---
+
+    def _on_select(self, event=None):
+        selection = self.listbox.curselection()
+        if selection:
+            index = self.offset + selection[0]
+            if index < len(self.rows):
+                self._selected_id = self.row_id(self.rows[index])
+
+    def _move_selection(self, step):
+        current = self._index_of(self._selected_id)
+        target = 0 if current is None else current + step
+        target = min(max(0, target), len(self.rows) - 1)
+        if target < 0:
+            return "break"
+        self._selected_id = self.row_id(self.rows[target])
+        if target < self.offset:
+            self.offset = target
+        elif target >= self.offset + self.height:
+            self.offset = target - self.height + 1
+        self._render()
+        self._ensure_loaded()
+        return "break"
+
+    def selected_row(self):
+        """Выделенная строка (исходные данные, не текст) или None"""
+        index = self._index_of(self._selected_id)
+        return None if index is None else self.rows[index]
+
+    def _index_of(self, row_id):
+        if row_id is None:
+            return None
+        for index, row in enumerate(self.rows):
+            if self.row_id(row) == row_id:
+                return index
+        return None
+
+    # --- Точечные изменения ---
+
+    def insert_row(self, row):
+        """Добавляет строку на её место по row_key, не перезагружая список"""
+        key = self.row_key(row)
+        if self.total is not None:
+            self.total += 1
+        if self.has_more and self.keys and key > self.keys[-1]:
+            # Строка за пределами загруженного: придёт с одной из следующих страниц
+            self._render()
+            return
+        index = bisect.bisect_right(self.keys, key)
+        self.keys.insert(index, key)
+        self.rows.insert(index, row)
+        self._render()
+
+    def update_row(self, row):
+        """Заменяет загруженную строку с тем же row_id"""
+        index = self._index_of(self.row_id(row))
+        if index is None:
+            return
+        if self.row_key(row) != self.keys[index]:
+            self.remove_row(self.row_id(row))
+            self.insert_row(row)
+            return
+        self.rows[index] = row
+        self._render()
+
+    def remove_row(self, row_id):
+        index = self._index_of(row_id)
+        if index is None:
+            return
+        del self.rows[index]
+        del self.keys[index]
+        if self.total is not None:
+            self.total -= 1
+        if self._selected_id == row_id:
+            self._selected_id = None
+        self.offset = min(self.offset, max(0, self._virtual_size() - self.height))
+        self._render()
+        self._ensure_loaded()